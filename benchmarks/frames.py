@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""Compare FrameBuilder with building a DataFrame from a list of dicts.
+
+Decodes a synthetic 200k device ``.itjson`` stream both ways and reports
+wall time and peak traced memory. Requires pandas.
+
+    PYTHONPATH=. python benchmarks/frames.py
+"""
+import json
+import random
+import time
+import tracemalloc
+
+import pandas
+
+from kismet_rest.frames import FrameBuilder
+
+DEVICES = 200000
+MANUFACTURERS = ["Acme", "Apple", "Intel", "Unknown"]
+
+
+def lines():
+    """Return the encoded stream."""
+    return [json.dumps({
+        "kismet.device.base.macaddr": "AA:BB:CC:{:02X}:{:02X}:{:02X}".format(
+            num >> 16 & 255, num >> 8 & 255, num & 255),
+        "kismet.device.base.manuf": random.choice(MANUFACTURERS),
+        "kismet.device.base.phyname": "IEEE802.11",
+        "kismet.device.base.last_time": 1700000000 + num,
+        "kismet.device.base.packets.total": num % 1000,
+    }) for num in range(DEVICES)]
+
+
+def measure(name, build, stream, trace):
+    """Print the time, or peak memory, of one way of building the frame."""
+    if trace:
+        tracemalloc.start()
+    start = time.time()
+    frame = build(json.loads(line) for line in stream)
+    elapsed = time.time() - start
+    if trace:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print("{:16} peak {:6.1f} MiB".format(name, peak / 2.0 ** 20))
+    else:
+        size = frame.memory_usage(deep=True).sum()
+        print("{:16} {:6.2f}s, frame {:6.1f} MiB".format(
+            name, elapsed, size / 2.0 ** 20))
+
+
+def main():
+    """Run both builders, timed and then traced."""
+    stream = lines()
+    builders = [("list + DataFrame", lambda records: pandas.DataFrame(
+        list(records))),
+                ("FrameBuilder", lambda records: FrameBuilder().extend(
+                    records).to_dataframe())]
+    for trace in (False, True):
+        for name, build in builders:
+            measure(name, build, stream, trace)
+
+
+if __name__ == "__main__":
+    main()
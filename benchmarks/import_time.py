@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""Compare the cost of importing kismet_rest with importing requests.
+
+Each import runs in a fresh interpreter; the best of five runs is printed.
+
+    PYTHONPATH=. python benchmarks/import_time.py
+"""
+import json
+import subprocess
+import sys
+
+RUNS = 5
+
+PROBES = [
+    ("kismet_rest + Devices", """
+import json, time
+start = time.time()
+import kismet_rest
+devices = kismet_rest.Devices(session_cache="/nonexistent/session")
+print(json.dumps(time.time() - start))
+"""),
+    ("requests", """
+import json, time
+start = time.time()
+import requests
+print(json.dumps(time.time() - start))
+"""),
+]
+
+
+def run_probe(code):
+    """Run ``code`` in a fresh interpreter and return the time it prints."""
+    output = subprocess.check_output([sys.executable, "-c", code])
+    return json.loads(output.decode("utf-8").strip().splitlines()[-1])
+
+
+def main():
+    """Time each import."""
+    for name, code in PROBES:
+        elapsed = min(run_probe(code) for _ in range(RUNS))
+        print("{:24} {:6.1f}ms".format(name, elapsed * 1000))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""Compare OUI matching on MAC strings with kismet_rest.macs integers.
+
+Matches 200k random addresses against 100 OUIs: per-address string prefix
+tests, then bulk integer parsing and matching, with numpy if installed.
+
+    PYTHONPATH=. python benchmarks/macs.py
+"""
+import random
+import time
+
+from kismet_rest import macs
+
+ADDRESSES = 200000
+OUIS = 100
+
+
+def timed(name, function, *args):
+    """Print how long ``function`` takes and return its result."""
+    start = time.time()
+    result = function(*args)
+    print("{:24} {:6.3f}s".format(name, time.time() - start))
+    return result
+
+
+def main():
+    """Run each way of matching and check they agree."""
+    addresses = [":".join("{:02X}".format(random.randrange(256))
+                          for _ in range(6)) for _ in range(ADDRESSES)]
+    masks = macs.oui_masks(random.sample(range(2 ** 24), OUIS))
+    prefixes = [mask[:8] for mask in masks]
+    expected = timed("string prefixes", lambda: [
+        any(address.startswith(prefix) for prefix in prefixes)
+        for address in addresses])
+    values = timed("macs_to_ints", macs.macs_to_ints, addresses)
+    assert timed("match_masks", macs.match_masks, values, masks) == expected
+    try:
+        import numpy
+    except ImportError:
+        return
+    array = numpy.frombuffer(values, dtype=numpy.uint64)
+    result = timed("match_masks (numpy)", macs.match_masks, array, masks)
+    assert result.tolist() == expected
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""Compare line framing of a large ``.itjson`` body.
+
+Splits a synthetic 65 MB body of 100k device records with requests'
+``iter_lines`` (512-byte reads, as the requests transport used before) and
+with :py:func:`kismet_rest.transport.split_lines` at two read sizes. Prints
+the best of three runs.
+
+    PYTHONPATH=. python benchmarks/split_lines.py
+"""
+import json
+import time
+
+from requests.models import Response
+
+from kismet_rest.transport import split_lines
+
+DEVICES = 100000
+RUNS = 3
+
+
+def body():
+    """Return the encoded stream."""
+    record = {"kismet.device.base.macaddr": "AA:BB:CC:00:00:00",
+              "kismet.device.base.name": "x" * 520,
+              "kismet.device.base.last_time": 1700000000}
+    return b"".join(json.dumps(dict(record, n=num)).encode("utf-8") + b"\n"
+                    for num in range(DEVICES))
+
+
+def chunked(data, size):
+    """Yield ``data`` in reads of ``size`` bytes."""
+    view = memoryview(data)
+    for offset in range(0, len(data), size):
+        yield bytes(view[offset:offset + size])
+
+
+def requests_lines(data):
+    """Frame lines the way requests' iter_lines does."""
+    response = Response()
+    response._content = False
+    response._content_consumed = False
+    response.raw = None
+    response.iter_content = lambda chunk_size, decode_unicode=False: (
+        chunked(data, chunk_size))
+    return response.iter_lines()
+
+
+def main():
+    """Time each way of framing the body."""
+    data = body()
+    print("{:.1f} MB, {} lines".format(len(data) / 1e6, DEVICES))
+    cases = [("requests iter_lines (512 B)", requests_lines),
+             ("split_lines, 16 KiB reads",
+              lambda data: split_lines(chunked(data, 16384))),
+             ("split_lines, 256 KiB reads",
+              lambda data: split_lines(chunked(data, 262144)))]
+    for name, frame in cases:
+        best = None
+        for _ in range(RUNS):
+            start = time.time()
+            count = sum(1 for _ in frame(data))
+            elapsed = time.time() - start
+            best = elapsed if best is None else min(best, elapsed)
+        assert count == DEVICES
+        print("{:30} {:6.3f}s".format(name, best))
+
+
+if __name__ == "__main__":
+    main()
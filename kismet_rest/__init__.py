@@ -2,24 +2,76 @@
 
 (c) 2018-2023 Mike Kershaw / Dragorn
 Licensed under GPL2 or above
+
+Endpoint classes are imported on first use (PEP 562), so ``import
+kismet_rest`` does not pull in ``requests`` or any endpoint module until one
+is needed.
 """
 
+import importlib
+import sys
+
 from .exceptions import KismetConnectorException  # NOQA
 from .exceptions import KismetLoginException  # NOQA
 from .exceptions import KismetRequestException  # NOQA
 from .exceptions import KismetConnectionError  # NOQA
-
-from .alerts import Alerts  # NOQA
-from .base_interface import BaseInterface  # NOQA
-from .datasources import Datasources  # NOQA
-from .devices import Devices  # NOQA
-from .gps import GPS  # NOQA
-from .logger import Logger  # NOQA
-from .legacy import KismetConnector  # NOQA
-from .messages import Messages  # NOQA
-from .packetchain import Packetchain  # NOQA
-# from .packets import Packets  # NOQA
-from .system import System  # NOQA
-from .utility import Utility  # NOQA
+from .exceptions import KismetTimeoutError  # NOQA
+from .exceptions import KismetCircuitOpenError  # NOQA
 
 __version__ = "2025.03.13"
+
+_lazy_attributes = {
+    "AdaptiveLimiter": "limiter",
+    "AlertEmitter": "emitter",
+    "Alerts": "alerts",
+    "BaseInterface": "base_interface",
+    "CircuitBreaker": "breaker",
+    "DatasourceMonitor": "monitor",
+    "Datasources": "datasources",
+    "Devices": "devices",
+    "GPS": "gps",
+    "HopScheduler": "hopscheduler",
+    "Logger": "logger",
+    "KismetConnector": "legacy",
+    "Messages": "messages",
+    "OuiTable": "macs",
+    "Packetchain": "packetchain",
+    "Packets": "packets",
+    "RecordingTransport": "cassette",
+    "ReplayTransport": "cassette",
+    "SnapshotDiff": "snapshot",
+    "System": "system",
+    "HTTP2Transport": "transport",
+    "InMemoryTransport": "transport",
+    "RequestsTransport": "transport",
+    "Transport": "transport",
+    "UnixSocketTransport": "unixsocket",
+    "Utility": "utility",
+}
+
+__all__ = ["KismetConnectorException", "KismetLoginException",
+           "KismetRequestException", "KismetConnectionError",
+           "KismetTimeoutError", "KismetCircuitOpenError",
+           "__version__"] + sorted(_lazy_attributes)
+
+
+def __getattr__(name):
+    """Import the module providing ``name`` on first access."""
+    if name not in _lazy_attributes:
+        msg = "module {} has no attribute {}".format(__name__, name)
+        raise AttributeError(msg)
+    module = importlib.import_module("." + _lazy_attributes[name], __name__)
+    value = getattr(module, name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    """List lazily-imported attributes alongside loaded ones."""
+    return sorted(set(globals()) | set(_lazy_attributes))
+
+
+if sys.version_info < (3, 7):
+    # Module __getattr__ is not supported, import everything up front.
+    for _name in _lazy_attributes:
+        __getattr__(_name)
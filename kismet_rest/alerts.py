@@ -1,6 +1,8 @@
 """Alerts abstraction."""
 
 from .base_interface import BaseInterface
+from .resumable import ResumableStream
+from .resumable import record_digest
 
 
 class Alerts(BaseInterface):
@@ -21,6 +23,10 @@ class Alerts(BaseInterface):
         Keyword args:
             ts_sec (int): Starting timestamp in seconds since Epoch.
             ts_usec (int): Microseconds for starting timestamp.
+            resume_attempts (int): Re-issue the request up to this many
+                times if the connection drops, starting from the timestamp
+                of the last alert delivered and skipping alerts which were
+                already delivered. Defaults to 0 (fail immediately).
 
         Yield:
             dict: Alert json, or None if callback is set.
@@ -30,12 +36,44 @@ class Alerts(BaseInterface):
             callback_settings["callback"] = callback
             if callback_args:
                 callback_settings["callback_args"] = callback_args
+        resume_attempts = kwargs.pop("resume_attempts", 0)
         query_args = self.kwargs_defaults.copy()
         query_args.update(kwargs)
         url = self.url_template.format(**query_args)
+        if resume_attempts:
+            deadline_at = self.call_deadline()
+            stream = ResumableStream(
+                lambda position: self.interact_yield(
+                    "GET", self.resume_url(query_args, position),
+                    deadline_at=deadline_at),
+                identity=record_digest,
+                cursor=lambda alert: alert.get("kismet.alert.timestamp"),
+                attempts=resume_attempts, deadline_at=deadline_at)
+            for result in stream.deliver(callback, callback_args):
+                yield result
+            return
         for result in self.interact_yield("GET", url, **callback_settings):
             yield result
 
+    def resume_url(self, query_args, position):
+        """Return the alerts URL starting just before ``position``.
+
+        Args:
+            query_args (dict): Arguments of the original request.
+            position (float): Timestamp of the last alert delivered, or None
+                to repeat the original request.
+        """
+        if position is None:
+            return self.url_template.format(**query_args)
+        # Start one microsecond early so alerts sharing the timestamp of the
+        # last one delivered are not lost; they are deduplicated instead.
+        # Zero-padded, the microseconds read the same as an integer or as
+        # the fractional part of a float.
+        usecs = int(round(position * 1000000)) - 1
+        return self.url_template.format(
+            ts_sec=usecs // 1000000,
+            ts_usec="{:06d}".format(usecs % 1000000))
+
     def define(self, name, description, rate="10/min", burst="1/sec",
                phyname=None):
         """Define an alert.
@@ -1,17 +1,22 @@
 """Base interface. All API interaction, at a low level, happens here."""
 
+import copy
 import json
 import os
 import sys
-from urllib3.util.retry import Retry
-
-import requests
-from requests.adapters import HTTPAdapter
+import time
 
+from .limiter import LimitedResponse
 from .logger import Logger
+from .parallel import decode_parallel
+from .parallel import line_chunks
+from .exceptions import KismetConnectionError
 from .exceptions import KismetLoginException
 from .exceptions import KismetRequestException
-from .exceptions import KismetConnectionError
+from .exceptions import KismetTimeoutError
+from .frames import FrameBuilder
+from .records import LazyRecord
+from .transport import Transport
 from .utility import Utility
 
 if sys.version_info[0] < 3:
@@ -44,10 +49,48 @@ class BaseInterface(object):
         session_cache (str): Path for storing session cache information.
             Defaults to `~/.pykismet_session`.
         debug (bool): Set to True to enble debug logging.
+        compression (bool): Negotiate compressed responses with Kismet (or
+            the reverse proxy in front of it). Defaults to True. ``gzip``
+            and ``deflate`` are always offered, ``br`` and ``zstd`` are
+            offered when the corresponding decoders are installed.
+        transport (str or Transport): HTTP transport used for all requests.
+            ``requests`` (HTTP/1.1, the default), ``http2`` (multiplexed
+            HTTP/2, requires ``httpx``), or a :py:class:`Transport` instance,
+            such as a :py:class:`UnixSocketTransport` or an
+            :py:class:`InMemoryTransport`, which may be shared between
+            several endpoint objects.
+        timeout (float or tuple): Socket timeout in seconds for every
+            request, or a ``(connect, read)`` tuple. Defaults to None (wait
+            forever).
+        deadline (float): Overall time limit in seconds for each call,
+            including reading the whole of a streamed response. Defaults to
+            None (no limit).
+        lazy_records (bool): Return each streamed record as a
+            :py:class:`kismet_rest.records.LazyRecord`, which keeps the raw
+            JSON and only decodes it when first read. Saves decoding time
+            for records which are skipped or forwarded unread. Defaults to
+            False.
+        limiter (AdaptiveLimiter): Limit concurrent requests per host,
+            adapting to server latency and errors. May be shared by several
+            endpoint objects. Defaults to None (no limit).
+        breaker (CircuitBreaker): Fail fast, with
+            :py:class:`kismet_rest.KismetConnectionError`, on hosts which
+            keep failing. May be shared by several endpoint objects.
+            Defaults to None.
+        read_size (int): Bytes per read when splitting streamed responses
+            into lines. Defaults to None: as much as the transport has
+            received, one HTTP chunk at a time for Kismet's streams.
+
+    The transport, and the HTTP library behind it, is only constructed when
+    the first request is made.
     """
 
     permitted_kwargs = ["host_uri", "username", "password",
-                        "session_cache", "debug", "apikey"]
+                        "session_cache", "debug", "apikey", "compression",
+                        "transport", "timeout", "deadline", "lazy_records",
+                        "limiter", "breaker", "read_size"]
+    # True for endpoints whose all() sends a ``fields`` list to Kismet.
+    fields_payload = False
 
     def __init__(self, host_uri='http://127.0.0.1:2501',
                  sessioncache_path='~/.pykismet_session', **kwargs):
@@ -61,19 +104,54 @@ class BaseInterface(object):
         self.apikey = None
         self.session_cache = sessioncache_path
         self.debug = False
+        self.compression = True
+        self.transport = "requests"
+        self.timeout = None
+        self.deadline = None
+        self.lazy_records = False
+        self.limiter = None
+        self.breaker = None
+        self.read_size = None
+        self.transfer_stats = TransferStats()
         # Set the default path for storing sessions
         # self.sessioncache_path = None
+        self.is_py35 = sys.version_info[0] == 3 and sys.version_info[1] == 5
         self.set_attributes_from_dict(kwargs)
-        self.session = requests.Session()
-        self.set_session_cache(self.session_cache)
-        self.create_client()
+        self.sessioncache_path = os.path.expanduser(self.session_cache)
         if self.debug:
             self.logger.set_debug()
+
+    def __getattr__(self, name):
+        """Build the legacy retrying client the first time it is used."""
+        if name in ["client", "retries", "http_adapter", "session_mount"]:
+            self.create_client()
+            return self.__dict__[name]
+        msg = "{} object has no attribute {}".format(
+            type(self).__name__, name)
+        raise AttributeError(msg)
+
+    @property
+    def transport(self):
+        """Return the transport, building it on first use."""
+        if not isinstance(self._transport, Transport):
+            self._transport = Transport.create(self._transport,
+                                               self.compression)
+            self.setup_transport()
+        return self._transport
+
+    @transport.setter
+    def transport(self, value):
+        """Set the transport, or the name of the transport to build."""
+        self._transport = value
+
+    def setup_transport(self):
+        """Apply compression, session cache and credentials to transport."""
+        self.set_compression(self.compression)
+        self.set_session_cache(self.session_cache)
         if self.username:
             self.set_login(self.username, self.password)
         if self.apikey:
             self.set_apikey(self.apikey)
-        self.is_py35 = sys.version_info[0] == 3 and sys.version_info[1] == 5
 
     def set_attributes_from_dict(self, kwa):
         """Set instance attributes from dictionary if on whitelist."""
@@ -86,6 +164,9 @@ class BaseInterface(object):
 
         This client implements connection re-use and exponential back-off.
         """
+        from urllib3.util.retry import Retry
+        import requests
+        from requests.adapters import HTTPAdapter
         self.client = requests.Session()
         self.retries = Retry(total=self.max_retries,
                              status_forcelist=self.retry_statuses,
@@ -98,6 +179,65 @@ class BaseInterface(object):
         self.session_mount = "{}://{}".format(proto, host)
         self.client.mount(self.session_mount, self.http_adapter)
 
+    @property
+    def session(self):
+        """Return the ``requests.Session`` used by the requests transport.
+
+        None when another transport is in use.
+        """
+        return getattr(self.transport, "session", None)
+
+    def set_compression(self, enabled):
+        """Enable or disable compressed transfer encodings.
+
+        Compressed responses are decoded incrementally as the body is read,
+        so streamed ``.itjson`` responses are still processed line by line.
+
+        Args:
+            enabled (bool): Offer every encoding the transport can decode if
+                True, request an uncompressed body if False.
+        """
+        self.compression = bool(enabled)
+        self.transport.set_compression(self.compression)
+
+    def with_options(self, **kwargs):
+        """Return a copy of this object with different call options.
+
+        The copy shares this object's transport, session and statistics, so
+        it is cheap to create one per call::
+
+            for device in devices.with_options(deadline=30).all():
+                ...
+
+        Keyword Args:
+            timeout (float or tuple): See :py:class:`BaseInterface`.
+            deadline (float): See :py:class:`BaseInterface`.
+            lazy_records (bool): See :py:class:`BaseInterface`.
+        """
+        options = ["timeout", "deadline", "lazy_records"]
+        for kwarg in kwargs:
+            if kwarg not in options:
+                raise TypeError("Unsupported option: {}".format(kwarg))
+        self.transport  # Build before copying, so the copy shares it.
+        clone = copy.copy(self)
+        for kwarg, val in kwargs.items():
+            setattr(clone, kwarg, val)
+        return clone
+
+    def cancellable(self, iterable):
+        """Wrap a streaming result so it can be abandoned early.
+
+        Cancelling the returned :py:class:`StreamHandle`, or leaving its
+        ``with`` block, closes the underlying response and releases its
+        connection::
+
+            with devices.cancellable(devices.all()) as stream:
+                for device in stream:
+                    if enough(device):
+                        break
+        """
+        return StreamHandle(iterable)
+
     def log_init(self):
         """Initialize logging."""
         lib_ver = Utility.get_lib_version()
@@ -108,12 +248,133 @@ class BaseInterface(object):
 
     def get_kismet_version(self):
         """Return version of Kismet, as reported by Kismet REST interface."""
+        return self.interact("GET", "system/status.json")
+
+    def call_deadline(self, **kwargs):
+        """Return the absolute deadline for a call starting now, or None.
+
+        An absolute ``deadline_at`` is passed through unchanged, so a call
+        repeated after a failure keeps the deadline of the first attempt.
+        """
+        if kwargs.get("deadline_at") is not None:
+            return kwargs["deadline_at"]
+        deadline = kwargs.get("deadline", self.deadline)
+        if deadline is None:
+            return None
+        return time.time() + deadline
+
+    def send_request(self, verb, full_url, data=None, stream=False,
+                     timeout=None, deadline_at=None):
+        """Send one request through the transport, honouring the deadline.
+
+        The connect and read timeouts are shortened so that no single socket
+        operation can outlive the deadline. When set, the circuit breaker is
+        consulted first, then the limiter provides a slot, held by streamed
+        responses until they are closed. Both are told the outcome,
+        including a connection lost while a stream is read.
+        """
+        if timeout is None:
+            timeout = self.timeout
+        if deadline_at is not None:
+            remaining = deadline_at - time.time()
+            if remaining <= 0:
+                msg = "Deadline exceeded before {} {}".format(verb, full_url)
+                raise KismetTimeoutError(msg)
+            if not isinstance(timeout, tuple):
+                timeout = (timeout, timeout)
+            timeout = tuple([remaining if part is None
+                             else min(part, remaining) for part in timeout])
+        host = self.host_netloc()
+        breaker = self.breaker
+        limiter = self.limiter
+        # The breaker is asked first, so an open circuit fails without
+        # waiting for a slot.
+        if breaker is not None:
+            breaker.before(host)
+        if limiter is not None:
+            wait = None
+            if deadline_at is not None:
+                wait = max(0, deadline_at - time.time())
+            if not limiter.acquire(host, wait):
+                if breaker is not None:
+                    breaker.cancel(host)
+                msg = "Deadline exceeded waiting to send to {}".format(host)
+                raise KismetTimeoutError(msg)
+
+        def failed():
+            """Report a connection lost before or during the response."""
+            if breaker is not None:
+                breaker.failure(host)
+            if limiter is not None:
+                limiter.observe(host, failed=True)
+
+        def release():
+            """Free the limiter slot."""
+            if limiter is not None:
+                limiter.release(host)
+
+        start = time.time()
         try:
-            kismet_version = self.interact("GET", "system/status.json")
-        except (requests.exceptions.ConnectionError) as err:
-            msg = "Unable to connecto to Kismet: {}".format(err)
-            raise KismetConnectionError(msg)
-        return kismet_version
+            response = self.transport.request(verb, full_url, data=data,
+                                              stream=stream, timeout=timeout)
+        except KismetConnectionError:
+            failed()
+            release()
+            raise
+        except Exception:
+            release()
+            raise
+        if breaker is not None:
+            breaker.record(host, response.status_code)
+        if limiter is not None:
+            limiter.observe(host, latency=time.time() - start,
+                            failed=response.status_code >= 500)
+        if not stream:
+            release()
+            return response
+        if breaker is None and limiter is None:
+            return response
+        return LimitedResponse(response, release, failed)
+
+    def host_netloc(self):
+        """Return the ``host:port`` part of ``host_uri``."""
+        return urlparse(self.host_uri).netloc
+
+    def check_response(self, response, url_path):
+        """Raise the matching exception if ``response`` is not a success.
+
+        The response is closed before raising, so a failed streaming request
+        does not hold on to its connection.
+        """
+        if response.status_code == 200:
+            return
+        try:
+            # Application error
+            if response.status_code == 500:
+                msg = "Kismet 500 Error response from {}: {}".format(
+                    url_path, response.text)
+                self.logger.error(msg)
+                raise KismetLoginException(msg, response.status_code)
+
+            # Invalid request
+            if response.status_code == 400:
+                msg = "Kismet 400 Error response from {}: {}".format(
+                    url_path, response.text)
+                self.logger.error(msg)
+                raise KismetRequestException(msg, response.status_code)
+
+            # login required
+            if response.status_code == 401:
+                msg = "Login required for {}".format(url_path)
+                self.logger.error(msg)
+                raise KismetLoginException(msg, response.status_code)
+
+            msg = "Request failed {} {}".format(url_path,
+                                                response.status_code)
+            self.logger.error(msg)
+            raise KismetRequestException(msg, response.status_code)
+        finally:
+            response.close()
 
     def interact(self, verb, url_path, stream=False, **kwargs):
         """Wrap all low-level API interaction.
@@ -132,6 +393,8 @@ class BaseInterface(object):
                 failure of operation.
             callback (function): Callback to be used for each JSON object.
             callback_args (list): List of arguments for callback.
+            timeout (float or tuple): Override the client's socket timeout.
+            deadline (float): Override the client's per-call deadline.
 
         Return:
             dict: JSON from API. String returned if return_string is set.
@@ -139,11 +402,15 @@ class BaseInterface(object):
         only_status = bool("only_status" in kwargs
                            and kwargs["only_status"] is True)
         payload = kwargs["payload"] if "payload" in kwargs else {}
+        timeout = kwargs.get("timeout")
+        kwargs["deadline_at"] = self.call_deadline(**kwargs)
         full_url = Utility.build_full_url(self.host_uri, url_path)
         if verb == "GET":
             self.logger.debug("interact: GET against {} "
                               "stream={}".format(full_url, stream))
-            response = self.session.get(full_url, stream=stream)
+            response = self.send_request("GET", full_url, stream=stream,
+                                         timeout=timeout,
+                                         deadline_at=kwargs["deadline_at"])
         elif verb == "POST":
             if payload:
                 postdata = json.dumps(payload)
@@ -155,37 +422,15 @@ class BaseInterface(object):
                               "with {} stream={}".format(full_url,
                                                          formatted_payload,
                                                          stream))
-            response = self.session.post(full_url, data=formatted_payload,
-                                         stream=stream)
+            response = self.send_request("POST", full_url,
+                                         data=formatted_payload,
+                                         stream=stream, timeout=timeout,
+                                         deadline_at=kwargs["deadline_at"])
 
         else:
             self.logger.error("HTTP verb {} not yet supported!".format(verb))
 
-        # Application error
-        if response.status_code == 500:
-            msg = "Kismet 500 Error response from {}: {}".format(url_path,
-                                                                 response.text)
-            self.logger.error(msg)
-            raise KismetLoginException(msg, response.status_code)
-
-        # Invalid request
-        if response.status_code == 400:
-            msg = "Kismet 400 Error response from {}: {}".format(url_path,
-                                                                 response.text)
-            self.logger.error(msg)
-            raise KismetRequestException(msg, response.status_code)
-
-        # login required
-        if response.status_code == 401:
-            msg = "Login required for {}".format(url_path)
-            self.logger.error(msg)
-            raise KismetLoginException(msg, response.status_code)
-
-        # Did we succeed?
-        if not response.status_code == 200:
-            msg = "Request failed {} {}".format(url_path, response.status_code)
-            self.logger.error(msg)
-            raise KismetRequestException(msg, response.status_code)
+        self.check_response(response, url_path)
 
         if only_status:
             return bool(response)  # We can test for good resp codes like this.
@@ -193,8 +438,11 @@ class BaseInterface(object):
             retval = self.process_response_bulk(response, **kwargs)
             self.update_session()
             return retval
-        return [result for result in
-                self.process_response_stream(response, **kwargs)]
+        try:
+            return [result for result in
+                    self.process_response_stream(response, **kwargs)]
+        finally:
+            response.close()
 
     def interact_yield(self, verb, url_path, **kwargs):
         """Wrap all low-level API interaction.
@@ -207,15 +455,21 @@ class BaseInterface(object):
             payload (dict): Dictionary with POST payload.
             callback (function): Callback to be used for each JSON object.
             callback_args (list): List of arguments for callback.
+            timeout (float or tuple): Override the client's socket timeout.
+            deadline (float): Override the client's per-call deadline.
 
         Yield:
             dict: JSON from API. String returned if return_string is set.
         """
         payload = kwargs["payload"] if "payload" in kwargs else {}
+        timeout = kwargs.get("timeout")
+        kwargs["deadline_at"] = self.call_deadline(**kwargs)
         full_url = Utility.build_full_url(self.host_uri, url_path)
         if verb == "GET":
             self.logger.debug("interact_yield: GET {}".format(full_url))
-            response = self.session.get(full_url, stream=True)
+            response = self.send_request("GET", full_url, stream=True,
+                                         timeout=timeout,
+                                         deadline_at=kwargs["deadline_at"])
         elif verb == "POST":
             if payload:
                 postdata = json.dumps(payload)
@@ -225,59 +479,203 @@ class BaseInterface(object):
             formatted_payload = {"json": postdata}
             self.logger.debug("interact_yield: POST against {} "
                               "with {}".format(full_url, formatted_payload))
-            response = self.session.post(full_url, data=formatted_payload,
-                                         stream=True)
+            response = self.send_request("POST", full_url,
+                                         data=formatted_payload,
+                                         stream=True, timeout=timeout,
+                                         deadline_at=kwargs["deadline_at"])
 
         else:
             self.logger.error("HTTP verb {} not yet supported!".format(verb))
 
-        # Application error
-        if response.status_code == 500:
-            msg = "Kismet 500 Error response from {}: {}".format(url_path,
-                                                                 response.text)
-            self.logger.error(msg)
-            raise KismetLoginException(msg, response.status_code)
+        self.check_response(response, url_path)
+        try:
+            for result in self.process_response_stream(response, **kwargs):
+                yield result
+        finally:
+            # Runs on exhaustion, errors, and when the consumer closes the
+            # generator early, so an abandoned stream frees its connection.
+            response.close()
 
-        # Invalid request
-        if response.status_code == 400:
-            msg = "Kismet 400 Error response from {}: {}".format(url_path,
-                                                                 response.text)
-            self.logger.error(msg)
-            raise KismetRequestException(msg, response.status_code)
+    def interact_raw(self, verb, url_path, chunk_size=None, **kwargs):
+        """Yield the raw response body, for non-JSON endpoints.
 
-        # login required
-        if response.status_code == 401:
-            msg = "Login required for {}".format(url_path)
-            self.logger.error(msg)
-            raise KismetLoginException(msg, response.status_code)
+        Args:
+            verb (str): ``GET`` or ``POST``.
+            url_path (str): Path part of URL.
+            chunk_size (int): Largest chunk to yield. None yields data as it
+                arrives, which suits endless streams such as live captures.
 
-        # Did we succeed?
-        if not response.status_code == 200:
-            msg = "Request failed {} {}".format(url_path, response.status_code)
-            self.logger.error(msg)
-            raise KismetRequestException(msg, response.status_code)
-        for result in self.process_response_stream(response, **kwargs):
-            yield result
+        Keyword Args:
+            payload (dict): Dictionary with POST payload.
+            timeout (float or tuple): Override the client's socket timeout.
+            deadline (float): Override the client's per-call deadline.
+
+        Yield:
+            bytes: Chunks of the decoded response body.
+        """
+        payload = kwargs["payload"] if "payload" in kwargs else {}
+        deadline_at = self.call_deadline(**kwargs)
+        full_url = Utility.build_full_url(self.host_uri, url_path)
+        data = None
+        if verb == "POST":
+            data = {"json": json.dumps(payload) if payload else "{}"}
+        self.logger.debug("interact_raw: {} {}".format(verb, full_url))
+        response = self.send_request(verb, full_url, data=data, stream=True,
+                                     timeout=kwargs.get("timeout"),
+                                     deadline_at=deadline_at)
+        self.check_response(response, url_path)
+        uncompressed = 0
+        try:
+            for chunk in response.iter_content(chunk_size):
+                if deadline_at is not None and time.time() > deadline_at:
+                    msg = "Deadline exceeded while streaming response"
+                    raise KismetTimeoutError(msg)
+                uncompressed += len(chunk)
+                yield chunk
+        finally:
+            self.transfer_stats.add(response.wire_bytes, uncompressed)
+            response.close()
+
+    def interact_parallel(self, verb, url_path, workers=None,
+                          chunk_bytes=1048576, transform=None, ordered=True,
+                          executor=None, **kwargs):
+        """Stream an ``.itjson`` response, decoding it on several processes.
+
+        The response is read as raw bytes and cut into line-aligned chunks
+        of about ``chunk_bytes``, which a process pool decodes in parallel,
+        so decoding is not limited to one core.
+
+        Args:
+            verb (str): ``GET`` or ``POST``.
+            url_path (str): Path part of URL.
+            workers (int): Decoding processes; defaults to the CPU count.
+            chunk_bytes (int): Approximate bytes per chunk.
+            transform (function): Picklable function called in the worker
+                with each chunk's records, returning the records to yield,
+                e.g. a :py:class:`kismet_rest.parallel.ChunkTransform`.
+            ordered (bool): Yield records in stream order if True,
+                otherwise as soon as their chunk is decoded.
+            executor (Executor): Reuse this executor instead of starting a
+                process pool for the call.
+
+        Keyword Args:
+            payload (dict): Dictionary with POST payload.
+            timeout (float or tuple): Override the client's socket timeout.
+            deadline (float): Override the client's per-call deadline.
+
+        Yield:
+            dict: Decoded (and transformed) records.
+        """
+        own_executor = executor is None
+        if own_executor:
+            from concurrent.futures import ProcessPoolExecutor
+            executor = ProcessPoolExecutor(max_workers=workers)
+        chunks = line_chunks(self.interact_raw(verb, url_path, **kwargs),
+                             chunk_bytes)
+        window = 2 * (workers or getattr(executor, "_max_workers", 4))
+        try:
+            for records in decode_parallel(chunks, executor, transform,
+                                           ordered, window):
+                for record in records:
+                    yield record
+        finally:
+            chunks.close()
+            if own_executor:
+                executor.shutdown(wait=False)
+
+    def build_frame(self, fields=None, types=None, **kwargs):
+        """Stream ``all()`` into a :py:class:`kismet_rest.frames.FrameBuilder`.
+
+        For endpoints with an ``all`` stream. Endpoints which take a
+        ``fields`` list, such as :py:class:`kismet_rest.Devices`, only fetch
+        those fields; others fetch whole records and the fields are picked
+        out locally.
+
+        Args:
+            fields (list): Kismet ``fields`` list naming the columns. All
+                top-level keys become columns if not set.
+            types (dict): Column types, see
+                :py:class:`kismet_rest.frames.FrameBuilder`.
+
+        Keyword Args:
+            Passed to ``all``.
+
+        Return:
+            FrameBuilder: Builder holding every record.
+        """
+        if fields and self.fields_payload:
+            kwargs["fields"] = fields
+        return FrameBuilder(fields, types).extend(self.all(**kwargs))
+
+    def to_dataframe(self, fields=None, types=None, **kwargs):
+        """Return ``all()`` as a ``pandas.DataFrame``, built in one pass.
+
+        Timestamps and counters become integer columns, manufacturer and
+        PHY names categoricals, and MAC addresses 48-bit integers. Requires
+        ``pip install kismet_rest[pandas]``. Arguments are as for
+        :py:meth:`build_frame`.
+        """
+        return self.build_frame(fields, types, **kwargs).to_dataframe()
+
+    def to_arrow(self, fields=None, types=None, **kwargs):
+        """Return ``all()`` as a ``pyarrow.Table``, built in one pass.
+
+        Column types are as for :py:meth:`to_dataframe`. Requires
+        ``pip install kismet_rest[arrow]``. Arguments are as for
+        :py:meth:`build_frame`.
+        """
+        return self.build_frame(fields, types, **kwargs).to_arrow()
 
     def process_response_stream(self, response, **kwargs):
         """Process API response as a stream."""
-        response.encoding = 'utf-8'
+        deadline_at = kwargs.get("deadline_at")
         if "callback" in kwargs:
             callback_args = (kwargs["callback_args"]
                              if "callback_args" in kwargs
                              else [])
-            for item in response.iter_lines(decode_unicode=True):
+            for item in self.iter_response_lines(response, deadline_at):
                 if callback_args:
-                    kwargs["callback"](json.loads(item), *callback_args)
+                    kwargs["callback"](self.decode_line(item), *callback_args)
                     continue
-                kwargs["callback"](json.loads(item))
+                kwargs["callback"](self.decode_line(item))
             return
-        for result in response.iter_lines(decode_unicode=True):
-            yield json.loads(result)
+        for result in self.iter_response_lines(response, deadline_at):
+            yield self.decode_line(result)
+
+    def iter_response_lines(self, response, deadline_at=None):
+        """Yield raw lines from a streamed response, counting transfer size.
+
+        Lines are yielded as bytes. When the body is exhausted, or reading
+        stops early, the number of bytes read off the wire and the
+        decompressed size are added to ``transfer_stats``.
+
+        Raises:
+            KismetTimeoutError: ``deadline_at`` passed before the end of
+                the response.
+        """
+        uncompressed = 0
+        try:
+            for line in response.iter_lines(self.read_size):
+                if deadline_at is not None and time.time() > deadline_at:
+                    msg = "Deadline exceeded while streaming response"
+                    raise KismetTimeoutError(msg)
+                uncompressed += len(line) + 1
+                yield line
+        finally:
+            self.transfer_stats.add(response.wire_bytes, uncompressed)
+
+    def decode_line(self, line):
+        """Return the JSON object encoded in one ``.itjson`` line."""
+        if self.lazy_records:
+            return LazyRecord(line)
+        if self.is_py35:
+            return json.loads(line.decode("utf-8"))
+        return json.loads(line)
 
     def process_response_bulk(self, response, **kwargs):
         """Process API response as a single bulk interaction."""
-        response.encoding = 'utf-8'
+        uncompressed = len(response.content)
+        self.transfer_stats.add(response.wire_bytes, uncompressed)
         if "callback" in kwargs:
             callback_args = (kwargs["callback_args"]
                              if "callback_args" in kwargs
@@ -304,8 +702,7 @@ class BaseInterface(object):
                 lcachef = open(self.sessioncache_path, "r")
                 cookie = lcachef.read()
                 # Add the session cookie
-                requests.utils.add_dict_to_cookiejar(
-                    self.session.cookies, {"KISMET": cookie})
+                self.transport.set_cookie("KISMET", cookie)
                 lcachef.close()
             except Exception as exc:
                 if self.debug:
@@ -319,25 +716,22 @@ class BaseInterface(object):
         URI.
         """
         try:
-            c_dict = requests.utils.dict_from_cookiejar(self.session.cookies)
-            cookie = c_dict["KISMET"]
+            cookie = self.transport.get_cookie(
+                "KISMET", urlparse(self.host_uri).hostname)
             if cookie:
                 lcachef = open(self.sessioncache_path, "w")
                 lcachef.write(cookie)
                 lcachef.close()
-        except KeyError:
-            pass
         except Exception as exc:
             self.logger.error("DEBUG - Failed to save session: {}".format(exc))
 
     def set_login(self, username, password):
         """Set login credentials."""
-        self.session.auth = (username, password)
-    
+        self.transport.set_auth(username, password)
+
     def set_apikey(self, apikey):
         """Add API key to cookies."""
-        requests.utils.add_dict_to_cookiejar(
-                self.session.cookies, {"KISMET": apikey})
+        self.transport.set_cookie("KISMET", apikey)
 
     def set_debug(self):
         """Set debug mode for more verbose output."""
@@ -348,7 +742,9 @@ class BaseInterface(object):
 
         Checks if a session is valid / session is logged in
         """
-        response = self.session.get("%s/session/check_session" % self.host_uri)
+        response = self.send_request(
+            "GET", "%s/session/check_session" % self.host_uri,
+            deadline_at=self.call_deadline())
         if not response.status_code == 200:
             return False
         self.update_session()
@@ -360,10 +756,97 @@ class BaseInterface(object):
         Logs in (and caches login credentials).  Required for administrative
         behavior.
         """
-        response = self.session.get("%s/session/check_session" % self.host_uri)
+        response = self.send_request(
+            "GET", "%s/session/check_session" % self.host_uri,
+            deadline_at=self.call_deadline())
         if not response.status_code == 200:
             msg = "login(): Invalid session: {}".format(response.text)
             self.logger.debug(msg)
             return False
         self.update_session()
         return True
+
+
+class StreamHandle(object):
+    """Cancellable wrapper around a streaming endpoint method.
+
+    Iterate over the handle as over the wrapped generator. Calling
+    :py:meth:`cancel`, or leaving a ``with`` block, closes the generator,
+    which closes the HTTP response and returns its connection. Cancelling
+    from another thread stops the stream before the next record is
+    delivered; a read already blocked on the socket is bounded by the
+    client's read timeout.
+    """
+
+    def __init__(self, iterable):
+        """Wrap ``iterable``."""
+        self.iterator = iter(iterable)
+        self.cancelled = False
+
+    def __iter__(self):
+        """Return self."""
+        return self
+
+    def __next__(self):
+        """Return the next record, or stop if cancelled."""
+        if self.cancelled:
+            self.close()
+            raise StopIteration
+        return next(self.iterator)
+
+    next = __next__
+
+    def __enter__(self):
+        """Return self."""
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Cancel the stream."""
+        self.cancel()
+
+    def cancel(self):
+        """Stop the stream and release its connection."""
+        self.cancelled = True
+        try:
+            self.close()
+        except ValueError:
+            # Generator is running in another thread; __next__ will close it.
+            pass
+
+    def close(self):
+        """Close the wrapped generator."""
+        close = getattr(self.iterator, "close", None)
+        if close is not None:
+            close()
+
+
+class TransferStats(object):
+    """Running totals of response bytes transferred by one client.
+
+    ``compressed_bytes`` counts what was read off the wire, and
+    ``uncompressed_bytes`` counts the body after content decoding. The two are
+    equal when the server did not compress a response.
+    """
+
+    def __init__(self):
+        """Start with all counters at zero."""
+        self.reset()
+
+    def reset(self):
+        """Zero all counters."""
+        self.responses = 0
+        self.compressed_bytes = 0
+        self.uncompressed_bytes = 0
+
+    def add(self, compressed, uncompressed):
+        """Account for one fully-read response body."""
+        self.responses += 1
+        self.compressed_bytes += compressed
+        self.uncompressed_bytes += uncompressed
+
+    @property
+    def ratio(self):
+        """Return uncompressed / compressed size, or 1.0 if nothing read."""
+        if not self.compressed_bytes:
+            return 1.0
+        return float(self.uncompressed_bytes) / self.compressed_bytes
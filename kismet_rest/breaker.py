@@ -0,0 +1,171 @@
+"""Per-host circuit breaker."""
+
+import threading
+import time
+
+from .exceptions import KismetCircuitOpenError
+from .logger import Logger
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Statuses from a proxy or server which cannot serve requests at all.
+# Kismet itself answers 500 for some client errors, so 500 is not counted.
+UNAVAILABLE_STATUSES = (502, 503, 504)
+
+
+class HostCircuit(object):
+    """Circuit state for one host."""
+
+    def __init__(self):
+        """Start closed, with no failures."""
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.probe_started = None
+        self.trips = 0
+        self.rejected = 0
+
+
+class CircuitBreaker(object):
+    """Fail fast on hosts which are down, instead of waiting on each call.
+
+    After ``failure_threshold`` consecutive connection errors, timeouts or
+    502/503/504 responses from a host, its circuit opens and every request
+    to it raises :py:class:`kismet_rest.KismetCircuitOpenError` immediately.
+    After ``reset_timeout`` seconds the circuit is half-open: one probe
+    request is let through, and closes the circuit if it succeeds or
+    re-opens it if it fails. Other requests keep failing fast while the
+    probe is in flight.
+
+    One breaker may be shared by several endpoint objects, so every client
+    of a host sees its state::
+
+        breaker = kismet_rest.CircuitBreaker()
+        sensors = [kismet_rest.Devices(host_uri=uri, breaker=breaker)
+                   for uri in uris]
+
+    Args:
+        failure_threshold (int): Consecutive failures which open a circuit.
+        reset_timeout (float): Seconds a circuit stays open before a probe.
+        on_change (function): Called with the host, the old state and the
+            new state on every transition.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30,
+                 on_change=None):
+        """Initialize with every circuit closed."""
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.on_change = on_change
+        self.logger = Logger()
+        self.hosts = {}
+        self.lock = threading.Lock()
+
+    def host(self, host):
+        """Return the circuit for ``host``, creating it if needed."""
+        if host not in self.hosts:
+            self.hosts[host] = HostCircuit()
+        return self.hosts[host]
+
+    def state(self, host):
+        """Return ``closed``, ``open`` or ``half_open`` for ``host``."""
+        with self.lock:
+            return self.host(host).state
+
+    def before(self, host, now=None):
+        """Let a request to ``host`` through, or fail fast.
+
+        Raises:
+            KismetCircuitOpenError: The circuit is open, or half-open with a
+                probe already in flight.
+        """
+        if now is None:
+            now = time.time()
+        changes = []
+        with self.lock:
+            circuit = self.host(host)
+            if circuit.state == OPEN:
+                if now - circuit.opened_at < self.reset_timeout:
+                    circuit.rejected += 1
+                    wait = self.reset_timeout - (now - circuit.opened_at)
+                    msg = "Circuit open for {}, next probe in {:.1f}s"
+                    raise KismetCircuitOpenError(msg.format(host, wait))
+                changes.append(self.transition(host, circuit, HALF_OPEN))
+            if circuit.state == HALF_OPEN:
+                # A probe which never reported back is replaced after a
+                # further reset_timeout.
+                if (circuit.probe_started is not None and
+                        now - circuit.probe_started < self.reset_timeout):
+                    circuit.rejected += 1
+                    msg = "Circuit half-open for {}, probe in flight"
+                    raise KismetCircuitOpenError(msg.format(host))
+                circuit.probe_started = now
+        self.notify(changes)
+
+    def cancel(self, host):
+        """Withdraw a request let through but never sent.
+
+        A half-open circuit then admits the next request as its probe.
+        """
+        with self.lock:
+            self.host(host).probe_started = None
+
+    def success(self, host):
+        """Record a successful request; closes a half-open circuit."""
+        changes = []
+        with self.lock:
+            circuit = self.host(host)
+            circuit.failures = 0
+            circuit.probe_started = None
+            if circuit.state != CLOSED:
+                changes.append(self.transition(host, circuit, CLOSED))
+        self.notify(changes)
+
+    def failure(self, host, now=None):
+        """Record a failed request; may open the circuit."""
+        if now is None:
+            now = time.time()
+        changes = []
+        with self.lock:
+            circuit = self.host(host)
+            circuit.failures += 1
+            circuit.probe_started = None
+            if (circuit.state == HALF_OPEN or
+                    (circuit.state == CLOSED and
+                     circuit.failures >= self.failure_threshold)):
+                circuit.opened_at = now
+                circuit.trips += 1
+                changes.append(self.transition(host, circuit, OPEN))
+        self.notify(changes)
+
+    def record(self, host, status_code):
+        """Record a response by its HTTP status."""
+        if status_code in UNAVAILABLE_STATUSES:
+            self.failure(host)
+        else:
+            self.success(host)
+
+    def transition(self, host, circuit, state):
+        """Change state; return the change for :py:meth:`notify`."""
+        change = (host, circuit.state, state)
+        circuit.state = state
+        return change
+
+    def notify(self, changes):
+        """Log state changes and pass them to ``on_change``."""
+        for host, old, new in changes:
+            self.logger.info("Circuit for {} is {}".format(host, new))
+            if self.on_change:
+                self.on_change(host, old, new)
+
+    def stats(self):
+        """Return ``{host: {...}}`` with each circuit's state and counters."""
+        with self.lock:
+            return {host: {"state": circuit.state,
+                           "failures": circuit.failures,
+                           "opened_at": circuit.opened_at,
+                           "trips": circuit.trips,
+                           "rejected": circuit.rejected}
+                    for host, circuit in self.hosts.items()}
@@ -0,0 +1,282 @@
+"""Record Kismet responses to a file, and replay them without a server.
+
+A cassette is a gzip file holding one entry per request: a JSON header line
+describing the request, the status and the timing of each body chunk,
+followed by the raw (decoded) body bytes.
+"""
+
+import collections
+import gzip
+import json
+import sys
+import threading
+import time
+
+from .exceptions import KismetConnectionError
+from .transport import MemoryResponse
+from .transport import Transport
+from .transport import TransportResponse
+
+if sys.version_info[0] < 3:
+    from urlparse import urlparse
+else:
+    from urllib.parse import urlparse
+
+
+def request_key(verb, url, data=None):
+    """Return the key matching a replayed request to a recorded one.
+
+    Only the path and query of the URL are used, so a cassette can be
+    replayed against any ``host_uri``.
+    """
+    parsed = urlparse(url)
+    path = parsed.path
+    if parsed.query:
+        path = "{}?{}".format(path, parsed.query)
+    return "{} {} {}".format(verb, path, json.dumps(data, sort_keys=True))
+
+
+def read_cassette(path):
+    """Yield ``(header, body)`` for every entry in a cassette file."""
+    with gzip.open(path, "rb") as cassette:
+        while True:
+            line = cassette.readline()
+            if not line:
+                return
+            header = json.loads(line.decode("utf-8"))
+            yield header, cassette.read(header["length"])
+
+
+class RecordingTransport(Transport):
+    """Pass requests to another transport and record every response.
+
+    Streamed bodies are recorded as they are read, with the time each chunk
+    arrived, and written when the response is closed. Responses which are
+    never closed are not recorded. Call :py:meth:`close` to finish the
+    file::
+
+        transport = kismet_rest.RecordingTransport("sweep.cassette")
+        devices = kismet_rest.Devices(transport=transport)
+        for device in devices.all():
+            ...
+        transport.close()
+
+    Args:
+        path (str): Cassette file to write. An existing file is replaced.
+        transport (str or Transport): Transport which does the real I/O, as
+            for :py:meth:`Transport.create`.
+        compression (bool): Offer compressed content encodings.
+    """
+
+    def __init__(self, path, transport="requests", compression=True):
+        """Build the inner transport; the file is opened on first write."""
+        super(RecordingTransport, self).__init__(compression)
+        self.path = path
+        self.inner = Transport.create(transport, compression)
+        self.file = None
+        self.lock = threading.Lock()
+        self.entries = 0
+
+    def request(self, verb, url, data=None, stream=False, timeout=None):
+        """Send and record one request. See :py:meth:`Transport.request`."""
+        start = time.time()
+        response = self.inner.request(verb, url, data=data, stream=stream,
+                                      timeout=timeout)
+        header = {"verb": verb, "key": request_key(verb, url, data),
+                  "status": response.status_code,
+                  "latency": time.time() - start}
+        if not stream:
+            body = response.content
+            self.write(header, [(0.0, body)])
+            return response
+        return RecordingResponse(self, response, header, start)
+
+    def write(self, header, chunks):
+        """Append one entry to the cassette."""
+        body = b"".join(chunk for _, chunk in chunks)
+        header = dict(header, length=len(body),
+                      chunks=[[round(offset, 6), len(chunk)]
+                              for offset, chunk in chunks])
+        line = json.dumps(header, sort_keys=True).encode("utf-8") + b"\n"
+        with self.lock:
+            if self.file is None:
+                self.file = gzip.open(self.path, "wb")
+            self.file.write(line)
+            self.file.write(body)
+            self.file.flush()
+            self.entries += 1
+
+    def set_compression(self, enabled):
+        """Enable or disable compressed content encodings."""
+        self.compression = bool(enabled)
+        self.inner.set_compression(enabled)
+
+    def set_auth(self, username, password):
+        """Use HTTP basic authentication for all requests."""
+        self.inner.set_auth(username, password)
+
+    def get_cookie(self, name, domain=None):
+        """Return the value of a session cookie, or None."""
+        return self.inner.get_cookie(name, domain)
+
+    def set_cookie(self, name, value):
+        """Set a session cookie."""
+        self.inner.set_cookie(name, value)
+
+    def close(self):
+        """Finish the cassette and close the inner transport."""
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+        self.inner.close()
+
+
+class RecordingResponse(TransportResponse):
+    """Streamed response which records its body as it is read."""
+
+    def __init__(self, recorder, response, header, start):
+        """Wrap ``response``; the entry is written on close."""
+        self.recorder = recorder
+        self.response = response
+        self.header = header
+        self.start = start
+        self.chunks = []
+        self.stream = None
+        self.status_code = response.status_code
+
+    @property
+    def text(self):
+        """Return the complete body as a string."""
+        return self.content.decode("utf-8")
+
+    @property
+    def content(self):
+        """Return the complete, decoded body as bytes.
+
+        After a partial read through :py:meth:`iter_content`, the rest of
+        the stream is read and recorded first.
+        """
+        if self.stream is not None:
+            for _ in self.stream:
+                pass
+        elif not self.chunks:
+            self.chunks.append((time.time() - self.start,
+                                self.response.content))
+        return b"".join(chunk for _, chunk in self.chunks)
+
+    @property
+    def wire_bytes(self):
+        """Return the number of body bytes read off the wire so far."""
+        return self.response.wire_bytes
+
+    def json(self):
+        """Return the body parsed as JSON."""
+        return json.loads(self.text)
+
+    def iter_content(self, chunk_size):
+        """Yield the decoded body in chunks, recording each one."""
+        self.stream = self.record(chunk_size)
+        return self.stream
+
+    def record(self, chunk_size):
+        """Read the body in chunks, recording each one."""
+        for chunk in self.response.iter_content(chunk_size):
+            self.chunks.append((time.time() - self.start, chunk))
+            yield chunk
+
+    def close(self):
+        """Close the response and write what was read to the cassette."""
+        recorder, self.recorder = self.recorder, None
+        self.response.close()
+        if recorder is not None:
+            recorder.write(self.header, self.chunks)
+
+
+class ReplayTransport(Transport):
+    """Serve recorded responses instead of talking to Kismet.
+
+    Requests are matched on verb, URL path and query, and POST data.
+    Repeated requests get the recorded responses in order, and the last one
+    again once those run out. An unrecorded request raises
+    :py:class:`kismet_rest.KismetConnectionError`.
+
+    Args:
+        path (str): Cassette file to read.
+        realtime (bool): Reproduce the recorded time to the response headers
+            and between body chunks, instead of replaying at full speed.
+        speed (float): With ``realtime``, play back this many times faster.
+        compression (bool): Ignored; bodies are recorded decoded.
+    """
+
+    def __init__(self, path, realtime=False, speed=1.0, compression=True):
+        """Load every entry of the cassette."""
+        super(ReplayTransport, self).__init__(compression)
+        self.realtime = realtime
+        self.speed = speed
+        self.cookies = {}
+        self.lock = threading.Lock()
+        self.entries = collections.defaultdict(collections.deque)
+        for header, body in read_cassette(path):
+            self.entries[header["key"]].append((header, body))
+
+    def request(self, verb, url, data=None, stream=False, timeout=None):
+        """Return the recorded response. See :py:meth:`Transport.request`."""
+        key = request_key(verb, url, data)
+        with self.lock:
+            recorded = self.entries.get(key)
+            if not recorded:
+                msg = "No recorded response for {}".format(key)
+                raise KismetConnectionError(msg)
+            header, body = (recorded.popleft() if len(recorded) > 1
+                            else recorded[0])
+        if self.realtime:
+            time.sleep(header["latency"] / self.speed)
+        return ReplayResponse(header, body,
+                              self.speed if self.realtime else None)
+
+    def set_compression(self, enabled):
+        """Accepted for compatibility; replayed bodies are not encoded."""
+        self.compression = bool(enabled)
+
+    def set_auth(self, username, password):
+        """Accepted for compatibility; replay needs no authentication."""
+
+    def get_cookie(self, name, domain=None):
+        """Return the value of a session cookie, or None."""
+        return self.cookies.get(name)
+
+    def set_cookie(self, name, value):
+        """Set a session cookie."""
+        self.cookies[name] = value
+
+    def close(self):
+        """Nothing to close."""
+
+
+class ReplayResponse(MemoryResponse):
+    """A recorded response."""
+
+    def __init__(self, header, body, speed=None):
+        """Serve ``body``, with recorded chunk timing if ``speed`` is set."""
+        super(ReplayResponse, self).__init__(header["status"], body)
+        self.header = header
+        self.speed = speed
+
+    def iter_content(self, chunk_size):
+        """Yield the body in its recorded chunks, split to ``chunk_size``."""
+        view = memoryview(self.body)
+        start = time.time()
+        offset = 0
+        for arrived, length in self.header["chunks"]:
+            if self.speed:
+                delay = arrived / self.speed - (time.time() - start)
+                if delay > 0:
+                    time.sleep(delay)
+            end = offset + length
+            step = chunk_size or length
+            while offset < end:
+                piece = view[offset:min(end, offset + step)].tobytes()
+                offset += len(piece)
+                self.read = offset
+                yield piece
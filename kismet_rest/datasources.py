@@ -1,6 +1,10 @@
 """Datasources abstraction."""
 
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 from .base_interface import BaseInterface
+from .exceptions import KismetConnectorException
 
 
 class Datasources(BaseInterface):
@@ -9,7 +13,7 @@ class Datasources(BaseInterface):
     kwargs_defaults = {}
     url_template = "datasource/all_sources.itjson"
 
-    def all(self, callback=None, callback_args=None):
+    def all(self, callback=None, callback_args=None, fields=None):
         """Yield all datasources, one at a time.
 
         If callback is set, nothing will be returned.
@@ -17,6 +21,8 @@ class Datasources(BaseInterface):
         Args:
             callback: Callback function.
             callback_args: Arguments for callback.
+            fields (list): List of fields to return, which keeps records
+                small when polling frequently.
 
         Yield:
             dict: Datasource json, or None if callback is set.
@@ -27,6 +33,12 @@ class Datasources(BaseInterface):
             if callback_args:
                 callback_settings["callback_args"] = callback_args
         url = self.url_template
+        if fields:
+            for result in self.interact_yield("POST", url,
+                                              payload={"fields": fields},
+                                              **callback_settings):
+                yield result
+            return
         for result in self.interact_yield("GET", url, **callback_settings):
             yield result
 
@@ -100,6 +112,75 @@ class Datasources(BaseInterface):
         url = "datasource/by-uuid/{}/set_hop.cmd".format(uuid)
         return self.interact("POST", url, payload=cmd, only_status=True)
 
+    def configure(self, plan, max_workers=10):
+        """Apply channel and hopping settings to many sources concurrently.
+
+        Each source is configured with the same command as the matching
+        ``set_*`` method, but the commands are sent in parallel over the
+        client's connection pool, so reconfiguring every radio on a sensor
+        takes about one round trip instead of one per source.
+
+        Settings for each source are one of:
+
+        * ``{"channel": "6HT40+"}``: see :py:meth:`set_channel`.
+        * ``{"rate": 5, "channels": ["1", "6", "11"]}``: see
+          :py:meth:`set_hop_channels`.
+        * ``{"rate": 5}``: see :py:meth:`set_hop_rate`.
+        * ``{"hop": True}``: see :py:meth:`set_hop`.
+
+        Requires valid login.
+
+        Args:
+            plan (dict): Maps source UUID to a settings dict.
+            max_workers (int): Maximum commands in flight at once. The default
+                requests transport keeps up to 10 connections per host.
+
+        Return:
+            dict: Maps each UUID to a dict with ``success`` (bool),
+                ``elapsed`` (seconds) and ``error`` (message or None).
+        """
+        commands = {uuid: self.plan_command(uuid, settings)
+                    for uuid, settings in plan.items()}
+        if not commands:
+            return {}
+        workers = min(max_workers, len(commands))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {uuid: executor.submit(self.timed_command, command)
+                       for uuid, command in commands.items()}
+            return {uuid: future.result()
+                    for uuid, future in futures.items()}
+
+    def plan_command(self, uuid, settings):
+        """Return a callable applying one source's settings from a plan."""
+        if "channel" in settings:
+            return lambda: self.set_channel(uuid, settings["channel"])
+        if "channels" in settings:
+            if "rate" not in settings:
+                msg = "Hop channels for {} need a rate".format(uuid)
+                raise ValueError(msg)
+            return lambda: self.set_hop_channels(uuid, settings["rate"],
+                                                 settings["channels"])
+        if "rate" in settings:
+            return lambda: self.set_hop_rate(uuid, settings["rate"])
+        if settings.get("hop"):
+            return lambda: self.set_hop(uuid)
+        msg = "No channel or hop settings for {}: {}".format(uuid, settings)
+        raise ValueError(msg)
+
+    @classmethod
+    def timed_command(cls, command):
+        """Run one command, returning its outcome and duration."""
+        start = time.time()
+        error = None
+        try:
+            success = command()
+        except KismetConnectorException as err:
+            success = False
+            error = str(err)
+        return {"success": success,
+                "elapsed": time.time() - start,
+                "error": error}
+
     def add(self, source):
         """Add a new source to Kismet.
 
@@ -1,6 +1,21 @@
 """Devices abstraction."""
 
+import collections
+from concurrent.futures import ThreadPoolExecutor
+
 from .base_interface import BaseInterface
+from .exceptions import KismetConnectionError
+from .macs import format_mask
+from .macs import oui_masks
+from .parallel import ChunkTransform
+from .query import compile_conditions
+from .query import field_spec
+from .query import get_field
+from .query import plan
+from .query import top_n
+from .query import validate_path
+from .query import validate_regex
+from .resumable import ResumableStream
 
 
 class Devices(BaseInterface):
@@ -8,6 +23,9 @@ class Devices(BaseInterface):
 
     kwargs_defaults = {"ts": 0}
     url_template = "devices/last-time/{ts}/devices.itjson"
+    key_field = "kismet.device.base.key"
+    last_time_field = "kismet.device.base.last_time"
+    fields_payload = True
 
     def all(self, callback=None, callback_args=None, **kwargs):
         """Yield all devices, one at a time.
@@ -22,6 +40,11 @@ class Devices(BaseInterface):
             ts (int): Starting last-seen timestamp in seconds since Epoch.
             fields (list): List of fields to return.
             regex (list): Regex filters per Kismet command_param spec.
+            resume_attempts (int): Re-issue the request up to this many
+                times if the connection drops, skipping devices which were
+                already delivered. Device streams are not ordered, so the
+                request restarts from ``ts`` and the device key is added to
+                ``fields`` if missing. Defaults to 0 (fail immediately).
 
         Yield:
             dict: Device json, or None if callback is set.
@@ -31,19 +54,382 @@ class Devices(BaseInterface):
             callback_settings["callback"] = callback
             if callback_args:
                 callback_settings["callback_args"] = callback_args
+        resume_attempts = kwargs.pop("resume_attempts", 0)
         valid_payload = ["fields", "regex"]
         payload = {kword: kwargs[kword] for kword in valid_payload
                    if kword in kwargs}
+        regex = validate_regex(payload.pop("regex", None))
+        if regex:
+            payload["regex"] = regex
         # Remove payload-only keys so they don't get formatted into the URL.
         for kword in valid_payload:
             kwargs.pop(kword, None)
         query_args = self.kwargs_defaults.copy()
         query_args.update(kwargs)
         url = self.url_template.format(**query_args)
+        if resume_attempts:
+            key_name = self.key_field
+            if "fields" in payload:
+                payload["fields"], key_name = self.with_key_field(
+                    payload["fields"])
+            deadline_at = self.call_deadline()
+            stream = ResumableStream(
+                lambda position: self.interact_yield(
+                    "POST", url, payload=payload, deadline_at=deadline_at),
+                identity=lambda device: device.get(key_name),
+                attempts=resume_attempts, deadline_at=deadline_at)
+            for result in stream.deliver(callback, callback_args):
+                yield result
+            return
         for result in self.interact_yield("POST", url, payload=payload,
                                           **callback_settings):
             yield result
 
+    def all_parallel(self, workers=None, where=None, project=None,
+                     ordered=True, **kwargs):
+        """Yield all devices, decoding the stream on several processes.
+
+        For very large device lists, where decoding on one core is the
+        bottleneck. Filtering and projection run in the worker processes.
+
+        Args:
+            workers (int): Decoding processes; defaults to the CPU count.
+            where (Filter): Only yield devices matching this filter.
+            project (list): Field paths to return, as ``{path: value}``.
+            ordered (bool): Keep the server's order if True, otherwise
+                yield devices as soon as they are decoded.
+
+        Keyword args:
+            ts (int): Starting last-seen timestamp in seconds since Epoch.
+            fields (list): List of fields to request.
+            regex (list): Regex filters per Kismet command_param spec.
+            chunk_bytes (int): Approximate bytes decoded per task.
+            executor (Executor): Reuse this executor.
+
+        Yield:
+            dict: Device json.
+        """
+        payload = {kword: kwargs.pop(kword) for kword in ["fields", "regex"]
+                   if kword in kwargs}
+        regex = validate_regex(payload.pop("regex", None))
+        if regex:
+            payload["regex"] = regex
+        query_args = self.kwargs_defaults.copy()
+        query_args["ts"] = kwargs.pop("ts", query_args["ts"])
+        url = self.url_template.format(**query_args)
+        transform = None
+        if where is not None or project:
+            transform = ChunkTransform(where, project)
+        for device in self.interact_parallel("POST", url, workers=workers,
+                                             transform=transform,
+                                             ordered=ordered,
+                                             payload=payload, **kwargs):
+            yield device
+
+    def with_key_field(self, fields):
+        """Return ``fields`` including the device key, and the key's name.
+
+        The name is the alias if the caller already requested the key under
+        another name.
+        """
+        return self.with_field(fields, self.key_field)
+
+    def with_field(self, fields, wanted):
+        """Return ``fields`` including ``wanted``, and its returned name."""
+        for field in fields:
+            if field == wanted:
+                return fields, wanted
+            if isinstance(field, (list, tuple)) and field[0] == wanted:
+                return fields, field[1]
+        return list(fields) + [wanted], wanted
+
+    def select(self, conditions, fields=None, regex=None, ts=0):
+        """Yield devices matching every condition, without buffering.
+
+        Conditions which Kismet can evaluate (regex matches and string
+        equality, see :py:func:`kismet_rest.query.plan`) are sent as a regex
+        filter; the rest are tested locally on each streamed device. Only
+        the device key, the fields local conditions need and ``fields`` are
+        requested.
+
+        Example, devices above -60 dBm on channel 6::
+
+            from kismet_rest.query import Field
+
+            signal = Field("kismet.device.base.signal/"
+                           "kismet.common.signal.last_signal")
+            channel = Field("kismet.device.base.channel")
+            devices.select((signal > -60) & (channel == "6"))
+
+        Args:
+            conditions (list or Filter): ``(path, op, value)`` tuples, or a
+                filter expression; see
+                :py:func:`kismet_rest.query.compile_conditions`.
+            fields (list): Additional fields to return.
+            regex (list): Regex filters per Kismet command_param spec. When
+                set, every condition is tested locally.
+            ts (int): Only devices seen since this Unix timestamp.
+
+        Yield:
+            dict: Matching devices. Condition fields are keyed by their full
+                path; read them with :py:func:`kismet_rest.query.get_field`.
+        """
+        for device in self.filtered(conditions, [], fields, regex, ts):
+            yield device
+
+    def top(self, count, field, largest=True, conditions=None, fields=None,
+            regex=None, ts=0):
+        """Return the devices with the highest (or lowest) value of a field.
+
+        Devices are streamed through a bounded heap, so at most ``count``
+        are held in memory however many Kismet returns. For example, the 50
+        strongest devices::
+
+            devices.top(50, "kismet.device.base.signal/"
+                            "kismet.common.signal.last_signal")
+
+        Args:
+            count (int): Number of devices to return.
+            field (str): Numeric field path to rank by. Devices without it
+                are skipped.
+            largest (bool): Rank highest first if True, else lowest first.
+            conditions (list or Filter): Only rank devices matching these,
+                as for :py:meth:`select`.
+            fields (list): Additional fields to return.
+            regex (list): Regex filters per Kismet command_param spec.
+            ts (int): Only devices seen since this Unix timestamp.
+
+        Return:
+            list: Up to ``count`` devices, best first.
+        """
+        validate_path(field)
+        devices = self.filtered(conditions or [], [field], fields, regex, ts)
+        return top_n(devices, count,
+                     key=lambda device: get_field(device, field),
+                     largest=largest)
+
+    def filtered(self, conditions, paths, fields=None, regex=None, ts=0):
+        """Yield devices matching ``conditions``, pushing down what we can.
+
+        Args:
+            conditions (list or Filter): As for :py:meth:`select`.
+            paths (list): Further field paths to request.
+            fields (list): Additional fields to return.
+            regex (list): Regex filters per Kismet command_param spec.
+            ts (int): Only devices seen since this Unix timestamp.
+        """
+        where = compile_conditions(conditions)
+        server_regex, local = plan(where, pushdown=not regex)
+        if local is not None:
+            paths = paths + local.paths()
+        wanted, _ = self.with_key_field(list(fields or []))
+        for path in paths:
+            if field_spec(path) not in wanted:
+                wanted.append(field_spec(path))
+        kwargs = {"ts": ts, "fields": wanted}
+        if regex or server_regex:
+            kwargs["regex"] = regex or server_regex
+        for device in self.all(**kwargs):
+            if local is None or local(device):
+                yield device
+
+    def views(self):
+        """Return the device views Kismet offers.
+
+        Return:
+            list: One dict per view, with ``kismet.devicetracker.view.id``,
+                ``kismet.devicetracker.view.description`` and
+                ``kismet.devicetracker.view.size``.
+        """
+        return self.interact("GET", "devices/views/all_views.json")
+
+    def view(self, view_id, callback=None, callback_args=None, **kwargs):
+        """Yield the devices in one device view.
+
+        Views include ``all``, one per phy (``phy-IEEE802.11``...), one per
+        datasource (``seenby-<uuid>``) and ``phydot11_accesspoints``; see
+        :py:meth:`views`.
+
+        Args:
+            view_id (str): Device view ID.
+            callback: Callback function.
+            callback_args: Arguments for callback.
+
+        Keyword args:
+            last_time (int): Only devices seen since this Unix timestamp.
+            regex (list): Regex filters per Kismet command_param spec.
+            fields (list): List of fields to return.
+
+        Yield:
+            dict: Device json, or None if callback is set.
+        """
+        valid_kwargs = ["last_time", "regex", "fields"]
+        url = "devices/views/{}/devices.itjson".format(view_id)
+        regex = validate_regex(kwargs.pop("regex", None))
+        if regex:
+            kwargs["regex"] = regex
+        call_settings = {}
+        if callback:
+            call_settings["callback"] = callback
+            if callback_args:
+                call_settings["callback_args"] = callback_args
+        call_settings["payload"] = {kword: kwargs[kword]
+                                    for kword in valid_kwargs
+                                    if kword in kwargs}
+        for result in self.interact_yield("POST", url, **call_settings):
+            yield result
+
+    def poll_views(self, cursors, fields=None, regex=None, max_workers=4):
+        """Fetch devices seen since the last poll from several views at once.
+
+        Each view is streamed in its own thread, starting from that view's
+        cursor, and the cursor is advanced to the newest
+        ``kismet.device.base.last_time`` it returned. Call repeatedly with
+        the same ``cursors`` dict to collect only new activity, sharded by
+        view. Devices seen during the cursor's second may be returned again
+        by the next poll.
+
+        Args:
+            cursors (dict): Maps view ID to the last-time cursor (0 for
+                everything). Updated in place.
+            fields (list): List of fields to return. The last-seen time is
+                added if missing.
+            regex (list): Regex filters per Kismet command_param spec.
+            max_workers (int): Maximum views streamed at once.
+
+        Return:
+            dict: Maps each view ID to a list of devices.
+        """
+        if not cursors:
+            return {}
+        time_name = self.last_time_field
+        kwargs = {}
+        if fields:
+            kwargs["fields"], time_name = self.with_field(
+                fields, self.last_time_field)
+        if regex:
+            kwargs["regex"] = regex
+
+        def poll(view_id):
+            return list(self.view(view_id, last_time=cursors[view_id],
+                                  **kwargs))
+        workers = min(max_workers, len(cursors))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {view_id: executor.submit(poll, view_id)
+                       for view_id in cursors}
+            results = {view_id: future.result()
+                       for view_id, future in futures.items()}
+        for view_id, devices in results.items():
+            for device in devices:
+                cursors[view_id] = max(cursors[view_id],
+                                       device.get(time_name, 0))
+        return results
+
+    def view_pages(self, view_id, page_size=500, fields=None, regex=None,
+                   sort=None, descending=False, window=4, start_page=0,
+                   retries=2):
+        """Yield a device view one page at a time, fetching pages in parallel.
+
+        Pages are requested with Kismet's datatables windowing, so each page
+        is an independent request which can be fetched concurrently and
+        retried on its own. Up to ``window`` pages are in flight ahead of the
+        page being consumed, so following pages download while the caller
+        processes the current one. The first ``window`` pages are requested
+        together, before the size of the view is known; any of them past
+        the end are discarded. Pages are always yielded in order.
+
+        The view can change while it is paged; sort on a field which does
+        not change once a device is seen, such as
+        ``kismet.device.base.first_time``, to keep page boundaries stable.
+
+        Args:
+            view_id (str): Device view, e.g. ``all`` or
+                ``phydot11_accesspoints``.
+            page_size (int): Devices per page.
+            fields (list): List of fields to return.
+            regex (list): Regex filters per Kismet command_param spec.
+            sort (str): Field to sort by on the server. Added to ``fields``
+                if missing.
+            descending (bool): Sort in descending order.
+            window (int): Maximum page requests in flight.
+            start_page (int): First page to fetch, to resume a previous
+                iteration at a page boundary.
+            retries (int): Times to retry a page after a connection error.
+
+        Yield:
+            dict: ``page`` (number), ``start`` (offset of the first
+                device), ``total`` (devices in the filtered view) and
+                ``devices`` (list).
+        """
+        payload = self.page_payload(fields, regex, sort, descending)
+        url = "devices/views/{}/devices.json".format(view_id)
+        window = max(1, window)
+        pending = collections.deque()
+        next_page = start_page
+        pages = None
+        executor = ThreadPoolExecutor(max_workers=window)
+        try:
+            while True:
+                # Until the first page gives the total, the first ``window``
+                # pages are requested on the assumption that they exist.
+                while len(pending) < window and (pages is None or
+                                                 next_page < pages):
+                    pending.append((next_page, executor.submit(
+                        self.fetch_page, url, payload, next_page, page_size,
+                        retries)))
+                    next_page += 1
+                if not pending:
+                    return
+                page = pending.popleft()[1].result()
+                if pages is None:
+                    pages = -(-page["total"] // page_size)
+                    while pending and pending[-1][0] >= pages:
+                        pending.pop()[1].cancel()
+                yield page
+        finally:
+            for _, future in pending:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+    def page_payload(self, fields=None, regex=None, sort=None,
+                     descending=False):
+        """Return the datatables payload shared by every page of a view."""
+        payload = {"datatable": True}
+        regex = validate_regex(regex)
+        if regex:
+            payload["regex"] = regex
+        if sort:
+            fields = list(fields or [])
+            names = [field[0] if isinstance(field, (list, tuple)) else field
+                     for field in fields]
+            if sort not in names:
+                fields.append(sort)
+                names.append(sort)
+            payload["order[0][column]"] = names.index(sort)
+            payload["order[0][dir]"] = "desc" if descending else "asc"
+        if fields:
+            payload["fields"] = fields
+        return payload
+
+    def fetch_page(self, url, payload, page, page_size, retries=2):
+        """Fetch one page of a device view, retrying connection errors."""
+        payload = dict(payload, start=page * page_size, length=page_size,
+                       draw=page + 1)
+        attempt = 0
+        while True:
+            try:
+                result = self.interact("POST", url, payload=payload)
+                break
+            except KismetConnectionError:
+                attempt += 1
+                if attempt > retries:
+                    raise
+                self.logger.warn("Retrying page {} of {}".format(page, url))
+        return {"page": page, "start": page * page_size,
+                "total": result.get("recordsFiltered",
+                                    result.get("recordsTotal", 0)),
+                "devices": result.get("data", [])}
+
     def by_mac(self, callback=None, callback_args=None, **kwargs):
         """Yield devices matching provided MAC addresses or masked MAC groups.
 
@@ -52,12 +438,16 @@ class Devices(BaseInterface):
             callback_args: Arguments for callback.
 
         Keyword args:
-            devices (list): List of device MACs or MAC masks.
+            devices (list): List of device MACs or MAC masks, as strings,
+                48-bit integers or ``(value, mask)`` integer pairs.
             fields (list): List of fields to return.
 
         Yield:
             dict: Device json, or None if callback is set.
         """
+        if "devices" in kwargs:
+            kwargs["devices"] = [format_mask(entry)
+                                 for entry in kwargs["devices"]]
         call_settings = {}
         if callback:
             call_settings["callback"] = callback
@@ -71,6 +461,25 @@ class Devices(BaseInterface):
         for result in self.interact_yield("POST", url, **call_settings):
             yield result
 
+    def by_oui(self, ouis, callback=None, callback_args=None, **kwargs):
+        """Yield devices whose MAC address has one of ``ouis``.
+
+        Args:
+            ouis (iterable): OUIs as 24-bit integers or ``AA:BB:CC``
+                strings, e.g. from :py:meth:`kismet_rest.OuiTable.ouis_for`.
+            callback: Callback function.
+            callback_args: Arguments for callback.
+
+        Keyword args:
+            fields (list): List of fields to return.
+
+        Yield:
+            dict: Device json, or None if callback is set.
+        """
+        kwargs["devices"] = oui_masks(ouis)
+        for result in self.by_mac(callback, callback_args, **kwargs):
+            yield result
+
     def by_key(self, device_key, field=None, fields=None):
         """Return a dictionary representing one device, identified by ``key``.
 
@@ -145,7 +554,9 @@ class Devices(BaseInterface):
 
         Keyword args:
             last_time (int): Unix epoch timestamp
-            regex (str): Regular expression for filtering results.
+            regex (list or Filter): ``[[path, regex], ...]`` filters per
+                Kismet command_param spec, or a :py:class:`Filter` which
+                Kismet can evaluate.
             fields (list): Fields for filtering.
 
         Yield:
@@ -187,15 +598,6 @@ class Devices(BaseInterface):
                 ``kismet.device.base.tags``,
                 ``kismet.device.base.type``.
         """
-        valid_kwargs = ["last_time", "regex", "fields"]
-        url = "devices/views/phydot11_accesspoints/devices.itjson"
-        call_settings = {}
-        if callback:
-            call_settings["callback"] = callback
-            if callback_args:
-                call_settings["callback_args"] = callback_args
-        call_settings["payload"] = {kword: kwargs[kword]
-                                    for kword in valid_kwargs
-                                    if kword in kwargs}
-        for result in self.interact_yield("POST", url, **call_settings):
+        for result in self.view("phydot11_accesspoints", callback,
+                                callback_args, **kwargs):
             yield result
@@ -0,0 +1,223 @@
+"""Queued, locally-throttled alert delivery."""
+
+import threading
+import time
+try:
+    import Queue as queue
+except ImportError:
+    import queue
+
+from .logger import Logger
+
+RATE_UNITS = {"sec": 1, "second": 1, "min": 60, "minute": 60,
+              "hour": 3600, "day": 86400}
+
+
+def parse_rate(rate):
+    """Return ``(count, seconds)`` for a Kismet rate string like ``10/min``.
+
+    A count of 0 means no limit, as in Kismet.
+    """
+    try:
+        count, unit = rate.split("/")
+        return int(count), RATE_UNITS[unit.strip().lower()]
+    except (AttributeError, KeyError, ValueError):
+        raise ValueError("Invalid alert rate: {}".format(rate))
+
+
+class TokenBucket(object):
+    """Allow ``count`` events per ``seconds``, refilling continuously."""
+
+    def __init__(self, count, seconds):
+        """Start full."""
+        self.capacity = float(count)
+        self.fill_rate = float(count) / seconds
+        self.tokens = self.capacity
+        self.stamp = time.time()
+
+    def take(self, now=None):
+        """Consume a token if one is available; return True if it was."""
+        if not self.capacity:
+            return True
+        if now is None:
+            now = time.time()
+        self.tokens = min(self.capacity,
+                          self.tokens + (now - self.stamp) * self.fill_rate)
+        self.stamp = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+    def refund(self):
+        """Return a token taken by :py:meth:`take`."""
+        self.tokens = min(self.capacity, self.tokens + 1)
+
+
+class AlertEmitter(object):
+    """Deliver alerts to Kismet in the background, throttled locally.
+
+    Kismet silently drops alerts beyond the ``rate`` and ``burst`` limits an
+    alert was defined with. The emitter merges identical alerts which are
+    still waiting to be sent and delivers the rest from a pool of worker
+    threads, which apply the same limits with token buckets just before
+    sending, so alerts Kismet would drop are never sent, even when a backlog
+    drains at once. :py:meth:`emit` never waits on the network; when the
+    queue is full it returns False, or waits up to ``timeout`` seconds for
+    space.
+
+    Args:
+        alerts (Alerts): Endpoint used to define and raise alerts.
+        max_queue (int): Maximum alerts waiting for delivery.
+        workers (int): Concurrent deliveries.
+    """
+
+    def __init__(self, alerts, max_queue=1000, workers=4):
+        """Start the delivery workers."""
+        self.alerts = alerts
+        self.logger = Logger()
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.lock = threading.Lock()
+        self.throttles = {}
+        self.pending = set()
+        self.closed = False
+        self.stats = {"queued": 0, "sent": 0, "failed": 0, "throttled": 0,
+                      "coalesced": 0, "dropped": 0}
+        self.workers = []
+        for _ in range(workers):
+            worker = threading.Thread(target=self.deliver)
+            worker.daemon = True
+            worker.start()
+            self.workers.append(worker)
+
+    def __enter__(self):
+        """Return self."""
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Deliver queued alerts and stop the workers."""
+        self.close()
+
+    def define(self, name, description, rate="10/min", burst="1/sec",
+               phyname=None):
+        """Define an alert in Kismet and throttle it locally.
+
+        Arguments are as for :py:meth:`kismet_rest.Alerts.define`.
+
+        Return:
+            bool: True for success, False for failed request.
+        """
+        result = self.alerts.define(name, description, rate=rate,
+                                    burst=burst, phyname=phyname)
+        self.register(name, rate=rate, burst=burst)
+        return result
+
+    def register(self, name, rate="10/min", burst="1/sec"):
+        """Throttle an alert which is already defined in Kismet."""
+        buckets = [TokenBucket(*parse_rate(rate)),
+                   TokenBucket(*parse_rate(burst))]
+        with self.lock:
+            self.throttles[name] = buckets
+
+    def emit(self, name, text, timeout=0, **kwargs):
+        """Queue an alert for delivery.
+
+        Args:
+            name (str): Name of alert.
+            text (str): Descriptive text for alert.
+            timeout (float): Seconds to wait for queue space. 0 never waits,
+                None waits as long as needed.
+
+        Keyword Args:
+            bssid, source, dest, other, channel: As for
+                :py:meth:`kismet_rest.Alerts.raise_alert`.
+
+        Return:
+            bool: True if the alert was queued, False if it was merged with
+                an identical queued alert or the queue was full.
+
+        Raises:
+            RuntimeError: The emitter has been closed.
+        """
+        key = (name, text) + tuple(sorted(kwargs.items()))
+        with self.lock:
+            if self.closed:
+                raise RuntimeError("Cannot emit alerts after close()")
+            if key in self.pending:
+                self.stats["coalesced"] += 1
+                return False
+            self.pending.add(key)
+        try:
+            self.queue.put((key, name, text, kwargs), block=timeout != 0,
+                           timeout=timeout or None)
+        except queue.Full:
+            with self.lock:
+                self.pending.discard(key)
+                self.stats["dropped"] += 1
+            return False
+        with self.lock:
+            self.stats["queued"] += 1
+        return True
+
+    def admit(self, name):
+        """Take a token from every bucket of ``name`` if all have one."""
+        with self.lock:
+            taken = []
+            for bucket in self.throttles.get(name, []):
+                if not bucket.take():
+                    for prior in taken:
+                        prior.refund()
+                    return False
+                taken.append(bucket)
+            return True
+
+    def deliver(self):
+        """Worker loop: raise queued alerts until a stop marker arrives."""
+        while True:
+            item = self.queue.get()
+            if item is None:
+                self.queue.task_done()
+                return
+            key, name, text, kwargs = item
+            outcome = "failed"
+            try:
+                if not self.admit(name):
+                    outcome = "throttled"
+                elif self.alerts.raise_alert(name, text, **kwargs):
+                    outcome = "sent"
+            except Exception as err:
+                # Any failure costs one alert, never the worker.
+                self.logger.error("Failed to raise {}: {}".format(name, err))
+            finally:
+                with self.lock:
+                    self.pending.discard(key)
+                    self.stats[outcome] += 1
+                self.queue.task_done()
+
+    def flush(self):
+        """Wait until every queued alert has been delivered."""
+        self.queue.join()
+
+    def close(self):
+        """Deliver queued alerts, then stop the workers.
+
+        Alerts queued by an :py:meth:`emit` racing with ``close`` after the
+        workers stopped are counted as dropped.
+        """
+        with self.lock:
+            self.closed = True
+        for _ in self.workers:
+            self.queue.put(None)
+        for worker in self.workers:
+            worker.join()
+        self.workers = []
+        while True:
+            try:
+                item = self.queue.get_nowait()
+            except queue.Empty:
+                return
+            if item is not None:
+                with self.lock:
+                    self.pending.discard(item[0])
+                    self.stats["dropped"] += 1
+            self.queue.task_done()
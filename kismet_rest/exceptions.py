@@ -26,6 +26,15 @@ class KismetConnectionError(KismetConnectorException):
         super(Exception, self).__init__(message)
         self.rcode = rcode
 
+
+class KismetTimeoutError(KismetConnectionError):
+    """A request timed out or exceeded its deadline."""
+
+
+class KismetCircuitOpenError(KismetConnectionError):
+    """A circuit breaker failed a request fast, without sending it."""
+
+
 class KismetServiceError(KismetConnectorException):
     """Server-side application errors."""
     def __init__(self, message, rcode):
@@ -0,0 +1,499 @@
+"""Build pandas DataFrames and Arrow tables from record streams.
+
+Records are appended one at a time into typed column buffers, so a frame is
+built in one pass without first holding a list of every record. Integers,
+floats and MAC addresses are packed into ``array`` buffers, and repeated
+strings such as manufacturers are stored once, as categories.
+
+pandas and pyarrow are imported only when a frame is built. Install them
+with ``pip install kismet_rest[pandas]`` or ``pip install kismet_rest[arrow]``.
+"""
+
+import array
+import importlib
+import json
+
+from .macs import INT64
+from .macs import UINT64
+from .macs import int_to_mac
+from .macs import mac_to_int
+from .macs import macs_to_ints
+from .query import STRING_TYPES
+from .query import get_field
+
+INT = "int"
+FLOAT = "float"
+CATEGORY = "category"
+MAC = "mac"
+OBJECT = "object"
+
+# Column types of common Kismet fields, by simplified field name. Other
+# fields are typed from their first value.
+DEFAULT_TYPES = {
+    "kismet.device.base.macaddr": MAC,
+    "kismet.device.base.manuf": CATEGORY,
+    "kismet.device.base.phyname": CATEGORY,
+    "kismet.device.base.type": CATEGORY,
+    "kismet.device.base.channel": CATEGORY,
+    "kismet.device.base.crypt": INT,
+    "kismet.device.base.first_time": INT,
+    "kismet.device.base.last_time": INT,
+    "kismet.device.base.mod_time": INT,
+    "kismet.device.base.frequency": FLOAT,
+    "kismet.device.base.datasize": INT,
+    "kismet.device.base.packets.total": INT,
+    "kismet.device.base.packets.rx": INT,
+    "kismet.device.base.packets.tx": INT,
+    "kismet.device.base.packets.llc": INT,
+    "kismet.device.base.packets.error": INT,
+    "kismet.device.base.packets.data": INT,
+    "kismet.device.base.packets.crypt": INT,
+    "kismet.device.base.packets.filtered": INT,
+    "kismet.common.signal.last_signal": INT,
+    "kismet.common.signal.min_signal": INT,
+    "kismet.common.signal.max_signal": INT,
+    "kismet.alert.header": CATEGORY,
+    "kismet.alert.class": CATEGORY,
+    "kismet.alert.severity": INT,
+    "kismet.alert.phy_id": INT,
+    "kismet.alert.timestamp": FLOAT,
+    "kismet.alert.source_mac": MAC,
+    "kismet.alert.dest_mac": MAC,
+    "kismet.alert.transmitter_mac": MAC,
+    "kismet.messagebus.message_time": INT,
+    "kismet.messagebus.message_flags": INT,
+}
+
+try:
+    INTEGER_TYPES = (int, long)  # NOQA
+except NameError:
+    INTEGER_TYPES = (int,)
+
+INT_MIN = -2 ** 63
+INT_MAX = 2 ** 63 - 1
+
+
+def require(module, extra):
+    """Import ``module``, or explain which extra provides it."""
+    try:
+        return importlib.import_module(module)
+    except ImportError:
+        raise ImportError("Building frames requires {}: "
+                          "pip install kismet_rest[{}]".format(module, extra))
+
+
+def parse_fields(fields):
+    """Return ``(name, path)`` for each entry of a Kismet ``fields`` list.
+
+    Kismet names a field after the last component of its path unless an
+    alias is given as ``[path, alias]``.
+    """
+    columns = []
+    for entry in fields:
+        if isinstance(entry, STRING_TYPES):
+            columns.append((entry.rsplit("/", 1)[-1], entry))
+        else:
+            path, alias = entry
+            columns.append((alias, path))
+    return columns
+
+
+class Column(object):
+    """Typed buffer for the values of one field.
+
+    Values are collected in ``batch`` and packed into the typed buffer by
+    :py:meth:`flush`, a whole batch at a time where the values allow it.
+    The type is fixed up front or taken from the first value which is not
+    None. A value which does not fit turns an integer column into a float
+    column, and any other column into an object column.
+
+    Args:
+        name (str): Column name.
+        kind (str): ``int``, ``float``, ``category``, ``mac`` or ``object``;
+            None to infer it.
+        rows (int): Missing values to start with, for a column first seen
+            part way through a stream.
+    """
+
+    def __init__(self, name, kind=None, rows=0):
+        """Create the buffers for ``kind``."""
+        self.name = name
+        self.kind = None
+        self.rows = self.missing = rows
+        self.batch = []
+        self.push = self.push_pending
+        if kind is not None:
+            self.start(kind, rows)
+
+    def start(self, kind, rows):
+        """Create empty buffers for ``kind``, then add ``rows`` missing."""
+        # 64-bit integers are kept in a list where array has no 8-byte
+        # typecode.
+        pushes = {INT: (self.push_number, INT64),
+                  FLOAT: (self.push_number, "d"),
+                  MAC: (self.push_mac, UINT64),
+                  CATEGORY: (self.push_category, "i"),
+                  OBJECT: (self.push_object, None)}
+        if kind not in pushes:
+            raise ValueError("Unknown column type: {}".format(kind))
+        self.push, typecode = pushes[kind]
+        self.kind = kind
+        self.rows = self.missing = 0
+        self.valid = bytearray()
+        self.values = array.array(typecode) if typecode else []
+        if kind == CATEGORY:
+            self.categories = []
+            self.codes = {None: -1}
+        self.accepts = (INTEGER_TYPES if kind == INT
+                        else INTEGER_TYPES + (float,))
+        self.extend([None] * rows)
+
+    @staticmethod
+    def infer(value):
+        """Return the column type for a first value."""
+        if isinstance(value, bool):
+            return OBJECT
+        if isinstance(value, INTEGER_TYPES) and INT_MIN <= value <= INT_MAX:
+            return INT
+        if isinstance(value, float):
+            return FLOAT
+        return OBJECT
+
+    def flush(self):
+        """Pack the values waiting in ``batch``."""
+        if self.batch:
+            self.extend(self.batch)
+            del self.batch[:]
+
+    def extend(self, values):
+        """Pack a list of values, None being a missing value."""
+        if not self.extend_batch(values):
+            for value in values:
+                self.append(value)
+
+    def append(self, value):
+        """Pack one value."""
+        if not self.push(value):
+            if self.kind is None:
+                self.start(self.infer(value), self.rows)
+            else:
+                self.promote(FLOAT if self.kind == INT and
+                             isinstance(value, float) else OBJECT)
+            self.push(value)
+        self.rows += 1
+
+    def extend_batch(self, values):
+        """Pack a list of values at once; return False if they do not fit.
+
+        Each check and conversion here runs over the whole list in C, which
+        is several times faster than packing values one at a time.
+        """
+        missing = values.count(None)
+        if missing == len(values):
+            if self.kind is None:
+                self.rows += missing
+                self.missing += missing
+                return True
+            if self.kind == OBJECT:
+                self.values.extend(values)
+            elif self.kind == CATEGORY:
+                self.values.extend([-1] * missing)
+            else:
+                fill = float("nan") if self.kind == FLOAT else 0
+                self.values.extend([fill] * missing)
+                self.valid.extend(bytearray(missing))
+        elif self.kind is None:
+            return False
+        elif self.kind == OBJECT:
+            self.values.extend(values)
+        elif self.kind == CATEGORY:
+            try:
+                new = set(values).difference(self.codes)
+            except TypeError:
+                return False
+            for value in values:
+                if not new:
+                    break
+                if value in new:
+                    new.discard(value)
+                    self.codes[value] = len(self.categories)
+                    self.categories.append(value)
+            self.values.extend(map(self.codes.__getitem__, values))
+        elif self.kind == MAC:
+            if missing or not self.extend_macs(values):
+                return False
+        elif not self.extend_numbers(values, missing):
+            return False
+        self.rows += len(values)
+        self.missing += missing
+        return True
+
+    def extend_numbers(self, values, missing):
+        """Pack integers or floats; return False if any other value is seen."""
+        classes = set(map(type, values))
+        classes.discard(type(None))
+        if not classes.issubset(self.accepts):
+            return False
+        valid = b"\x01" * len(values)
+        if missing:
+            fill = float("nan") if self.kind == FLOAT else 0
+            valid = bytearray([value is not None for value in values])
+            values = [fill if value is None else value for value in values]
+        if (self.kind == INT and isinstance(self.values, list) and
+                not INT_MIN <= min(values) <= max(values) <= INT_MAX):
+            return False
+        size = len(self.values)
+        try:
+            self.values.extend(values)
+        except OverflowError:
+            del self.values[size:]
+            return False
+        self.valid.extend(valid)
+        return True
+
+    def extend_macs(self, values):
+        """Pack MAC address strings; return False if any is malformed."""
+        try:
+            self.values.extend(macs_to_ints(values))
+        except ValueError:
+            return False
+        self.valid.extend(b"\x01" * len(values))
+        return True
+
+    # Each push method packs one value and returns True, or returns False
+    # if the value does not fit the column type. They are the slow path,
+    # for batches which extend_batch cannot pack at once.
+
+    def push_pending(self, value):
+        """Count a missing value while the type is unknown."""
+        if value is not None:
+            return False
+        self.missing += 1
+        return True
+
+    def push_number(self, value):
+        """Pack an integer or float."""
+        if value is None:
+            self.missing += 1
+            self.values.append(float("nan") if self.kind == FLOAT else 0)
+            self.valid.append(0)
+            return True
+        if not isinstance(value, self.accepts) or isinstance(value, bool):
+            return False
+        if (self.kind == INT and isinstance(self.values, list) and
+                not INT_MIN <= value <= INT_MAX):
+            return False
+        try:
+            self.values.append(value)
+        except OverflowError:
+            return False
+        self.valid.append(1)
+        return True
+
+    def push_mac(self, value):
+        """Pack a MAC address into an integer."""
+        if value is None:
+            self.missing += 1
+            self.values.append(0)
+            self.valid.append(0)
+            return True
+        try:
+            self.values.append(mac_to_int(value))
+        except (TypeError, ValueError):
+            return False
+        self.valid.append(1)
+        return True
+
+    def push_category(self, value):
+        """Pack a value as the code of its category."""
+        try:
+            code = self.codes.get(value)
+        except TypeError:
+            return False
+        if code is None:
+            code = self.codes[value] = len(self.categories)
+            self.categories.append(value)
+        elif code < 0:
+            self.missing += 1
+        self.values.append(code)
+        return True
+
+    def push_object(self, value):
+        """Pack any value."""
+        if value is None:
+            self.missing += 1
+        self.values.append(value)
+        return True
+
+    def to_list(self):
+        """Return the values as Python objects, with None for missing."""
+        if self.kind is None:
+            return [None] * self.rows
+        if self.kind == OBJECT:
+            return list(self.values)
+        if self.kind == CATEGORY:
+            return [self.categories[code] if code >= 0 else None
+                    for code in self.values]
+        convert = int_to_mac if self.kind == MAC else (lambda value: value)
+        return [convert(value) if valid else None
+                for value, valid in zip(self.values, self.valid)]
+
+    def promote(self, kind):
+        """Convert the buffered values to ``kind``."""
+        values = self.to_list()
+        self.start(kind, 0)
+        self.extend(values)
+
+    def to_pandas(self, pandas, numpy):
+        """Return the column as a pandas array or list."""
+        if self.kind is None or self.kind == OBJECT:
+            return self.to_list()
+        if self.kind == CATEGORY:
+            codes = numpy.frombuffer(self.values, dtype=numpy.int32)
+            return pandas.Categorical.from_codes(codes, self.categories)
+        if self.kind == FLOAT:
+            return numpy.frombuffer(self.values, dtype=numpy.float64)
+        dtype = numpy.uint64 if self.kind == MAC else numpy.int64
+        if isinstance(self.values, list):
+            values = numpy.array(self.values, dtype=dtype)
+        else:
+            values = numpy.frombuffer(self.values, dtype=dtype)
+        if not self.missing:
+            return values
+        mask = numpy.frombuffer(self.valid, dtype=numpy.uint8) == 0
+        return pandas.arrays.IntegerArray(values, mask)
+
+    def to_arrow(self, pyarrow):
+        """Return the column as a pyarrow array."""
+        if self.kind is None:
+            return pyarrow.nulls(self.rows)
+        if self.kind == OBJECT:
+            values = self.to_list()
+            try:
+                return pyarrow.array(values)
+            except (pyarrow.ArrowInvalid, pyarrow.ArrowTypeError):
+                return pyarrow.array([None if value is None
+                                      else json.dumps(value)
+                                      for value in values])
+        if self.kind == CATEGORY:
+            indices = self.arrow_buffer(pyarrow, pyarrow.int32())
+            if self.missing:
+                compute = importlib.import_module("pyarrow.compute")
+                indices = compute.if_else(
+                    compute.greater_equal(indices, 0), indices,
+                    pyarrow.scalar(None, pyarrow.int32()))
+            return pyarrow.DictionaryArray.from_arrays(
+                indices, pyarrow.array(self.categories))
+        types = {INT: pyarrow.int64(), FLOAT: pyarrow.float64(),
+                 MAC: pyarrow.uint64()}
+        values = self.arrow_buffer(pyarrow, types[self.kind])
+        if not self.missing:
+            return values
+        compute = importlib.import_module("pyarrow.compute")
+        valid = pyarrow.Array.from_buffers(
+            pyarrow.uint8(), self.rows, [None, pyarrow.py_buffer(self.valid)])
+        return compute.if_else(compute.equal(valid, 1), values,
+                               pyarrow.scalar(None, types[self.kind]))
+
+    def arrow_buffer(self, pyarrow, arrow_type):
+        """Return the packed values as an Arrow array, without copying."""
+        if isinstance(self.values, list):
+            return pyarrow.array(self.values, arrow_type)
+        return pyarrow.Array.from_buffers(
+            arrow_type, self.rows, [None, pyarrow.py_buffer(self.values)])
+
+
+class FrameBuilder(object):
+    """Append records into typed columns, then build a frame.
+
+    With ``fields``, the columns are the fields, named as Kismet names them
+    (see :py:func:`parse_fields`), and values are found either under that
+    name or by path in full records. Without ``fields``, a column is added
+    for every top-level key seen.
+
+    Values are packed every ``batch_size`` records, so only one batch of
+    Python objects is held at a time. Frames share memory with the builder,
+    so append no more records after building one.
+
+    Args:
+        fields (list): Kismet ``fields`` list, of paths or
+            ``[path, alias]`` pairs.
+        types (dict): Column type by column name or field path, overriding
+            :py:data:`DEFAULT_TYPES` and inference. One of ``int``,
+            ``float``, ``category``, ``mac`` or ``object``.
+        batch_size (int): Records between packing.
+    """
+
+    def __init__(self, fields=None, types=None, batch_size=4096):
+        """Create the columns named by ``fields``, if any."""
+        self.types = dict(types or {})
+        self.fields = parse_fields(fields) if fields else None
+        self.batch_size = batch_size
+        self.columns = {}
+        self.order = []
+        self.rows = 0
+        self.pending = 0
+        self.lookups = [(name, path, self.add_column(name, path).batch)
+                        for name, path in self.fields or []]
+
+    def add_column(self, name, path=None):
+        """Add a column, with a missing value for each earlier row."""
+        kind = self.types.get(name, self.types.get(path))
+        if kind is None:
+            kind = DEFAULT_TYPES.get((path or name).rsplit("/", 1)[-1])
+        self.columns[name] = Column(name, kind, self.rows)
+        self.order.append(name)
+        return self.columns[name]
+
+    def append(self, record):
+        """Add one record."""
+        if self.fields is not None:
+            for name, path, batch in self.lookups:
+                batch.append(record[name] if name in record
+                             else get_field(record, path))
+        else:
+            columns = self.columns
+            for name, value in record.items():
+                column = columns.get(name)
+                if column is None:
+                    column = self.add_column(name)
+                column.batch.append(value)
+            if len(record) < len(columns):
+                for column in columns.values():
+                    if column.rows + len(column.batch) == self.rows:
+                        column.batch.append(None)
+        self.rows += 1
+        self.pending += 1
+        if self.pending >= self.batch_size:
+            self.flush()
+
+    def extend(self, records):
+        """Add every record of an iterable; return self."""
+        for record in records:
+            self.append(record)
+        self.flush()
+        return self
+
+    def flush(self):
+        """Pack the values of every column's pending batch."""
+        for column in self.columns.values():
+            column.flush()
+        self.pending = 0
+
+    def to_dataframe(self):
+        """Return the columns as a ``pandas.DataFrame``."""
+        pandas = require("pandas", "pandas")
+        numpy = require("numpy", "pandas")
+        self.flush()
+        data = {name: self.columns[name].to_pandas(pandas, numpy)
+                for name in self.order}
+        return pandas.DataFrame(data, columns=self.order,
+                                index=pandas.RangeIndex(self.rows))
+
+    def to_arrow(self):
+        """Return the columns as a ``pyarrow.Table``."""
+        pyarrow = require("pyarrow", "arrow")
+        self.flush()
+        return pyarrow.Table.from_arrays(
+            [self.columns[name].to_arrow(pyarrow) for name in self.order],
+            names=self.order)
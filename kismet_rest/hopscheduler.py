@@ -0,0 +1,208 @@
+"""Rebalance datasource hop lists based on observed channel activity."""
+
+from __future__ import division
+
+import re
+
+from .logger import Logger
+from .utility import Utility
+
+CHANNEL_RX = re.compile(r"^(\d+)")
+
+
+def base_channel(channel):
+    """Return the primary channel number of a Kismet channel string.
+
+    ``6``, ``6HT40+`` and ``6HT20`` all map to ``6``. Channels which do not
+    start with a number are returned unchanged.
+    """
+    match = CHANNEL_RX.match(str(channel))
+    return match.group(1) if match else str(channel)
+
+
+class HopScheduler(object):
+    """Focus hopping datasources on the busiest channels.
+
+    The scheduler polls devices incrementally, asking only for the fields it
+    needs and only for devices seen since the previous poll, and keeps a
+    decaying per-channel activity counter. :py:meth:`plan` then spreads the
+    channels across the available datasources so that busy channels are
+    shared out evenly, and :py:meth:`apply` sends the hop lists with
+    :py:meth:`kismet_rest.Datasources.configure`.
+
+    Args:
+        devices (Devices): Endpoint used to poll device activity.
+        datasources (Datasources): Endpoint used to list and configure
+            sources.
+        rate (float): Hop rate, in channels per second, for new hop lists.
+        decay (float): Weight kept by old activity at each poll, between 0
+            (only the latest poll counts) and 1 (never forget).
+        dry_run (bool): If True, :py:meth:`apply` returns the plan without
+            configuring any source.
+    """
+
+    channel_field = "kismet.device.base.channel"
+    key_field = "kismet.device.base.key"
+    last_time_field = "kismet.device.base.last_time"
+    source_fields = ["kismet.datasource.uuid",
+                     "kismet.datasource.channels",
+                     "kismet.datasource.hopping"]
+
+    def __init__(self, devices, datasources, rate=5, decay=0.5,
+                 dry_run=False):
+        """Initialize with no activity observed."""
+        self.devices = devices
+        self.datasources = datasources
+        self.rate = rate
+        self.decay = decay
+        self.dry_run = dry_run
+        self.logger = Logger()
+        self.activity = {}
+        self.last_time = 0
+        self.boundary = set()
+        self.polls = 0
+
+    def poll(self):
+        """Count devices active since the previous poll on each channel.
+
+        Kismet also returns devices last seen in the second the previous
+        poll ended on; those already counted are recognised by key and
+        skipped.
+
+        Return:
+            int: Number of devices seen by this poll.
+        """
+        for channel in self.activity:
+            self.activity[channel] *= self.decay
+        seen = 0
+        fields = [self.key_field, self.channel_field, self.last_time_field]
+        newest, boundary = self.last_time, set(self.boundary)
+        for device in self.devices.all(ts=self.last_time, fields=fields):
+            last_time = device.get(self.last_time_field, 0)
+            key = device.get(self.key_field)
+            if last_time == self.last_time and key in self.boundary:
+                continue
+            seen += 1
+            if last_time > newest:
+                newest, boundary = last_time, set([key])
+            elif last_time == newest:
+                boundary.add(key)
+            channel = device.get(self.channel_field)
+            if not channel:
+                continue
+            channel = base_channel(channel)
+            self.activity[channel] = self.activity.get(channel, 0) + 1
+        self.last_time, self.boundary = newest, boundary
+        self.polls += 1
+        return seen
+
+    def sources(self):
+        """Return ``{uuid: [channel, ...]}`` for every hopping source."""
+        sources = {}
+        for source in self.datasources.all(fields=self.source_fields):
+            if not source.get("kismet.datasource.hopping"):
+                continue
+            channels = source.get("kismet.datasource.channels") or []
+            if channels:
+                sources[source["kismet.datasource.uuid"]] = channels
+        return sources
+
+    def plan(self, sources=None):
+        """Return hop settings for each source, weighted by activity.
+
+        Channels are visited from busiest to quietest and each is given to
+        the least-loaded source able to tune it, so busy channels are split
+        across radios and every channel a source supports is covered by some
+        source. Each source hops over its channels busiest first.
+
+        Args:
+            sources (dict): ``{uuid: [channel, ...]}``; defaults to
+                :py:meth:`sources`.
+
+        Return:
+            dict: ``{uuid: {"rate": rate, "channels": [...]}}``, suitable
+                for :py:meth:`kismet_rest.Datasources.configure`.
+        """
+        if sources is None:
+            sources = self.sources()
+        # Map each base channel to the exact channel string per source.
+        tunable = {}
+        for uuid, channels in sources.items():
+            for channel in channels:
+                tunable.setdefault(base_channel(channel), {}).setdefault(
+                    uuid, channel)
+        ordered = sorted(tunable,
+                         key=lambda chan: (-self.activity.get(chan, 0), chan))
+        load = {uuid: 0.0 for uuid in sources}
+        assigned = {uuid: [] for uuid in sources}
+        for channel in ordered:
+            candidates = tunable[channel]
+            uuid = min(candidates,
+                       key=lambda cand: (load[cand], len(assigned[cand]),
+                                         cand))
+            assigned[uuid].append(candidates[uuid])
+            # Count quiet channels a little so they are spread out too.
+            load[uuid] += self.activity.get(channel, 0) + 0.001
+        return {uuid: {"rate": self.rate, "channels": channels}
+                for uuid, channels in assigned.items() if channels}
+
+    def coverage(self, plan):
+        """Return capture coverage metrics for a plan.
+
+        Return:
+            dict: ``channels`` (number of channels in any hop list),
+                ``activity`` (fraction of observed activity on those
+                channels) and ``dwell`` (activity-weighted share of time a
+                radio spends on the channel a device was seen on).
+        """
+        dwell = {}
+        for settings in plan.values():
+            share = 1.0 / len(settings["channels"])
+            for channel in settings["channels"]:
+                channel = base_channel(channel)
+                dwell[channel] = min(1.0, dwell.get(channel, 0) + share)
+        total = sum(self.activity.values())
+        if not total:
+            return {"channels": len(dwell), "activity": 0.0, "dwell": 0.0}
+        covered = sum(count for channel, count in self.activity.items()
+                      if channel in dwell)
+        weighted = sum(count * dwell.get(channel, 0)
+                       for channel, count in self.activity.items())
+        return {"channels": len(dwell),
+                "activity": covered / total,
+                "dwell": weighted / total}
+
+    def apply(self, plan=None):
+        """Send a plan to the datasources, unless in dry-run mode.
+
+        Return:
+            dict: The plan in dry-run mode, otherwise the per-source results
+                of :py:meth:`kismet_rest.Datasources.configure`.
+        """
+        if plan is None:
+            plan = self.plan()
+        if self.dry_run:
+            self.logger.info("Dry run, hop plan: {}".format(plan))
+            return plan
+        return self.datasources.configure(plan)
+
+    def run(self, interval=60, iterations=None):
+        """Poll and rebalance every ``interval`` seconds.
+
+        Args:
+            interval (float): Seconds between rebalances.
+            iterations (int): Stop after this many rebalances; None runs
+                forever.
+
+        Yield:
+            dict: ``plan``, ``coverage`` and ``result`` for each rebalance.
+        """
+        return Utility.poll_loop(self.rebalance, interval, iterations)
+
+    def rebalance(self):
+        """Poll, plan and apply once; return the :py:meth:`run` result."""
+        self.poll()
+        plan = self.plan()
+        result = self.apply(plan)
+        return {"plan": plan, "coverage": self.coverage(plan),
+                "result": result}
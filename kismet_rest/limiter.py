@@ -0,0 +1,244 @@
+"""Adaptive limits on concurrent requests per Kismet server."""
+
+import threading
+import time
+
+from .exceptions import KismetConnectionError
+from .logger import Logger
+from .transport import TransportResponse
+
+
+class HostLimit(object):
+    """Concurrency state for one host."""
+
+    def __init__(self, limit):
+        """Start with ``limit`` slots and none in use."""
+        self.limit = float(limit)
+        self.in_flight = 0
+        self.last_decrease = 0
+        self.increases = 0
+        self.decreases = 0
+        self.waiting = 0
+
+
+class AdaptiveLimiter(object):
+    """Limit in-flight requests per host, adapting the limit AIMD-style.
+
+    Every request waits for a free slot on its host before it is sent, and
+    streamed responses keep their slot until they are closed. After each
+    response the limit is adjusted:
+
+    * additive increase: a response faster than ``latency_target`` grows the
+      limit by ``1 / limit``, so about one slot per round of requests, up to
+      ``maximum``.
+    * multiplicative decrease: a slow response, a 5xx status, a connection
+      error, or packets dropped by Kismet (see :py:meth:`check_drops`)
+      multiplies the limit by ``backoff``, down to ``minimum``. Decreases are
+      applied at most once per ``cooldown`` seconds, so one burst of slow
+      responses counts once.
+
+    One limiter may be shared by several endpoint objects and threads::
+
+        limiter = kismet_rest.AdaptiveLimiter(maximum=8)
+        devices = kismet_rest.Devices(limiter=limiter)
+        alerts = kismet_rest.Alerts(limiter=limiter)
+
+    Args:
+        initial (int): Starting limit for each host.
+        minimum (int): Smallest limit.
+        maximum (int): Largest limit.
+        latency_target (float): Seconds to the response headers above which
+            a response counts as slow.
+        backoff (float): Factor applied to the limit on a decrease.
+        cooldown (float): Minimum seconds between decreases; defaults to
+            ``latency_target``.
+    """
+
+    def __init__(self, initial=4, minimum=1, maximum=32, latency_target=2.0,
+                 backoff=0.5, cooldown=None):
+        """Initialize with no hosts."""
+        self.initial = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.latency_target = latency_target
+        self.backoff = backoff
+        self.cooldown = latency_target if cooldown is None else cooldown
+        self.logger = Logger()
+        self.hosts = {}
+        self.condition = threading.Condition()
+
+    def host(self, host):
+        """Return the state of ``host``, creating it if needed."""
+        if host not in self.hosts:
+            self.hosts[host] = HostLimit(self.initial)
+        return self.hosts[host]
+
+    def acquire(self, host, timeout=None):
+        """Wait for a free slot on ``host``.
+
+        Args:
+            host (str): Host, as ``name:port``.
+            timeout (float): Seconds to wait; None waits as long as needed.
+
+        Return:
+            bool: True if a slot was taken, False on timeout.
+        """
+        end = None if timeout is None else time.time() + timeout
+        with self.condition:
+            state = self.host(host)
+            state.waiting += 1
+            try:
+                while state.in_flight >= max(1, int(state.limit)):
+                    if end is None:
+                        self.condition.wait()
+                        continue
+                    remaining = end - time.time()
+                    if remaining <= 0:
+                        return False
+                    self.condition.wait(remaining)
+                state.in_flight += 1
+                return True
+            finally:
+                state.waiting -= 1
+
+    def release(self, host):
+        """Free a slot taken with :py:meth:`acquire`."""
+        with self.condition:
+            state = self.host(host)
+            state.in_flight = max(0, state.in_flight - 1)
+            self.condition.notify_all()
+
+    def observe(self, host, latency=None, failed=False, now=None):
+        """Adjust the limit of ``host`` after a response.
+
+        Args:
+            host (str): Host the request went to.
+            latency (float): Seconds until the response headers arrived.
+            failed (bool): True for a 5xx status or connection error.
+            now (float): Observation time; defaults to the current time.
+        """
+        if failed or (latency is not None and
+                      latency > self.latency_target):
+            self.decrease(host, now)
+            return
+        with self.condition:
+            state = self.host(host)
+            if state.limit < self.maximum:
+                state.limit = min(self.maximum,
+                                  state.limit + 1.0 / state.limit)
+                state.increases += 1
+                self.condition.notify_all()
+
+    def decrease(self, host, now=None):
+        """Multiply the limit of ``host`` by ``backoff``, unless cooling down.
+
+        Return:
+            bool: True if the limit was decreased.
+        """
+        if now is None:
+            now = time.time()
+        with self.condition:
+            state = self.host(host)
+            if now - state.last_decrease < self.cooldown:
+                return False
+            state.last_decrease = now
+            state.limit = max(self.minimum, state.limit * self.backoff)
+            state.decreases += 1
+        self.logger.debug("Concurrency limit for {} reduced to {}".format(
+            host, int(state.limit)))
+        return True
+
+    def check_drops(self, packetchain, host=None, window=5):
+        """Back off if Kismet dropped packets in the last ``window`` seconds.
+
+        Call this periodically to let capture health throttle collection.
+
+        Args:
+            packetchain (Packetchain): Endpoint for the Kismet server.
+            host (str): Host to throttle; defaults to the host of
+                ``packetchain``.
+            window (int): Seconds of the per-second dropped RRD to inspect.
+
+        Return:
+            int: Packets dropped in the window.
+        """
+        if host is None:
+            host = packetchain.host_netloc()
+        dropped = packetchain.get_packet_stats("dropped", "minute")
+        recent = sum(dropped[-window:]) if window else 0
+        if recent:
+            self.decrease(host)
+        return recent
+
+    def stats(self):
+        """Return ``{host: {...}}`` with each host's current state."""
+        with self.condition:
+            return {host: {"limit": int(state.limit),
+                           "in_flight": state.in_flight,
+                           "waiting": state.waiting,
+                           "increases": state.increases,
+                           "decreases": state.decreases}
+                    for host, state in self.hosts.items()}
+
+
+class LimitedResponse(TransportResponse):
+    """Streamed response holding a limiter slot until it is closed.
+
+    A connection error raised while the body is read is reported through
+    ``failed``, so the limiter and circuit breaker see streams which break
+    off part way.
+    """
+
+    def __init__(self, response, release, failed=None):
+        """Wrap ``response``; ``release`` is called once, on close."""
+        self.response = response
+        self.release = release
+        self.failed = failed
+        self.status_code = response.status_code
+
+    @property
+    def text(self):
+        """Return the complete body as a string."""
+        return self.response.text
+
+    @property
+    def content(self):
+        """Return the complete, decoded body as bytes."""
+        return self.response.content
+
+    @property
+    def wire_bytes(self):
+        """Return the number of body bytes read off the wire so far."""
+        return self.response.wire_bytes
+
+    def json(self):
+        """Return the body parsed as JSON."""
+        return self.response.json()
+
+    def iter_content(self, chunk_size):
+        """Yield the decoded body in chunks."""
+        return self.watch(self.response.iter_content(chunk_size))
+
+    def iter_lines(self, chunk_size=None):
+        """Yield the decoded body one line at a time."""
+        return self.watch(self.response.iter_lines(chunk_size))
+
+    def watch(self, items):
+        """Yield from ``items``, reporting the first connection error."""
+        try:
+            for item in items:
+                yield item
+        except KismetConnectionError:
+            failed, self.failed = self.failed, None
+            if failed is not None:
+                failed()
+            raise
+
+    def close(self):
+        """Close the response and free its slot."""
+        try:
+            self.response.close()
+        finally:
+            release, self.release = self.release, None
+            if release is not None:
+                release()
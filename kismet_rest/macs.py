@@ -0,0 +1,295 @@
+"""MAC addresses as 48-bit integers.
+
+Kismet reports MACs as ``AA:BB:CC:DD:EE:FF`` strings and takes masked groups
+as ``AA:BB:CC:00:00:00/FF:FF:FF:00:00:00``. As integers, a mask test is one
+``&`` and a compare, the OUI is the top 24 bits, and sorting needs no key.
+
+The bulk functions take any sequence of integers: lists, 64-bit ``array``
+buffers such as those built by :py:class:`kismet_rest.frames.FrameBuilder`,
+or numpy arrays, which are processed with numpy's vectorized operators.
+"""
+
+import array
+import binascii
+import gzip
+import struct
+import sys
+
+from .query import STRING_TYPES
+
+FULL_MASK = 0xFFFFFFFFFFFF
+OUI_MASK = 0xFFFFFF000000
+
+
+def typecode(candidates):
+    """Return the first ``array`` typecode in ``candidates`` of 8 bytes.
+
+    Python 2 has no ``q``/``Q`` typecodes, but its ``l``/``L`` are 8 bytes
+    on 64-bit Unix. Returns None if no candidate is 8 bytes wide.
+    """
+    for code in candidates:
+        try:
+            if array.array(code).itemsize == 8:
+                return code
+        except ValueError:
+            continue
+    return None
+
+
+INT64 = typecode("ql")
+UINT64 = typecode("QL")
+
+
+def uint64_array(values=()):
+    """Return ``values`` as an unsigned 64-bit ``array``, or a list.
+
+    A list is returned where ``array`` has no 8-byte typecode.
+    """
+    if UINT64 is None:
+        return list(values)
+    return array.array(UINT64, values)
+
+
+def mac_to_int(text):
+    """Return a ``AA:BB:CC:DD:EE:FF`` MAC address as a 48-bit integer.
+
+    Raises:
+        ValueError: ``text`` is not a MAC address.
+    """
+    if (not isinstance(text, STRING_TYPES) or len(text) != 17 or
+            text.count(":") != 5):
+        raise ValueError("Invalid MAC address: {!r}".format(text))
+    return int(text.replace(":", ""), 16)
+
+
+def int_to_mac(value):
+    """Return a 48-bit integer in Kismet's upper-case ``AA:BB:...`` form."""
+    digits = "{:012X}".format(value)
+    return ":".join(digits[pos:pos + 2] for pos in range(0, 12, 2))
+
+
+def macs_to_ints(texts):
+    """Return a list of MAC address strings as an unsigned 64-bit ``array``.
+
+    The whole list is converted at once, without a Python call per address.
+    See :py:func:`uint64_array` for platforms without 8-byte arrays.
+
+    Raises:
+        ValueError: An entry is not a MAC address.
+    """
+    texts = list(texts)
+    if not texts:
+        return uint64_array()
+    if (not all(issubclass(cls, STRING_TYPES)
+                for cls in set(map(type, texts))) or
+            set(map(len, texts)) != set([17]) or
+            "".join(texts).count(":") != 5 * len(texts)):
+        # Find the culprit for the error message.
+        for text in texts:
+            mac_to_int(text)
+        raise ValueError("Invalid MAC address in list")
+    # Pad each address to 8 bytes and read them as big-endian uint64s.
+    try:
+        data = binascii.unhexlify(
+            ("0000" + "0000".join(texts)).replace(":", "").encode("ascii"))
+    except (TypeError, ValueError):
+        raise ValueError("Invalid MAC address in list")
+    if UINT64 is None:
+        return list(struct.unpack(">{}Q".format(len(texts)), data))
+    values = array.array(UINT64)
+    if hasattr(values, "frombytes"):
+        values.frombytes(data)
+    else:
+        values.fromstring(data)
+    if sys.byteorder == "little":
+        values.byteswap()
+    return values
+
+
+def ints_to_macs(values):
+    """Return a list of Kismet MAC address strings for 48-bit integers."""
+    return [int_to_mac(value) for value in values]
+
+
+def parse_mask(entry):
+    """Return ``(value, mask)`` integers for a MAC or masked MAC group.
+
+    Args:
+        entry (str or int or tuple): ``AA:BB:CC:DD:EE:FF``,
+            ``AA:BB:CC:00:00:00/FF:FF:FF:00:00:00``, a 48-bit integer, or an
+            already parsed ``(value, mask)``.
+    """
+    if isinstance(entry, tuple):
+        value, mask = entry
+    elif isinstance(entry, STRING_TYPES):
+        mac, _, mask = entry.partition("/")
+        value = mac_to_int(mac)
+        mask = mac_to_int(mask) if mask else FULL_MASK
+    else:
+        value, mask = entry, FULL_MASK
+    return value & mask, mask
+
+
+def format_mask(entry):
+    """Return a MAC or ``(value, mask)`` in the form Kismet accepts."""
+    value, mask = parse_mask(entry)
+    if mask == FULL_MASK:
+        return int_to_mac(value)
+    return "{}/{}".format(int_to_mac(value), int_to_mac(mask))
+
+
+def oui_masks(ouis):
+    """Return a multimac ``devices`` list matching every OUI in ``ouis``.
+
+    Args:
+        ouis (iterable): OUIs as 24-bit integers or ``AA:BB:CC`` strings.
+    """
+    masks = []
+    for oui in sorted(set(parse_oui(oui) for oui in ouis)):
+        masks.append(format_mask((oui << 24, OUI_MASK)))
+    return masks
+
+
+def parse_oui(oui):
+    """Return an OUI given as ``AA:BB:CC``, ``AA-BB-CC``, ``AABBCC`` or int.
+
+    Raises:
+        ValueError: ``oui`` is not an OUI.
+    """
+    if not isinstance(oui, STRING_TYPES):
+        return int(oui) & 0xFFFFFF
+    digits = oui.replace(":", "").replace("-", "")
+    if len(digits) != 6:
+        raise ValueError("Invalid OUI: {!r}".format(oui))
+    return int(digits, 16)
+
+
+def ouis(values):
+    """Return the OUI (top 24 bits) of every 48-bit integer in ``values``."""
+    if hasattr(values, "dtype"):
+        return values >> 24
+    return uint64_array([value >> 24 for value in values])
+
+
+def group_masks(masks):
+    """Return ``{mask: set of masked values}`` for a list of mask entries.
+
+    Entries sharing a mask, such as a set of OUIs, are tested with a single
+    set lookup instead of one comparison each.
+    """
+    groups = {}
+    for entry in masks:
+        value, mask = parse_mask(entry)
+        groups.setdefault(mask, set()).add(value)
+    return groups
+
+
+def match_masks(values, masks):
+    """Test every 48-bit integer in ``values`` against a list of masks.
+
+    Args:
+        values (sequence): MACs as integers, or a numpy array of them.
+        masks (list): Entries accepted by :py:func:`parse_mask`; a value
+            matches if it matches any of them, as with Kismet's multimac.
+
+    Return:
+        list or numpy array: A boolean per value.
+    """
+    groups = group_masks(masks)
+    if hasattr(values, "dtype"):
+        import numpy
+        result = numpy.zeros(len(values), dtype=bool)
+        for mask, targets in groups.items():
+            result |= numpy.isin(values & mask, list(targets))
+        return result
+    groups = list(groups.items())
+    return [any(value & mask in targets for mask, targets in groups)
+            for value in values]
+
+
+def sort_macs(texts):
+    """Return MAC address strings sorted by their numeric value."""
+    texts = list(texts)
+    keys = macs_to_ints(texts)
+    return [texts[index] for index in
+            sorted(range(len(texts)), key=keys.__getitem__)]
+
+
+class OuiTable(object):
+    """Manufacturer names keyed by 24-bit integer OUI.
+
+    Load one from Kismet's ``kismet_manuf.txt.gz``, a Wireshark ``manuf``
+    file or the IEEE ``oui.txt`` with :py:meth:`load`, or build it from a
+    mapping::
+
+        table = kismet_rest.OuiTable.load("kismet_manuf.txt.gz")
+        names = table.lookup_many(frame["kismet.device.base.macaddr"])
+        acme = devices.by_mac(devices=table.masks_for("acme"))
+
+    Args:
+        names (dict): ``{oui: name}``, OUIs as integers or strings.
+    """
+
+    def __init__(self, names=None):
+        """Index ``names`` by integer OUI."""
+        self.names = {}
+        for oui, name in (names or {}).items():
+            self.names[parse_oui(oui)] = name
+
+    @classmethod
+    def load(cls, path):
+        """Return a table read from an OUI file, which may be gzipped.
+
+        Each line starts with an OUI (``AA:BB:CC``, ``AA-BB-CC`` or
+        ``AABBCC``) followed by whitespace and the name. Other lines, and
+        entries for longer prefixes, are skipped.
+        """
+        opener = gzip.open if path.endswith(".gz") else open
+        names = {}
+        with opener(path, "rb") as lines:
+            for line in lines:
+                fields = line.decode("utf-8", "replace").split(None, 1)
+                if len(fields) != 2 or fields[0].startswith("#"):
+                    continue
+                name = fields[1].strip()
+                if name.startswith("(hex)") or name.startswith("(base 16)"):
+                    name = name.split(")", 1)[1].strip()
+                try:
+                    oui = parse_oui(fields[0])
+                except ValueError:
+                    continue
+                names.setdefault(oui, name)
+        table = cls()
+        table.names = names
+        return table
+
+    def __len__(self):
+        """Return the number of OUIs."""
+        return len(self.names)
+
+    def lookup(self, mac, default=None):
+        """Return the manufacturer of a MAC given as a string or integer."""
+        if isinstance(mac, STRING_TYPES):
+            mac = mac_to_int(mac)
+        return self.names.get(int(mac) >> 24, default)
+
+    def lookup_many(self, values, default=None):
+        """Return the manufacturer of every 48-bit integer in ``values``."""
+        get = self.names.get
+        values = ouis(values)
+        if hasattr(values, "tolist"):
+            values = values.tolist()
+        return [get(oui, default) for oui in values]
+
+    def ouis_for(self, name):
+        """Return the OUIs whose manufacturer name contains ``name``.
+
+        The match ignores case.
+        """
+        name = name.lower()
+        return sorted(oui for oui, manuf in self.names.items()
+                      if name in manuf.lower())
+
+    def masks_for(self, name):
+        """Return a multimac ``devices`` list for a manufacturer name."""
+        return oui_masks(self.ouis_for(name))
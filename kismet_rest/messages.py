@@ -1,6 +1,8 @@
 """Messages abstraction."""
 
 from .base_interface import BaseInterface
+from .resumable import ResumableStream
+from .resumable import record_digest
 
 
 class Messages(BaseInterface):
@@ -21,6 +23,11 @@ class Messages(BaseInterface):
         Keyword args:
             ts_sec (int): Seconds since epoch for first message retrieved.
             ts_usec (int): Microseconds modifier for ts_sec query argument.
+            resume_attempts (int): Re-issue the request up to this many
+                times if the connection drops, skipping anything already
+                delivered. The message bus returns a single JSON document,
+                so an interrupted request is repeated from ``ts_sec``.
+                Defaults to 0 (fail immediately).
 
         Yield:
             dict: Message json, or None if callback is set.
@@ -30,8 +37,19 @@ class Messages(BaseInterface):
             callback_settings["callback"] = callback
             if callback_args:
                 callback_settings["callback_args"] = callback_args
+        resume_attempts = kwargs.pop("resume_attempts", 0)
         query_args = self.kwargs_defaults.copy()
         query_args.update(kwargs)
         url = self.url_template.format(**query_args)
+        if resume_attempts:
+            deadline_at = self.call_deadline()
+            stream = ResumableStream(
+                lambda position: self.interact_yield(
+                    "GET", url, deadline_at=deadline_at),
+                identity=record_digest, attempts=resume_attempts,
+                deadline_at=deadline_at)
+            for result in stream.deliver(callback, callback_args):
+                yield result
+            return
         for result in self.interact_yield("GET", url, **callback_settings):
             yield result
@@ -0,0 +1,221 @@
+"""Datasource health monitoring."""
+
+import array
+import collections
+import itertools
+import operator
+import time
+
+from .utility import Utility
+
+
+class DatasourceMonitor(object):
+    """Track packet and error rates of every datasource, and flag problems.
+
+    Each poll fetches only the handful of fields the monitor needs, so its
+    cost grows with the number of sources rather than the size of their
+    records. Every poll adds one row of counters, with a column per source,
+    to a fixed-size ring buffer. Rates over any window are computed a whole
+    row slice at a time, from the two rows bounding the window, without
+    walking the buffer. Sources missing from a poll are dropped.
+
+    Callbacks are called with the source UUID and a dict describing the
+    event:
+
+    * ``on_stall``: a running source received no packets for ``stall_after``
+      seconds. Called once per stall.
+    * ``on_recover``: a stalled source is receiving packets again.
+    * ``on_error``: a source reported an error, or its error packet count
+      went up.
+
+    Args:
+        datasources (Datasources): Endpoint used for polling.
+        history (int): Samples kept per source.
+        stall_after (float): Seconds without new packets before a running
+            source is considered stalled.
+        on_stall (function): Stall callback.
+        on_recover (function): Recovery callback.
+        on_error (function): Error callback.
+    """
+
+    fields = ["kismet.datasource.uuid",
+              "kismet.datasource.name",
+              "kismet.datasource.running",
+              "kismet.datasource.num_packets",
+              "kismet.datasource.num_error_packets",
+              "kismet.datasource.error",
+              "kismet.datasource.error_reason"]
+
+    def __init__(self, datasources, history=60, stall_after=30,
+                 on_stall=None, on_recover=None, on_error=None):
+        """Initialize with no samples."""
+        self.datasources = datasources
+        self.history = history
+        self.stall_after = stall_after
+        self.on_stall = on_stall
+        self.on_recover = on_recover
+        self.on_error = on_error
+        # One entry per poll; packet and error rows have a column per
+        # source, in the order the sources first appeared.
+        self.times = collections.deque(maxlen=history)
+        self.packets = collections.deque(maxlen=history)
+        self.errors = collections.deque(maxlen=history)
+        self.uuids = []
+        self.columns = {}
+        self.born = []
+        self.polls = 0
+        self.names = {}
+        self.last_packet = {}
+        self.stalled = set()
+        self.errored = set()
+
+    def poll(self, now=None):
+        """Sample every source once and fire any callbacks.
+
+        Args:
+            now (float): Sample time; defaults to the current time.
+
+        Return:
+            list: ``(event, uuid, details)`` tuples for events raised by this
+                poll, where event is ``stall``, ``recover`` or ``error``.
+        """
+        if now is None:
+            now = time.time()
+        sources = list(self.datasources.all(fields=self.fields))
+        present = set(source["kismet.datasource.uuid"] for source in sources)
+        for uuid in [uuid for uuid in self.uuids if uuid not in present]:
+            self.forget(uuid)
+        for uuid in sorted(present - set(self.columns)):
+            self.columns[uuid] = len(self.uuids)
+            self.uuids.append(uuid)
+            self.born.append(self.polls)
+            self.last_packet[uuid] = now
+        previous = (self.packets[-1], self.errors[-1]) if self.polls else None
+        packets = array.array("d", [0.0]) * len(self.uuids)
+        errors = array.array("d", [0.0]) * len(self.uuids)
+        self.times.append(now)
+        self.packets.append(packets)
+        self.errors.append(errors)
+        self.polls += 1
+        events = []
+        for source in sources:
+            events.extend(self.record(source, now, packets, errors,
+                                      previous))
+        for event, uuid, details in events:
+            callback = getattr(self, "on_{}".format(event))
+            if callback:
+                callback(uuid, details)
+        return events
+
+    def forget(self, uuid):
+        """Drop a source which is no longer reported, with its column."""
+        column = self.columns.pop(uuid)
+        del self.uuids[column]
+        del self.born[column]
+        for uuid_after in self.uuids[column:]:
+            self.columns[uuid_after] -= 1
+        for rows in (self.packets, self.errors):
+            for row in rows:
+                if len(row) > column:
+                    del row[column]
+        for state in (self.names, self.last_packet):
+            state.pop(uuid, None)
+        self.stalled.discard(uuid)
+        self.errored.discard(uuid)
+
+    def record(self, source, now, packet_row, error_row, previous):
+        """Add one source sample to the new rows; return its events."""
+        uuid = source["kismet.datasource.uuid"]
+        column = self.columns[uuid]
+        packets = source.get("kismet.datasource.num_packets", 0)
+        errors = source.get("kismet.datasource.num_error_packets", 0)
+        packet_row[column] = packets
+        error_row[column] = errors
+        self.names[uuid] = source.get("kismet.datasource.name", uuid)
+        if previous is not None and len(previous[0]) > column:
+            previous = (previous[0][column], previous[1][column])
+        else:
+            previous = None
+        events = []
+        details = {"name": self.names[uuid], "packets": packets,
+                   "errors": errors}
+        if previous is None or packets > previous[0]:
+            self.last_packet[uuid] = now
+            if uuid in self.stalled:
+                self.stalled.discard(uuid)
+                events.append(("recover", uuid, details))
+        elif (source.get("kismet.datasource.running") and
+              uuid not in self.stalled and
+              now - self.last_packet[uuid] >= self.stall_after):
+            self.stalled.add(uuid)
+            stall = dict(details, idle=now - self.last_packet[uuid])
+            events.append(("stall", uuid, stall))
+        reason = source.get("kismet.datasource.error_reason", "")
+        if source.get("kismet.datasource.error"):
+            if uuid not in self.errored:
+                self.errored.add(uuid)
+                events.append(("error", uuid, dict(details, reason=reason)))
+        else:
+            self.errored.discard(uuid)
+            if previous is not None and errors > previous[1]:
+                new_errors = errors - previous[1]
+                events.append(("error", uuid,
+                               dict(details, reason="error packets",
+                                    new_errors=int(new_errors))))
+        return events
+
+    def rates(self, window=None):
+        """Return packet and error rates per second for every source.
+
+        Sources which appeared at the same poll share a run of columns, so
+        each run is computed with one subtraction over row slices.
+
+        Args:
+            window (int): Number of most recent samples to span; defaults to
+                the whole ring buffer.
+
+        Return:
+            dict: ``{uuid: {"packets": rate, "errors": rate}}``. Sources with
+                fewer than two samples report rates of 0.
+        """
+        rows = len(self.times)
+        span = rows if window is None else max(1, min(window, rows))
+        first_poll = self.polls - span
+        packet_rates = array.array("d")
+        error_rates = array.array("d")
+        end = len(self.uuids)
+        while end:
+            # Columns born at or before the window's start share its first
+            # row; later ones start at the poll they first appeared in.
+            born = max(self.born[end - 1], first_poll)
+            start = end
+            while start and max(self.born[start - 1], first_poll) == born:
+                start -= 1
+            row = rows - (self.polls - born)
+            elapsed = float(self.times[-1] - self.times[row]) or 1.0
+            for rates, ring in ((packet_rates, self.packets),
+                                (error_rates, self.errors)):
+                deltas = map(operator.sub, ring[-1][start:end],
+                             ring[row][start:end])
+                # Bounded, as Python 2's map() pads to its longest input.
+                divisors = itertools.repeat(elapsed, end - start)
+                rates[0:0] = array.array("d", map(operator.truediv, deltas,
+                                                  divisors))
+            end = start
+        return {uuid: {"packets": packets, "errors": errors}
+                for uuid, packets, errors in zip(self.uuids, packet_rates,
+                                                 error_rates)}
+
+    def run(self, interval=5, iterations=None):
+        """Poll every ``interval`` seconds.
+
+        Args:
+            interval (float): Seconds between polls.
+            iterations (int): Stop after this many polls; None runs forever.
+
+        Yield:
+            dict: ``events`` and current ``rates`` after each poll.
+        """
+        return Utility.poll_loop(
+            lambda: {"events": self.poll(), "rates": self.rates()},
+            interval, iterations)
@@ -0,0 +1,490 @@
+"""Packet capture abstraction."""
+
+import os
+import struct
+import time
+
+from .base_interface import BaseInterface
+
+PCAPNG_SHB = 0x0A0D0D0A
+PCAPNG_IDB = 0x00000001
+PCAPNG_EPB = 0x00000006
+PCAPNG_LITTLE_ENDIAN_MAGIC = b"\x4d\x3c\x2b\x1a"
+PCAPNG_OPT_TSRESOL = 9
+
+
+class Packets(BaseInterface):
+    """Packet capture abstraction.
+
+    Kismet serves live packets as an endless pcapng stream, either for all
+    sources or filtered to one datasource or one device.
+    """
+
+    def url_for(self, uuid=None, device_key=None):
+        """Return the pcapng URL for all packets, a datasource or a device.
+
+        Args:
+            uuid (str): Only packets captured by this datasource.
+            device_key (str): Only packets involving this device.
+        """
+        if uuid and device_key:
+            raise ValueError("Filter by datasource or device, not both")
+        if uuid:
+            return "datasource/pcap/by-uuid/{}/packets.pcapng".format(uuid)
+        if device_key:
+            return "devices/pcap/by-key/{}/packets.pcapng".format(device_key)
+        return "pcap/all_packets.pcapng"
+
+    def stream(self, uuid=None, device_key=None, chunk_size=None):
+        """Yield the raw pcapng stream in chunks, as it arrives.
+
+        Args:
+            uuid (str): Only packets captured by this datasource.
+            device_key (str): Only packets involving this device.
+            chunk_size (int): Largest chunk to yield. None yields data as
+                soon as it is received.
+
+        Yield:
+            bytes: pcapng data.
+        """
+        url = self.url_for(uuid, device_key)
+        for chunk in self.interact_raw("GET", url, chunk_size=chunk_size):
+            yield chunk
+
+    def packets(self, uuid=None, device_key=None):
+        """Yield live packets, parsed incrementally.
+
+        Args:
+            uuid (str): Only packets captured by this datasource.
+            device_key (str): Only packets involving this device.
+
+        Yield:
+            Packet: One per Enhanced Packet Block.
+        """
+        for batch in self.batches(uuid, device_key):
+            for packet in batch:
+                yield packet
+
+    def batches(self, uuid=None, device_key=None, size=None):
+        """Yield live packets in lists, for processing several at a time.
+
+        Args:
+            uuid (str): Only packets captured by this datasource.
+            device_key (str): Only packets involving this device.
+            size (int): Packets per batch. None yields every packet parsed
+                from each received chunk as one batch, so no packet waits
+                for later data.
+
+        Yield:
+            list: :py:class:`Packet` objects.
+        """
+        parser = PcapngParser()
+        batch = []
+        for chunk in self.stream(uuid, device_key):
+            packets = parser.feed(chunk)
+            if size is None:
+                if packets:
+                    yield packets
+                continue
+            batch.extend(packets)
+            while len(batch) >= size:
+                yield batch[:size]
+                batch = batch[size:]
+        if batch:
+            yield batch
+
+    def capture(self, path, uuid=None, device_key=None, max_bytes=None,
+                max_seconds=None, rotate_bytes=None, rotate_seconds=None,
+                buffer_size=1048576):
+        """Save live packets to disk.
+
+        With no limits or rotation, received data is written straight to a
+        buffered file with no per-packet processing. When a limit or rotation
+        is set, pcapng block boundaries are tracked (reading only the 8-byte
+        block headers) so that every file ends on a whole block and each
+        rotated file starts with the section and interface headers it needs.
+
+        Rotated files are named by inserting a sequence number before the
+        extension of ``path``: ``capture-0000.pcapng``,
+        ``capture-0001.pcapng``...
+
+        Args:
+            path (str): Output file.
+            uuid (str): Only packets captured by this datasource.
+            device_key (str): Only packets involving this device.
+            max_bytes (int): Stop after writing this many bytes.
+            max_seconds (float): Stop after this many seconds.
+            rotate_bytes (int): Start a new file once one reaches this size.
+            rotate_seconds (float): Start a new file after this many seconds.
+            buffer_size (int): Size of file write buffers.
+
+        Return:
+            dict: ``files`` written, ``bytes``, ``packets`` (counted only
+                when tracking blocks, otherwise None), ``seconds`` and
+                ``rate`` in bytes per second.
+        """
+        writer = CaptureWriter(path, rotate_bytes, rotate_seconds,
+                               buffer_size)
+        track = any([max_bytes, max_seconds, rotate_bytes, rotate_seconds])
+        start = time.time()
+        chunks = self.stream(uuid, device_key)
+        try:
+            for chunk in chunks:
+                if track:
+                    writer.write_blocks(chunk)
+                else:
+                    writer.write(chunk)
+                if max_bytes and writer.total >= max_bytes:
+                    break
+                if max_seconds and time.time() - start >= max_seconds:
+                    break
+        finally:
+            chunks.close()
+            writer.close()
+        elapsed = time.time() - start
+        return {"files": writer.files,
+                "bytes": writer.total,
+                "packets": writer.packets if track else None,
+                "seconds": elapsed,
+                "rate": writer.total / elapsed if elapsed else 0.0}
+
+
+class CaptureWriter(object):
+    """Write a pcapng stream to one or more files."""
+
+    def __init__(self, path, rotate_bytes=None, rotate_seconds=None,
+                 buffer_size=1048576):
+        """Prepare to write ``path``; nothing is opened until data arrives."""
+        self.path = path
+        self.rotate_bytes = rotate_bytes
+        self.rotate_seconds = rotate_seconds
+        self.buffer_size = buffer_size
+        self.rotating = bool(rotate_bytes or rotate_seconds)
+        self.files = []
+        self.file = None
+        self.file_bytes = 0
+        self.file_packets = 0
+        self.file_start = None
+        self.total = 0
+        self.packets = 0
+        self.pending = bytearray()
+        self.headers = []
+        self.endian = "<"
+
+    def file_name(self):
+        """Return the name of the next file."""
+        if not self.rotating:
+            return self.path
+        base, ext = os.path.splitext(self.path)
+        return "{}-{:04d}{}".format(base, len(self.files), ext)
+
+    def open_next(self, headers=()):
+        """Close the current file and start the next one with ``headers``."""
+        if self.file is not None:
+            self.file.close()
+        name = self.file_name()
+        self.file = open(name, "wb", self.buffer_size)
+        self.files.append(name)
+        self.file_bytes = 0
+        self.file_packets = 0
+        self.file_start = time.time()
+        for header in headers:
+            self.file.write(header)
+            self.file_bytes += len(header)
+
+    def write(self, data):
+        """Write data to the current file."""
+        if self.file is None:
+            self.open_next()
+        self.file.write(data)
+        self.file_bytes += len(data)
+        self.total += len(data)
+
+    def rotation_due(self):
+        """Return True if the current file should be closed."""
+        if not self.rotating or self.file is None or not self.file_packets:
+            return False
+        if self.rotate_bytes and self.file_bytes >= self.rotate_bytes:
+            return True
+        return bool(self.rotate_seconds and
+                    time.time() - self.file_start >= self.rotate_seconds)
+
+    def write_blocks(self, chunk):
+        """Write every complete pcapng block, holding back a partial one.
+
+        Once the current file holds a packet and has reached the rotation
+        size or age, the next packet starts a new file.
+
+        Raises:
+            ValueError: A block has an invalid length. The blocks before it
+                are written first.
+        """
+        self.pending.extend(chunk)
+        view = memoryview(self.pending)
+        size = len(self.pending)
+        written = 0
+        offset = 0
+        corrupt = False
+        due = self.rotation_due()
+        try:
+            while offset + 8 <= size:
+                block_type, length = struct.unpack_from(self.endian + "II",
+                                                        self.pending, offset)
+                if block_type == PCAPNG_SHB:
+                    if offset + 12 > size:
+                        break
+                    magic = view[offset + 8:offset + 12].tobytes()
+                    self.endian = ("<" if magic == PCAPNG_LITTLE_ENDIAN_MAGIC
+                                   else ">")
+                    length = struct.unpack_from(self.endian + "I",
+                                                self.pending, offset + 4)[0]
+                if length < 12 or length % 4:
+                    corrupt = True
+                    break
+                if offset + length > size:
+                    break
+                if block_type == PCAPNG_SHB:
+                    self.headers = []
+                if block_type in (PCAPNG_SHB, PCAPNG_IDB):
+                    self.headers.append(
+                        view[offset:offset + length].tobytes())
+                elif due:
+                    self.write(view[written:offset])
+                    written = offset
+                    self.open_next(self.headers)
+                    due = False
+                if block_type == PCAPNG_EPB:
+                    self.packets += 1
+                    self.file_packets += 1
+                offset += length
+                due = due or bool(
+                    self.rotate_bytes and self.file_packets and
+                    self.file_bytes + offset - written >= self.rotate_bytes)
+            if offset > written:
+                self.write(view[written:offset])
+        finally:
+            # Python 2 memoryviews have no release(); there the buffer is
+            # unlocked once the last reference is gone.
+            if hasattr(view, "release"):
+                view.release()
+            del view
+        del self.pending[:offset]
+        if corrupt:
+            raise ValueError("Corrupt pcapng block at {}".format(self.total))
+
+    def close(self):
+        """Close the current file. Any partial trailing block is dropped."""
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+class Interface(object):
+    """Link type and timestamp resolution from an Interface Description."""
+
+    __slots__ = ("linktype", "snaplen", "ts_divisor")
+
+    def __init__(self, linktype, snaplen, ts_divisor=1000000):
+        """Describe an interface; timestamps default to microseconds."""
+        self.linktype = linktype
+        self.snaplen = snaplen
+        self.ts_divisor = ts_divisor
+
+
+class Packet(object):
+    """A packet from an Enhanced Packet Block.
+
+    Header fields are unpacked from the block only when read, and ``data``
+    is a memoryview into the received chunk, so a packet which is skipped
+    costs no decoding and no copying. Use ``packet.data.tobytes()`` to keep
+    the payload independently of the chunk.
+    """
+
+    __slots__ = ("buffer", "offset", "endian", "interfaces")
+
+    def __init__(self, buffer, offset, endian, interfaces):
+        """Wrap the block starting at ``offset`` in ``buffer``."""
+        self.buffer = buffer
+        self.offset = offset
+        self.endian = endian
+        self.interfaces = interfaces
+
+    def field(self, index):
+        """Return the 32-bit header word ``index`` of the block body."""
+        return struct.unpack_from(self.endian + "I", self.buffer,
+                                  self.offset + 8 + 4 * index)[0]
+
+    @property
+    def interface_id(self):
+        """Index of the capturing interface within the section."""
+        return self.field(0)
+
+    @property
+    def interface(self):
+        """Capturing :py:class:`Interface`, or None if it was not seen."""
+        interface_id = self.interface_id
+        if interface_id < len(self.interfaces):
+            return self.interfaces[interface_id]
+        return None
+
+    @property
+    def linktype(self):
+        """Link type of the capturing interface, or None."""
+        interface = self.interface
+        return interface.linktype if interface else None
+
+    @property
+    def timestamp_raw(self):
+        """Timestamp in units of the interface resolution."""
+        return self.field(1) << 32 | self.field(2)
+
+    @property
+    def timestamp(self):
+        """Timestamp in seconds since the epoch, as a float."""
+        interface = self.interface
+        divisor = interface.ts_divisor if interface else 1000000
+        return float(self.timestamp_raw) / divisor
+
+    @property
+    def captured_length(self):
+        """Number of payload bytes in the block."""
+        return self.field(3)
+
+    @property
+    def original_length(self):
+        """Length of the packet on the wire."""
+        return self.field(4)
+
+    @property
+    def data(self):
+        """Payload, as a memoryview."""
+        start = self.offset + 28
+        return self.buffer[start:start + self.captured_length]
+
+
+class PcapngParser(object):
+    """Split a pcapng byte stream into packets, chunk by chunk.
+
+    Complete blocks are sliced out of the received chunk without copying. A
+    block split across chunks is finished in a small buffer of its own,
+    taking only the bytes it still needs from the head of the next chunk;
+    the rest of that chunk is then parsed in place. Section headers set the
+    byte order and interface descriptions are tracked so packets can report
+    link type and scaled timestamps. Blocks other than packets, interfaces
+    and sections are skipped.
+    """
+
+    def __init__(self):
+        """Start before any section header."""
+        self.partial = bytearray()
+        self.endian = "<"
+        self.interfaces = []
+        self.blocks = 0
+
+    def feed(self, chunk):
+        """Parse the next chunk of the stream.
+
+        Args:
+            chunk (bytes): Stream data, continuing from the previous chunk.
+
+        Return:
+            list: :py:class:`Packet` for each packet completed by the chunk.
+        """
+        view = memoryview(chunk)
+        packets = []
+        offset = 0
+        if self.partial:
+            offset = self.finish_partial(view, packets)
+            if self.partial:
+                return packets
+        offset = self.parse_blocks(chunk, view, offset, packets)
+        self.partial = bytearray(view[offset:])
+        return packets
+
+    def finish_partial(self, view, packets):
+        """Complete the pending block from the head of ``view``.
+
+        Return:
+            int: Offset in ``view`` of the first byte after the block. The
+                block stays in ``partial`` if ``view`` did not complete it.
+        """
+        taken = max(0, min(12 - len(self.partial), len(view)))
+        self.partial += view[:taken].tobytes()
+        if len(self.partial) < 12:
+            return taken
+        length = self.block_length(bytes(self.partial[:12]), 0)
+        needed = min(length - len(self.partial), len(view) - taken)
+        self.partial += view[taken:taken + needed].tobytes()
+        taken += needed
+        if len(self.partial) == length:
+            block = bytes(self.partial)
+            self.partial = bytearray()
+            self.parse_blocks(block, memoryview(block), 0, packets)
+        return taken
+
+    def block_length(self, buffer, offset):
+        """Return the length of the block at ``offset``.
+
+        A section header sets the byte order first, as its length is written
+        in the section's byte order.
+
+        Raises:
+            ValueError: The length is not a valid block length.
+        """
+        block_type, length = struct.unpack_from(self.endian + "II", buffer,
+                                                offset)
+        if block_type == PCAPNG_SHB:
+            magic = bytes(buffer[offset + 8:offset + 12])
+            self.endian = ("<" if magic == PCAPNG_LITTLE_ENDIAN_MAGIC
+                           else ">")
+            length = struct.unpack_from(self.endian + "I", buffer,
+                                        offset + 4)[0]
+        if length < 12 or length % 4:
+            raise ValueError("Corrupt pcapng block at {}".format(offset))
+        return length
+
+    def parse_blocks(self, buffer, view, offset, packets):
+        """Parse the complete blocks of ``buffer`` from ``offset`` on.
+
+        Return:
+            int: Offset of the first incomplete block.
+        """
+        size = len(view)
+        while offset + 12 <= size:
+            length = self.block_length(buffer, offset)
+            if offset + length > size:
+                break
+            block_type = struct.unpack_from(self.endian + "I", buffer,
+                                            offset)[0]
+            self.blocks += 1
+            if block_type == PCAPNG_SHB:
+                self.interfaces = []
+            elif block_type == PCAPNG_IDB:
+                self.interfaces.append(self.parse_interface(buffer, offset,
+                                                            length))
+            elif block_type == PCAPNG_EPB:
+                packets.append(Packet(view, offset, self.endian,
+                                      self.interfaces))
+            offset += length
+        return offset
+
+    def parse_interface(self, buffer, offset, length):
+        """Return the :py:class:`Interface` of the IDB at ``offset``."""
+        linktype, _, snaplen = struct.unpack_from(self.endian + "HHI",
+                                                  buffer, offset + 8)
+        ts_divisor = 1000000
+        option = offset + 16
+        end = offset + length - 4
+        while option + 4 <= end:
+            code, option_length = struct.unpack_from(self.endian + "HH",
+                                                     buffer, option)
+            if code == 0:
+                break
+            if code == PCAPNG_OPT_TSRESOL and option_length >= 1:
+                resolution = bytearray(buffer[option + 4:option + 5])[0]
+                if resolution & 0x80:
+                    ts_divisor = 2 ** (resolution & 0x7f)
+                else:
+                    ts_divisor = 10 ** resolution
+            option += 4 + (option_length + 3) // 4 * 4
+        return Interface(linktype, snaplen, ts_divisor)
@@ -0,0 +1,128 @@
+"""Decode large streamed responses on several processes."""
+
+import collections
+import json
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import wait
+
+from .query import get_field
+
+
+def line_chunks(content, chunk_bytes=1048576):
+    """Regroup a byte stream into chunks which end on a line boundary.
+
+    Only the tail of each chunk is searched for the last newline, so the
+    network thread does no per-line work.
+
+    Args:
+        content (iterable): Byte strings, as read from the response.
+        chunk_bytes (int): Approximate size of each chunk.
+
+    Yield:
+        bytes: One or more complete lines.
+    """
+    parts = []
+    size = 0
+    for data in content:
+        parts.append(data)
+        size += len(data)
+        if size < chunk_bytes:
+            continue
+        joined = b"".join(parts)
+        cut = joined.rfind(b"\n")
+        if cut < 0:
+            parts = [joined]
+            continue
+        yield joined[:cut + 1]
+        rest = joined[cut + 1:]
+        parts = [rest] if rest else []
+        size = len(rest)
+    rest = b"".join(parts)
+    if rest.strip():
+        yield rest
+
+
+def decode_chunk(chunk, transform=None):
+    """Decode every JSON line in a chunk; run in a worker process.
+
+    Args:
+        chunk (bytes): Complete ``.itjson`` lines.
+        transform (function): Called with the list of records, returns the
+            list to send back. Must be picklable.
+    """
+    records = [json.loads(line.decode("utf-8"))
+               for line in chunk.split(b"\n") if line.strip()]
+    if transform is not None:
+        return transform(records)
+    return records
+
+
+class ChunkTransform(object):
+    """Filter and project records in the worker, before they are returned.
+
+    Returning fewer, smaller records also cuts the cost of sending them back
+    to the calling process.
+
+    Args:
+        where (Filter): Keep only records matching this
+            :py:class:`kismet_rest.query.Filter`.
+        fields (list): Field paths to keep, as ``{path: value}``.
+    """
+
+    def __init__(self, where=None, fields=None):
+        """Keep the filter and projection."""
+        self.where = where
+        self.fields = fields
+
+    def __call__(self, records):
+        """Return the filtered, projected records."""
+        if self.where is not None:
+            records = [record for record in records if self.where(record)]
+        if self.fields:
+            records = [{path: get_field(record, path)
+                        for path in self.fields} for record in records]
+        return records
+
+
+def decode_parallel(chunks, executor, transform=None, ordered=True,
+                    window=None):
+    """Decode chunks on an executor, yielding each chunk's results.
+
+    At most ``window`` chunks are queued or decoding at once, so a fast
+    network cannot buffer the whole response in memory.
+
+    Args:
+        chunks (iterable): Line-aligned chunks, see :py:func:`line_chunks`.
+        executor (Executor): Usually a ``ProcessPoolExecutor``.
+        transform (function): See :py:func:`decode_chunk`.
+        ordered (bool): Yield results in stream order if True, otherwise as
+            soon as each chunk is decoded.
+        window (int): Chunks in flight; defaults to 8.
+
+    Yield:
+        list: The (transformed) records of one chunk.
+    """
+    window = window or 8
+    pending = collections.deque()
+    try:
+        for chunk in chunks:
+            pending.append(executor.submit(decode_chunk, chunk, transform))
+            while len(pending) >= window:
+                for result in take_done(pending, ordered):
+                    yield result
+        while pending:
+            for result in take_done(pending, ordered):
+                yield result
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def take_done(pending, ordered):
+    """Remove and return results from ``pending``, waiting if needed."""
+    if ordered:
+        return [pending.popleft().result()]
+    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+    for future in done:
+        pending.remove(future)
+    return [future.result() for future in done]
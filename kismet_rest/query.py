@@ -0,0 +1,387 @@
+"""Streaming queries over device records."""
+
+import heapq
+import itertools
+import operator
+import re
+
+try:
+    STRING_TYPES = (basestring,)  # NOQA
+except NameError:
+    STRING_TYPES = (str,)
+
+OPERATORS = {"==": operator.eq,
+             "!=": operator.ne,
+             "<": operator.lt,
+             "<=": operator.le,
+             ">": operator.gt,
+             ">=": operator.ge}
+
+FIELD_PATH_RX = re.compile(r"^[A-Za-z0-9_.\-]+(/[A-Za-z0-9_.\-]+)*$")
+
+
+def validate_path(path):
+    """Raise ValueError unless ``path`` is a well-formed Kismet field path."""
+    if not isinstance(path, STRING_TYPES) or not FIELD_PATH_RX.match(path):
+        raise ValueError("Invalid field path: {!r}".format(path))
+    return path
+
+
+def validate_regex(spec):
+    """Check a Kismet regex filter before it is sent.
+
+    Args:
+        spec (list or Filter): ``[[multifield, regex], ...]``, see
+            :py:mod:`kismet_rest.legacy`, or a :py:class:`Filter` which
+            Kismet can evaluate (see :py:func:`plan`). An empty list or
+            None means no filter.
+
+    Return:
+        list: The regex filter to send, or None for no filter.
+
+    Raises:
+        ValueError: ``spec`` is not a list of ``[path, regex]`` pairs, a
+            path is malformed, or a filter cannot be sent as a regex.
+    """
+    if isinstance(spec, Filter):
+        regex = spec.server_regex()
+        if not regex:
+            raise ValueError("Filter cannot be sent as a regex filter")
+        return regex
+    if spec is None:
+        return None
+    if not isinstance(spec, (list, tuple)):
+        raise ValueError("Regex filter must be a list")
+    for entry in spec:
+        if (not isinstance(entry, (list, tuple)) or len(entry) != 2 or
+                not isinstance(entry[1], STRING_TYPES)):
+            raise ValueError("Invalid regex filter entry: {!r}".format(entry))
+        validate_path(entry[0])
+    return spec or None
+
+
+def get_field(record, path, default=None):
+    """Return the value of a Kismet field path in a record.
+
+    The path is looked up as-is first, which finds fields requested with
+    :py:func:`field_spec`. Otherwise each ``/``-separated component is looked
+    up in turn, which finds nested fields in full device records.
+
+    Args:
+        record (dict): Device or other Kismet record.
+        path (str): Field path, e.g.
+            ``kismet.device.base.signal/kismet.common.signal.last_signal``.
+        default: Returned if the field is missing.
+    """
+    if path in record:
+        return record[path]
+    value = record
+    for component in path.split("/"):
+        try:
+            value = value[component]
+        except (KeyError, TypeError, IndexError):
+            return default
+    return value
+
+
+def field_spec(path):
+    """Return a ``fields`` entry which returns ``path`` under its own name.
+
+    Kismet names a simplified field after the last component of its path;
+    aliasing it to the whole path keeps nested fields with the same name
+    apart and lets :py:func:`get_field` find it directly.
+    """
+    return [path, path]
+
+
+def compile_conditions(conditions):
+    """Return a predicate testing a record against every condition.
+
+    Args:
+        conditions (list or Filter): ``(path, op, value)`` tuples, where op
+            is one of ``==``, ``!=``, ``<``, ``<=``, ``>`` or ``>=``, which
+            must all hold; or a :py:class:`Filter` expression. Records
+            missing a field never match a condition on it.
+
+    Return:
+        Filter: Called with a record, returns True if it matches.
+    """
+    if isinstance(conditions, Filter):
+        return conditions
+    return And([Compare(*condition) for condition in conditions])
+
+
+def plan(where, pushdown=True):
+    """Split a filter into a server-side regex and a local remainder.
+
+    A :py:class:`Match`, a string equality, or an OR of those, is sent to
+    Kismet as a regex filter and not re-checked locally. Kismet ORs the
+    entries of a regex filter, so for an AND only the part with the fewest
+    alternatives is sent, and the other parts are tested on each returned
+    record.
+
+    Args:
+        where (Filter): Filter expression.
+        pushdown (bool): If False, evaluate everything locally, e.g. when
+            the request already carries a regex filter.
+
+    Return:
+        tuple: ``(regex, local)``, where ``regex`` is a Kismet regex filter
+            or None, and ``local`` is a :py:class:`Filter` or None.
+    """
+    if not pushdown:
+        return None, where
+    spec = where.server_regex()
+    if spec:
+        return spec, None
+    if not isinstance(where, And):
+        return None, where
+    candidates = [(len(part.server_regex()), index)
+                  for index, part in enumerate(where.parts)
+                  if part.server_regex()]
+    if not candidates:
+        return None, where
+    index = min(candidates)[1]
+    rest = where.parts[:index] + where.parts[index + 1:]
+    local = rest[0] if len(rest) == 1 else (And(rest) if rest else None)
+    return where.parts[index].server_regex(), local
+
+
+class Filter(object):
+    """Filter expression over Kismet records.
+
+    Build filters with :py:class:`Field` and combine them with ``&`` and
+    ``|``. A filter is callable, returning True for matching records.
+    """
+
+    def __and__(self, other):
+        """Return a filter matching both."""
+        return And([self, other])
+
+    def __or__(self, other):
+        """Return a filter matching either."""
+        return Or([self, other])
+
+    def __call__(self, record):
+        """Return True if ``record`` matches."""
+        raise NotImplementedError
+
+    def paths(self):
+        """Return the field paths evaluated locally."""
+        raise NotImplementedError
+
+    def server_regex(self):
+        """Return an equivalent Kismet regex filter, or None."""
+        return None
+
+
+class Field(object):
+    """A Kismet field path, for building filters::
+
+        signal = Field("kismet.device.base.signal/"
+                       "kismet.common.signal.last_signal")
+        ssid = Field("dot11.device/dot11.device.last_beaconed_ssid_record/"
+                     "dot11.advertisedssid.ssid")
+        where = ssid.matches("^Corp") & (signal > -60)
+
+    Raises:
+        ValueError: The path is malformed.
+    """
+
+    __hash__ = None
+
+    def __init__(self, path):
+        """Validate and keep the path."""
+        self.path = validate_path(path)
+
+    def matches(self, pattern):
+        """Return a filter matching values which contain ``pattern``."""
+        return Match(self.path, pattern)
+
+    def __eq__(self, value):
+        """Return an equality filter."""
+        return Compare(self.path, "==", value)
+
+    def __ne__(self, value):
+        """Return an inequality filter."""
+        return Compare(self.path, "!=", value)
+
+    def __lt__(self, value):
+        """Return a less-than filter."""
+        return Compare(self.path, "<", value)
+
+    def __le__(self, value):
+        """Return a less-than-or-equal filter."""
+        return Compare(self.path, "<=", value)
+
+    def __gt__(self, value):
+        """Return a greater-than filter."""
+        return Compare(self.path, ">", value)
+
+    def __ge__(self, value):
+        """Return a greater-than-or-equal filter."""
+        return Compare(self.path, ">=", value)
+
+
+class Compare(Filter):
+    """Compare a field with a value. String equality can be pushed down."""
+
+    def __init__(self, path, op, value):
+        """Validate the path and operator."""
+        if op not in OPERATORS:
+            raise ValueError("Unsupported operator: {}".format(op))
+        self.path = validate_path(path)
+        self.op = op
+        self.compare = OPERATORS[op]
+        self.value = value
+
+    def __call__(self, record):
+        """Return True if the field is present and compares true."""
+        found = get_field(record, self.path)
+        if found is None:
+            return False
+        try:
+            return bool(self.compare(found, self.value))
+        except TypeError:
+            return False
+
+    def paths(self):
+        """Return the compared path."""
+        return [self.path]
+
+    def server_regex(self):
+        """Return an anchored regex for string equality, else None."""
+        if self.op == "==" and isinstance(self.value, STRING_TYPES):
+            return [[self.path, "^{}$".format(re.escape(self.value))]]
+        return None
+
+
+class Match(Filter):
+    """Search a field for a regular expression.
+
+    Locally, a map or list value matches if any of its values does, like
+    Kismet's multifield expansion one level deep.
+    """
+
+    def __init__(self, path, pattern):
+        """Validate the path and compile the pattern.
+
+        Raises:
+            ValueError: The path or pattern is malformed.
+        """
+        self.path = validate_path(path)
+        self.pattern = pattern
+        try:
+            self.regex = re.compile(pattern)
+        except (re.error, TypeError) as err:
+            raise ValueError("Invalid regex {!r}: {}".format(pattern, err))
+
+    def __call__(self, record):
+        """Return True if the field, or any value in it, matches."""
+        found = get_field(record, self.path)
+        if isinstance(found, dict):
+            values = found.values()
+        elif isinstance(found, list):
+            values = found
+        else:
+            values = [found]
+        return any(self.regex.search(u"{}".format(value))
+                   for value in values if value is not None)
+
+    def paths(self):
+        """Return the searched path."""
+        return [self.path]
+
+    def server_regex(self):
+        """Return the equivalent Kismet regex filter."""
+        return [[self.path, self.pattern]]
+
+
+class And(Filter):
+    """Match records matching every part."""
+
+    def __init__(self, parts):
+        """Combine parts, flattening nested ANDs."""
+        self.parts = []
+        for part in parts:
+            self.parts.extend(part.parts if isinstance(part, And) else [part])
+
+    def __call__(self, record):
+        """Return True if every part matches."""
+        return all(part(record) for part in self.parts)
+
+    def paths(self):
+        """Return the paths of every part."""
+        return unique_paths(self.parts)
+
+
+class Or(Filter):
+    """Match records matching any part."""
+
+    def __init__(self, parts):
+        """Combine parts, flattening nested ORs."""
+        self.parts = []
+        for part in parts:
+            self.parts.extend(part.parts if isinstance(part, Or) else [part])
+
+    def __call__(self, record):
+        """Return True if any part matches."""
+        return any(part(record) for part in self.parts)
+
+    def paths(self):
+        """Return the paths of every part."""
+        return unique_paths(self.parts)
+
+    def server_regex(self):
+        """Return all parts' regex filters, if every part has one."""
+        spec = []
+        for part in self.parts:
+            part_spec = part.server_regex()
+            if not part_spec:
+                return None
+            spec.extend(part_spec)
+        return spec
+
+
+def unique_paths(parts):
+    """Return the paths of several filters, in order, without repeats."""
+    paths = []
+    for part in parts:
+        for path in part.paths():
+            if path not in paths:
+                paths.append(path)
+    return paths
+
+
+def top_n(records, count, key, largest=True):
+    """Return the ``count`` records with the largest (or smallest) values.
+
+    Records are consumed one at a time and at most ``count`` are held, in a
+    heap, so the input can be an unbounded stream. Records whose key is None
+    are skipped.
+
+    Args:
+        records (iterable): Records to rank.
+        count (int): Number of records to keep.
+        key (function): Return the numeric ranking value of a record.
+        largest (bool): Keep the largest keys if True, else the smallest.
+
+    Return:
+        list: Up to ``count`` records, best first.
+    """
+    if count <= 0:
+        return []
+    sign = 1 if largest else -1
+    heap = []
+    # The counter breaks ties so records themselves are never compared.
+    counter = itertools.count()
+    for record in records:
+        value = key(record)
+        if value is None:
+            continue
+        entry = (sign * value, -next(counter), record)
+        if len(heap) < count:
+            heapq.heappush(heap, entry)
+        elif entry > heap[0]:
+            heapq.heapreplace(heap, entry)
+    return [entry[2] for entry in sorted(heap, reverse=True)]
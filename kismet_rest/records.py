@@ -0,0 +1,98 @@
+"""Records decoded on first use."""
+
+import json
+
+try:
+    from collections.abc import MutableMapping
+except ImportError:
+    from collections import MutableMapping
+
+
+class LazyRecord(MutableMapping):
+    """A streamed JSON object which is only decoded when it is read.
+
+    The raw ``.itjson`` line is kept until a key is accessed, at which point
+    the whole object is decoded once and the raw line released. Records
+    which are counted, filtered on by position, forwarded with :py:attr:`raw`
+    or dropped unread are never decoded.
+
+    Records behave as dicts for reading and writing. Use :py:meth:`decode`
+    (or ``dict(record)``) where a real ``dict`` is needed, for example before
+    ``json.dumps``.
+
+    Args:
+        raw (bytes): One JSON object.
+    """
+
+    __slots__ = ("_raw", "_data")
+
+    def __init__(self, raw):
+        """Hold ``raw`` undecoded."""
+        self._raw = raw
+        self._data = None
+
+    @property
+    def raw(self):
+        """The undecoded JSON, or None once the record has been decoded."""
+        return self._raw
+
+    @property
+    def decoded(self):
+        """True once the JSON has been decoded."""
+        return self._data is not None
+
+    def decode(self):
+        """Decode now if needed, and return the underlying dict."""
+        if self._data is None:
+            raw = self._raw
+            if isinstance(raw, (bytes, bytearray)):
+                raw = raw.decode("utf-8")
+            self._data = json.loads(raw)
+            self._raw = None
+        return self._data
+
+    def __getitem__(self, key):
+        """Return ``key``, decoding the record first if needed."""
+        return self.decode()[key]
+
+    def __setitem__(self, key, value):
+        """Set ``key``, decoding the record first if needed."""
+        self.decode()[key] = value
+
+    def __delitem__(self, key):
+        """Remove ``key``, decoding the record first if needed."""
+        del self.decode()[key]
+
+    def __iter__(self):
+        """Iterate keys, decoding the record first if needed."""
+        return iter(self.decode())
+
+    def __len__(self):
+        """Return the number of keys, decoding the record first if needed."""
+        return len(self.decode())
+
+    def get(self, key, default=None):
+        """Return ``key`` if present, else ``default``."""
+        return self.decode().get(key, default)
+
+    def __contains__(self, key):
+        """Return True if ``key`` is present."""
+        return key in self.decode()
+
+    def __eq__(self, other):
+        """Compare as a dict."""
+        if isinstance(other, LazyRecord):
+            other = other.decode()
+        return self.decode() == other
+
+    def __ne__(self, other):
+        """Compare as a dict."""
+        return not self == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        """Show the raw JSON until the record is decoded."""
+        if self._data is None:
+            return "LazyRecord({!r})".format(self._raw)
+        return "LazyRecord({!r})".format(self._data)
@@ -0,0 +1,149 @@
+"""Resume streamed responses after the connection drops."""
+
+import json
+import time
+
+from .exceptions import KismetCircuitOpenError
+from .exceptions import KismetConnectionError
+from .exceptions import KismetTimeoutError
+from .logger import Logger
+from .records import LazyRecord
+
+
+def record_digest(record):
+    """Return a hashable identity for a record with no natural key."""
+    if isinstance(record, LazyRecord):
+        if record.raw is not None:
+            return hash(record.raw)
+        record = record.decode()
+    return hash(json.dumps(record, sort_keys=True))
+
+
+class ResumableStream(object):
+    """Iterate a streaming request, re-issuing it when the connection fails.
+
+    ``open_stream`` is called with the last position delivered (None for the
+    first request) and must return an iterator of records starting at or
+    before that position. Records which were already delivered before the
+    failure are suppressed, so the caller sees every record exactly once.
+
+    Two dedup strategies are supported:
+
+    * With a ``cursor``, positions are assumed not to decrease along the
+      stream (e.g. alert timestamps). Only the records at the latest
+      position are remembered, and their identities are computed only when
+      a resume happens. The replay then skips records at earlier positions
+      and records of that overlap window which were already delivered, and
+      dedup stops once it moves past the window.
+    * Without a ``cursor`` the stream is restarted from the beginning, so
+      the identity of every delivered record is remembered and memory grows
+      with the number of records (e.g. device keys). They are only looked
+      up after a resume.
+
+    Timeouts and requests failed fast by a circuit breaker are raised
+    rather than retried, and no retry starts after ``deadline_at``.
+
+    Args:
+        open_stream (function): Return an iterator of records, given the
+            resume position.
+        identity (function): Return a hashable identity for a record.
+        cursor (function): Return the position of a record, or None.
+        attempts (int): Consecutive failures tolerated without progress.
+        backoff (float): Seconds to wait before the first retry, doubled for
+            each consecutive failure.
+        deadline_at (float): Absolute time after which no retry is made.
+    """
+
+    def __init__(self, open_stream, identity, cursor=None, attempts=3,
+                 backoff=1.0, deadline_at=None):
+        """Initialize with no records delivered."""
+        self.open_stream = open_stream
+        self.identity = identity
+        self.cursor = cursor
+        self.attempts = attempts
+        self.backoff = backoff
+        self.deadline_at = deadline_at
+        self.logger = Logger()
+        self.position = None
+        self.boundary = []
+        self.seen = set()
+        self.replaying = False
+        self.resumes = 0
+        self.duplicates = 0
+
+    def __iter__(self):
+        """Yield each record once, resuming on connection errors."""
+        failures = 0
+        while True:
+            try:
+                for record in self.open_stream(self.position):
+                    if self.is_duplicate(record):
+                        self.duplicates += 1
+                        continue
+                    failures = 0
+                    yield record
+                return
+            except (KismetTimeoutError, KismetCircuitOpenError):
+                raise
+            except KismetConnectionError as err:
+                failures += 1
+                if failures > self.attempts:
+                    raise
+                delay = self.backoff * 2 ** (failures - 1)
+                if (self.deadline_at is not None and
+                        time.time() + delay >= self.deadline_at):
+                    msg = "Deadline exceeded resuming stream: {}"
+                    raise KismetTimeoutError(msg.format(err))
+                self.resumes += 1
+                self.start_replay()
+                msg = "Stream interrupted ({}), resuming from {} in {}s"
+                self.logger.warn(msg.format(err, self.position, delay))
+                time.sleep(delay)
+
+    def deliver(self, callback=None, callback_args=None):
+        """Yield records, or pass them to ``callback`` and yield nothing."""
+        for record in self:
+            if callback is None:
+                yield record
+            elif callback_args:
+                callback(record, *callback_args)
+            else:
+                callback(record)
+
+    def start_replay(self):
+        """Prepare to skip records the resumed request repeats."""
+        if self.cursor:
+            self.seen = set(self.identity(record)
+                            for record in self.boundary)
+        self.replaying = True
+
+    def is_duplicate(self, record):
+        """Return True if ``record`` was already delivered, else note it."""
+        position = self.cursor(record) if self.cursor else None
+        if position is None:
+            ident = self.identity(record)
+            if self.replaying and ident in self.seen:
+                return True
+            self.seen.add(ident)
+            return False
+        if self.position is None or position > self.position:
+            # Past the overlap window, so nothing more can repeat.
+            self.position = position
+            self.boundary = [record]
+            if self.replaying:
+                self.replaying = False
+                self.seen = set()
+            return False
+        if not self.replaying:
+            if position == self.position:
+                self.boundary.append(record)
+            return False
+        if position < self.position:
+            # Only a replay after a resume can move backwards.
+            return True
+        ident = self.identity(record)
+        if ident in self.seen:
+            return True
+        self.seen.add(ident)
+        self.boundary.append(record)
+        return False
@@ -0,0 +1,123 @@
+"""Detect changes between successive sweeps of the device list."""
+
+import hashlib
+import json
+
+from .query import field_spec
+from .query import get_field
+from .query import validate_path
+
+DIGEST_SIZE = 8
+
+
+def field_digest(value):
+    """Return a short, process-independent digest of a JSON value."""
+    encoded = json.dumps(value, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha1(encoded.encode("utf-8")).digest()[:DIGEST_SIZE]
+
+
+class SnapshotDiff(object):
+    """Compare each device sweep with the previous one.
+
+    Only the device key and an 8-byte digest per watched field are kept
+    between sweeps, so memory is proportional to the number of devices, not
+    the size of their records, and each sweep is compared in a single pass
+    as the devices stream in. Events are yielded as dicts:
+
+    * ``added``: a device not in the previous sweep.
+    * ``changed``: one or more watched fields differ; ``fields`` lists them.
+    * ``removed``: a device from the previous sweep which is gone. Removals
+      are only known once the sweep is complete, so they come last.
+
+    Every device is ``added`` in the first sweep.
+
+    Args:
+        fields (list): Field paths to watch, e.g. the channel, crypt set and
+            ``dot11.device/dot11.device.last_beaconed_ssid_record/``
+            ``dot11.advertisedssid.ssid``.
+        key_field (str): Field identifying a device.
+    """
+
+    def __init__(self, fields, key_field="kismet.device.base.key"):
+        """Start with no previous sweep."""
+        self.fields = [validate_path(path) for path in fields]
+        self.key_field = key_field
+        self.state = {}
+        self.sweeps = 0
+
+    def request_fields(self):
+        """Return the ``fields`` list to request devices with."""
+        return [self.key_field] + [field_spec(path) for path in self.fields]
+
+    def digest(self, record):
+        """Return the concatenated field digests of a record."""
+        return b"".join(field_digest(get_field(record, path))
+                        for path in self.fields)
+
+    def changed_fields(self, old, new):
+        """Return the watched fields whose digests differ."""
+        return [path for index, path in enumerate(self.fields)
+                if old[index * DIGEST_SIZE:(index + 1) * DIGEST_SIZE] !=
+                new[index * DIGEST_SIZE:(index + 1) * DIGEST_SIZE]]
+
+    def update(self, records):
+        """Compare a complete sweep with the previous one.
+
+        The sweep only becomes the baseline for the next comparison once
+        ``records`` is exhausted.
+
+        Args:
+            records (iterable): Every current device, with the key and
+                watched fields.
+
+        Yield:
+            dict: ``event``, ``key``, ``device`` (None when removed) and
+                ``fields`` (changed fields, for ``changed`` events).
+        """
+        previous = self.state
+        current = {}
+        for record in records:
+            key = record[self.key_field]
+            digest = self.digest(record)
+            current[key] = digest
+            old = previous.get(key)
+            if old is None:
+                yield {"event": "added", "key": key, "device": record,
+                       "fields": []}
+            elif old != digest:
+                yield {"event": "changed", "key": key, "device": record,
+                       "fields": self.changed_fields(old, digest)}
+        for key in previous:
+            if key not in current:
+                yield {"event": "removed", "key": key, "device": None,
+                       "fields": []}
+        self.state = current
+        self.sweeps += 1
+
+    def sweep(self, devices, **kwargs):
+        """Fetch every device and yield the changes since the last sweep.
+
+        Args:
+            devices (Devices): Endpoint used to list devices.
+
+        Keyword Args:
+            Passed to :py:meth:`kismet_rest.Devices.all`, e.g. ``regex``.
+                ``fields`` are requested as well as the watched fields.
+                ``ts`` is not allowed: devices left out of a partial sweep
+                would be reported as removed.
+
+        Yield:
+            dict: As for :py:meth:`update`.
+
+        Raises:
+            ValueError: ``ts`` was given.
+        """
+        if "ts" in kwargs:
+            raise ValueError("A sweep must list every device; ts is not "
+                             "allowed")
+        fields = self.request_fields()
+        fields += [spec for spec in kwargs.pop("fields", None) or []
+                   if spec not in fields]
+        records = devices.all(fields=fields, **kwargs)
+        for event in self.update(records):
+            yield event
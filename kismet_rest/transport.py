@@ -0,0 +1,648 @@
+"""HTTP transports. BaseInterface performs all network I/O through these.
+
+A transport owns the connection pool, authentication and cookies for one
+client, and returns :py:class:`TransportResponse` objects so the rest of the
+library does not depend on any particular HTTP library.
+
+HTTP libraries are imported when a transport is built rather than when this
+module is imported, to keep ``import kismet_rest`` cheap.
+"""
+
+import json
+import sys
+import zlib
+
+from .exceptions import KismetConnectionError
+from .exceptions import KismetTimeoutError
+
+if sys.version_info[0] < 3:
+    from urlparse import urlparse
+else:
+    from urllib.parse import urlparse
+
+# Content encodings decoded with zlib rather than urllib3's decoders, which
+# are private and lack flush() before urllib3 2.0.
+ZLIB_ENCODINGS = ("gzip", "x-gzip", "deflate")
+
+
+def split_lines(chunks):
+    """Yield newline-delimited lines, as bytes, from an iterable of chunks.
+
+    Each chunk is split in one pass, so every line is copied exactly once,
+    and chunks are never joined together. Only a line spanning chunks is
+    gathered, in a bytearray which is reused for every such line.
+    """
+    pending = bytearray()
+    for chunk in chunks:
+        lines = chunk.split(b"\n")
+        tail = lines.pop()
+        if pending:
+            if not lines:
+                pending += tail
+                continue
+            pending += lines[0]
+            lines[0] = bytes(pending)
+            del pending[:]
+        if b"\r" in chunk or (lines and lines[0].endswith(b"\r")):
+            lines = [line[:-1] if line.endswith(b"\r") else line
+                     for line in lines]
+        for line in lines:
+            yield line
+        if tail:
+            pending += tail
+    if pending:
+        if pending.endswith(b"\r"):
+            del pending[-1:]
+        yield bytes(pending)
+
+
+def find_cookie(jar, name, domain=None):
+    """Return the value of cookie ``name`` in a cookielib jar, or None.
+
+    Args:
+        jar (CookieJar): Cookies of a requests session or httpx client.
+        name (str): Cookie name.
+        domain (str): Host name the cookie is wanted for. A cookie the host
+            set is preferred to one set without a domain by
+            :py:meth:`Transport.set_cookie`, and cookies of other hosts are
+            ignored. None accepts a cookie of any host.
+    """
+    unscoped = None
+    for cookie in jar:
+        if cookie.name != name:
+            continue
+        cookie_domain = cookie.domain.lstrip(".")
+        # cookielib files cookies of dotless host names under "name.local".
+        if domain is None or cookie_domain in (domain, domain + ".local"):
+            return cookie.value
+        if not cookie_domain:
+            unscoped = cookie.value
+    return unscoped
+
+
+class TransportResponse(object):
+    """Response interface returned by :py:meth:`Transport.request`.
+
+    Attributes:
+        status_code (int): HTTP status code.
+    """
+
+    status_code = None
+
+    def __bool__(self):
+        """Return True for a successful (< 400) status code."""
+        return self.status_code < 400
+
+    __nonzero__ = __bool__
+
+    @property
+    def text(self):
+        """Return the complete body as a string."""
+        raise NotImplementedError
+
+    @property
+    def content(self):
+        """Return the complete, decoded body as bytes."""
+        raise NotImplementedError
+
+    @property
+    def wire_bytes(self):
+        """Return the number of body bytes read off the wire so far."""
+        raise NotImplementedError
+
+    def json(self):
+        """Return the body parsed as JSON."""
+        raise NotImplementedError
+
+    def iter_content(self, chunk_size):
+        """Yield the decoded body in chunks of up to ``chunk_size`` bytes.
+
+        A ``chunk_size`` of None yields data as soon as it arrives.
+        """
+        raise NotImplementedError
+
+    def iter_lines(self, chunk_size=None):
+        """Yield the decoded body one line at a time, as bytes.
+
+        Args:
+            chunk_size (int): Size of the reads the lines are cut from. None
+                uses whatever the transport receives at once.
+        """
+        return split_lines(self.iter_content(chunk_size))
+
+    def close(self):
+        """Release the connection behind this response."""
+        raise NotImplementedError
+
+
+class Transport(object):
+    """Base class for transports.
+
+    Subclasses implement :py:meth:`request` and the session helpers. A single
+    transport instance may be shared by several endpoint objects, which then
+    share its connection pool and session.
+
+    Args:
+        compression (bool): Offer compressed content encodings.
+    """
+
+    def __init__(self, compression=True):
+        """Store settings common to all transports."""
+        self.compression = compression
+
+    @classmethod
+    def create(cls, transport, compression=True):
+        """Return a transport instance.
+
+        Args:
+            transport (str or Transport): ``requests`` or ``http2``, or an
+                already-built transport which is returned unchanged.
+            compression (bool): Passed to newly-built transports.
+        """
+        if isinstance(transport, Transport):
+            return transport
+        transports = {"requests": RequestsTransport,
+                      "http2": HTTP2Transport}
+        if transport not in transports:
+            msg = "Unknown transport: {}".format(transport)
+            raise ValueError(msg)
+        return transports[transport](compression=compression)
+
+    def request(self, verb, url, data=None, stream=False, timeout=None):
+        """Send one request.
+
+        Args:
+            verb (str): ``GET`` or ``POST``.
+            url (str): Complete URL.
+            data (dict): Form fields for the request body.
+            stream (bool): Defer reading the body until it is iterated.
+            timeout (float or tuple): Socket timeout in seconds, or a
+                ``(connect, read)`` tuple. None waits forever.
+
+        Return:
+            TransportResponse: Response object.
+
+        Raises:
+            KismetConnectionError: The request could not be completed.
+            KismetTimeoutError: The request timed out.
+        """
+        raise NotImplementedError
+
+    def set_compression(self, enabled):
+        """Enable or disable compressed content encodings."""
+        raise NotImplementedError
+
+    def set_auth(self, username, password):
+        """Use HTTP basic authentication for all requests."""
+        raise NotImplementedError
+
+    def get_cookie(self, name, domain=None):
+        """Return the value of a session cookie, or None.
+
+        Args:
+            name (str): Cookie name.
+            domain (str): Host name of the Kismet server; transports shared
+                between servers return the cookie of this one.
+        """
+        raise NotImplementedError
+
+    def set_cookie(self, name, value):
+        """Set a session cookie."""
+        raise NotImplementedError
+
+    def close(self):
+        """Close all pooled connections."""
+        raise NotImplementedError
+
+
+class RequestsResponse(TransportResponse):
+    """Wrap a ``requests.Response``.
+
+    The body is read from the raw urllib3 response without content decoding
+    and decoded here, so the compressed size can be counted for chunked
+    responses too, which urllib3 does not track.
+    """
+
+    default_read_size = 262144
+
+    def __init__(self, response):
+        """Wrap ``response``."""
+        self.response = response
+        self.response.encoding = "utf-8"
+        self.status_code = response.status_code
+        self.body = None
+        self.read_bytes = 0
+
+    @property
+    def text(self):
+        """Return the complete body as a string."""
+        return self.content.decode("utf-8", "replace")
+
+    @property
+    def content(self):
+        """Return the complete, decoded body as bytes."""
+        if self.body is None:
+            self.body = b"".join(self.iter_content(None))
+        return self.body
+
+    @property
+    def wire_bytes(self):
+        """Return the number of body bytes read off the wire so far."""
+        return self.read_bytes
+
+    def json(self):
+        """Return the body parsed as JSON."""
+        return json.loads(self.text)
+
+    def iter_content(self, chunk_size):
+        """Yield the decoded body in chunks of up to ``chunk_size`` bytes.
+
+        With a ``chunk_size`` of None, chunked responses (which Kismet sends
+        for streams) are yielded one HTTP chunk at a time, as they arrive,
+        and other responses in reads of ``default_read_size``.
+        """
+        from urllib3.exceptions import HTTPError
+        from urllib3.exceptions import ReadTimeoutError
+        if self.body is not None:
+            for chunk in MemoryResponse(self.status_code,
+                                        self.body).iter_content(chunk_size):
+                yield chunk
+            return
+        if chunk_size is None:
+            chunk_size = self.default_read_size
+        decoder = self.decoder()
+        try:
+            for data in self.response.raw.stream(chunk_size,
+                                                 decode_content=False):
+                self.read_bytes += len(data)
+                if decoder is not None:
+                    data = self.decode(decoder.decompress, data)
+                if data:
+                    yield data
+            if decoder is not None:
+                data = self.decode(decoder.flush)
+                if data:
+                    yield data
+        except ReadTimeoutError as err:
+            msg = "Timed out reading from Kismet: {}".format(err)
+            raise KismetTimeoutError(msg)
+        except HTTPError as err:
+            msg = "Connection to Kismet lost: {}".format(err)
+            raise KismetConnectionError(msg)
+
+    def decoder(self):
+        """Return a decoder for the content encoding, or None.
+
+        gzip and deflate are decoded with zlib. Other encodings, such as
+        brotli and zstd, use the decoders of urllib3 when it provides them.
+        """
+        encoding = self.response.raw.headers.get("content-encoding", "")
+        encodings = [part.strip() for part in encoding.lower().split(",")
+                     if part.strip()]
+        if not encodings:
+            return None
+        if len(encodings) == 1 and encodings[0] in ZLIB_ENCODINGS:
+            # 32 accepts either a gzip or a zlib header.
+            return zlib.decompressobj(32 + zlib.MAX_WBITS)
+        try:
+            from urllib3.response import HTTPResponse
+            from urllib3.response import _get_decoder
+        except ImportError:
+            return None
+        if any(part not in HTTPResponse.CONTENT_DECODERS
+               for part in encodings):
+            return None
+        decoder = _get_decoder(", ".join(encodings))
+        return decoder if hasattr(decoder, "flush") else None
+
+    @staticmethod
+    def decode(function, *args):
+        """Call a decoder method, reporting corrupt bodies."""
+        try:
+            return function(*args)
+        except Exception as err:
+            msg = "Unable to decode response from Kismet: {}".format(err)
+            raise KismetConnectionError(msg)
+
+    def close(self):
+        """Release the connection behind this response."""
+        self.response.close()
+
+
+class RequestsTransport(Transport):
+    """HTTP/1.1 transport built on ``requests``. This is the default.
+
+    Args:
+        compression (bool): Offer compressed content encodings.
+        max_connections (int): Connections kept open per host, which bounds
+            how many requests can run concurrently without reconnecting.
+    """
+
+    def __init__(self, compression=True, max_connections=10):
+        """Create the underlying ``requests.Session``."""
+        import requests
+        from requests.adapters import HTTPAdapter
+        super(RequestsTransport, self).__init__(compression)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_maxsize=max_connections)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.set_compression(compression)
+
+    def request(self, verb, url, data=None, stream=False, timeout=None):
+        """Send one request. See :py:meth:`Transport.request`."""
+        import requests
+        try:
+            # The body is always read by RequestsResponse, which counts the
+            # bytes on the wire; non-streamed bodies are read right away.
+            response = self.session.request(verb, url, data=data,
+                                            stream=True, timeout=timeout)
+        except requests.exceptions.Timeout as err:
+            msg = "Timed out talking to Kismet: {}".format(err)
+            raise KismetTimeoutError(msg)
+        except requests.exceptions.RequestException as err:
+            msg = "Unable to connect to Kismet: {}".format(err)
+            raise KismetConnectionError(msg)
+        response = RequestsResponse(response)
+        if not stream:
+            try:
+                response.content
+            finally:
+                response.close()
+        return response
+
+    def set_compression(self, enabled):
+        """Enable or disable compressed content encodings."""
+        from urllib3.util.request import ACCEPT_ENCODING
+        self.compression = bool(enabled)
+        encoding = ACCEPT_ENCODING if self.compression else "identity"
+        self.session.headers["Accept-Encoding"] = encoding
+
+    def set_auth(self, username, password):
+        """Use HTTP basic authentication for all requests."""
+        self.session.auth = (username, password)
+
+    def get_cookie(self, name, domain=None):
+        """Return the value of a session cookie, or None."""
+        return find_cookie(self.session.cookies, name, domain)
+
+    def set_cookie(self, name, value):
+        """Set a session cookie."""
+        import requests
+        requests.utils.add_dict_to_cookiejar(self.session.cookies,
+                                             {name: value})
+
+    def close(self):
+        """Close all pooled connections."""
+        self.session.close()
+
+
+class HTTP2Response(TransportResponse):
+    """Wrap an ``httpx.Response``."""
+
+    def __init__(self, response, errors, timeouts):
+        """Wrap ``response``; the others are httpx's exception classes."""
+        self.response = response
+        self.errors = errors
+        self.timeouts = timeouts
+        self.status_code = response.status_code
+
+    @property
+    def text(self):
+        """Return the complete body as a string."""
+        self.response.read()
+        return self.response.text
+
+    @property
+    def content(self):
+        """Return the complete, decoded body as bytes."""
+        return self.response.read()
+
+    @property
+    def wire_bytes(self):
+        """Return the number of body bytes read off the wire so far."""
+        return self.response.num_bytes_downloaded
+
+    def json(self):
+        """Return the body parsed as JSON."""
+        self.response.read()
+        return self.response.json()
+
+    def iter_content(self, chunk_size):
+        """Yield the decoded body in chunks of up to ``chunk_size`` bytes."""
+        try:
+            for chunk in self.response.iter_bytes(chunk_size):
+                yield chunk
+        except self.timeouts as err:
+            msg = "Timed out reading from Kismet: {}".format(err)
+            raise KismetTimeoutError(msg)
+        except self.errors as err:
+            msg = "Connection to Kismet lost: {}".format(err)
+            raise KismetConnectionError(msg)
+
+    def close(self):
+        """Release the stream behind this response."""
+        self.response.close()
+
+
+class HTTP2Transport(Transport):
+    """HTTP/2 transport built on ``httpx``.
+
+    All requests from every thread using this transport are multiplexed as
+    separate streams over a single connection per host, so issuing many small
+    requests concurrently does not need one connection per request.
+
+    HTTP/2 is negotiated with ALPN on ``https`` URIs, which is how a reverse
+    proxy in front of Kismet normally offers it. Set ``prior_knowledge`` to
+    speak HTTP/2 over cleartext (h2c) to a server known to support it.
+
+    Requires the ``http2`` extra: ``pip install kismet_rest[http2]``.
+
+    Args:
+        compression (bool): Offer compressed content encodings.
+        prior_knowledge (bool): Use HTTP/2 without negotiation.
+        verify (bool or str): TLS verification, as for ``httpx``.
+    """
+
+    def __init__(self, compression=True, prior_knowledge=False, verify=True):
+        """Create the underlying ``httpx.Client``."""
+        super(HTTP2Transport, self).__init__(compression)
+        try:
+            import httpx
+            self.client = httpx.Client(http1=not prior_knowledge, http2=True,
+                                       timeout=None, verify=verify)
+        except ImportError:
+            raise ImportError("The HTTP/2 transport requires httpx and h2: "
+                              "pip install kismet_rest[http2]")
+        self.httpx = httpx
+        self.errors = httpx.TransportError
+        self.timeouts = httpx.TimeoutException
+        self.default_encoding = self.client.headers.get("Accept-Encoding")
+        self.set_compression(compression)
+
+    def request(self, verb, url, data=None, stream=False, timeout=None):
+        """Send one request. See :py:meth:`Transport.request`."""
+        if isinstance(timeout, tuple):
+            timeout = self.httpx.Timeout(timeout[1], connect=timeout[0])
+        else:
+            timeout = self.httpx.Timeout(timeout)
+        try:
+            request = self.client.build_request(verb, url, data=data,
+                                                timeout=timeout)
+            response = self.client.send(request, stream=stream)
+        except self.timeouts as err:
+            msg = "Timed out talking to Kismet: {}".format(err)
+            raise KismetTimeoutError(msg)
+        except self.errors as err:
+            msg = "Unable to connect to Kismet: {}".format(err)
+            raise KismetConnectionError(msg)
+        return HTTP2Response(response, self.errors, self.timeouts)
+
+    def set_compression(self, enabled):
+        """Enable or disable compressed content encodings."""
+        self.compression = bool(enabled)
+        encoding = self.default_encoding if self.compression else "identity"
+        self.client.headers["Accept-Encoding"] = encoding
+
+    def set_auth(self, username, password):
+        """Use HTTP basic authentication for all requests."""
+        self.client.auth = (username, password)
+
+    def get_cookie(self, name, domain=None):
+        """Return the value of a session cookie, or None."""
+        return find_cookie(self.client.cookies.jar, name, domain)
+
+    def set_cookie(self, name, value):
+        """Set a session cookie."""
+        self.client.cookies.set(name, value)
+
+    def close(self):
+        """Close all pooled connections."""
+        self.client.close()
+
+
+class MemoryResponse(TransportResponse):
+    """A response whose whole body is already in memory."""
+
+    def __init__(self, status_code, body):
+        """Serve ``body``, which is bytes."""
+        self.status_code = status_code
+        self.body = body
+        self.read = 0
+
+    @property
+    def text(self):
+        """Return the complete body as a string."""
+        return self.body.decode("utf-8")
+
+    @property
+    def content(self):
+        """Return the complete, decoded body as bytes."""
+        self.read = len(self.body)
+        return self.body
+
+    @property
+    def wire_bytes(self):
+        """Return the number of body bytes served so far."""
+        return self.read
+
+    def json(self):
+        """Return the body parsed as JSON."""
+        return json.loads(self.text)
+
+    def iter_content(self, chunk_size):
+        """Yield the body in chunks of ``chunk_size``, or all at once."""
+        view = memoryview(self.body)
+        step = chunk_size or len(self.body)
+        while self.read < len(self.body):
+            chunk = view[self.read:self.read + step].tobytes()
+            self.read += len(chunk)
+            yield chunk
+
+    def close(self):
+        """Nothing to release."""
+
+
+class InMemoryTransport(Transport):
+    """Answer requests from Python objects, without any I/O.
+
+    Useful for tests and for driving collectors from data already in the
+    process. Responses are looked up by URL path, ignoring the host and any
+    query string::
+
+        transport = kismet_rest.InMemoryTransport({
+            "/system/status.json": {"kismet.system.devices.count": 2},
+            "/devices/views/all/devices.itjson": [device_a, device_b],
+        })
+        devices = kismet_rest.Devices(transport=transport)
+
+    A route is one of:
+
+    * ``bytes`` or ``str``, served as the body.
+    * any other object, served as JSON. A list served for an ``.itjson``
+      path is written one record per line.
+    * a ``(status, body)`` tuple, to serve a different status.
+    * a function, called as ``route(verb, path, data)`` with the path
+      including the query string, which returns any of the above.
+
+    Paths without a route get a 404. Every request is appended to ``sent``
+    as ``(verb, path, data)``.
+
+    Args:
+        routes (dict): Responses by URL path.
+        compression (bool): Ignored; bodies are never encoded.
+    """
+
+    def __init__(self, routes=None, compression=True):
+        """Start with ``routes`` and no session."""
+        super(InMemoryTransport, self).__init__(compression)
+        self.routes = dict(routes or {})
+        self.sent = []
+        self.auth = None
+        self.cookies = {}
+
+    def request(self, verb, url, data=None, stream=False, timeout=None):
+        """Return the routed response. See :py:meth:`Transport.request`."""
+        parsed = urlparse(url)
+        path = parsed.path
+        if parsed.query:
+            path = "{}?{}".format(path, parsed.query)
+        self.sent.append((verb, path, data))
+        if parsed.path not in self.routes:
+            return MemoryResponse(404, b"Not found")
+        route = self.routes[parsed.path]
+        if callable(route):
+            route = route(verb, path, data)
+        status, body = route if isinstance(route, tuple) else (200, route)
+        return MemoryResponse(status, self.encode(parsed.path, body))
+
+    @staticmethod
+    def encode(path, body):
+        """Return ``body`` as bytes."""
+        if isinstance(body, bytes):
+            return body
+        if isinstance(body, type(u"")):
+            return body.encode("utf-8")
+        if path.endswith(".itjson") and isinstance(body, list):
+            return b"".join(json.dumps(record).encode("utf-8") + b"\n"
+                            for record in body)
+        return json.dumps(body).encode("utf-8")
+
+    def set_compression(self, enabled):
+        """Accepted for compatibility; bodies are never encoded."""
+        self.compression = bool(enabled)
+
+    def set_auth(self, username, password):
+        """Record the credentials; they are not checked."""
+        self.auth = (username, password)
+
+    def get_cookie(self, name, domain=None):
+        """Return the value of a session cookie, or None."""
+        return self.cookies.get(name)
+
+    def set_cookie(self, name, value):
+        """Set a session cookie."""
+        self.cookies[name] = value
+
+    def close(self):
+        """Nothing to close."""
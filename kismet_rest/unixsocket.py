@@ -0,0 +1,108 @@
+"""HTTP over a Unix domain socket, for a Kismet or proxy on the same host.
+
+This module imports ``requests`` and ``urllib3`` at import time, so it is
+only loaded when :py:class:`UnixSocketTransport` is first used.
+"""
+
+import socket
+import threading
+
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+from urllib3.connectionpool import HTTPConnectionPool
+from urllib3.util import parse_url
+
+from .transport import RequestsTransport
+
+
+class UnixHTTPConnection(HTTPConnection):
+    """HTTP connection which connects to a Unix socket instead of a host."""
+
+    def __init__(self, *args, **kwargs):
+        """Take the ``socket_path`` keyword; the rest go to urllib3."""
+        self.socket_path = kwargs.pop("socket_path")
+        super(UnixHTTPConnection, self).__init__(*args, **kwargs)
+
+    def _new_conn(self):
+        """Return a socket connected to ``socket_path``."""
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if isinstance(self.timeout, (int, float)):
+            sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.socket_path)
+        except Exception:
+            sock.close()
+            raise
+        return sock
+
+
+class UnixConnectionPool(HTTPConnectionPool):
+    """Connection pool of :py:class:`UnixHTTPConnection`."""
+
+    ConnectionCls = UnixHTTPConnection
+
+
+class UnixSocketAdapter(HTTPAdapter):
+    """Send every request mounted on this adapter to one Unix socket.
+
+    One pool is kept per URL host and port, so each request carries the
+    ``Host`` header of its own URL.
+    """
+
+    def __init__(self, socket_path, max_connections=10):
+        """Remember the socket; pools are created on first use."""
+        super(UnixSocketAdapter, self).__init__()
+        self.socket_path = socket_path
+        self.max_connections = max_connections
+        self.pools = {}
+        self.pools_lock = threading.Lock()
+
+    def get_connection_with_tls_context(self, request, verify, proxies=None,
+                                        cert=None):
+        """Return the socket pool for the request (requests >= 2.32)."""
+        return self.get_connection(request.url, proxies)
+
+    def get_connection(self, url, proxies=None):
+        """Return the socket pool for the host and port of ``url``."""
+        parsed = parse_url(url)
+        key = (parsed.host, parsed.port)
+        with self.pools_lock:
+            if key not in self.pools:
+                self.pools[key] = UnixConnectionPool(
+                    parsed.host, parsed.port, maxsize=self.max_connections,
+                    socket_path=self.socket_path)
+            return self.pools[key]
+
+    def close(self):
+        """Close the pooled connections."""
+        with self.pools_lock:
+            for pool in self.pools.values():
+                pool.close()
+            self.pools.clear()
+
+
+class UnixSocketTransport(RequestsTransport):
+    """HTTP/1.1 transport which connects to a Unix domain socket.
+
+    Avoids the TCP stack when Kismet, or a reverse proxy in front of it,
+    listens on a local socket. ``host_uri`` still supplies the ``Host``
+    header and the base path; only the connection goes to the socket::
+
+        transport = kismet_rest.UnixSocketTransport("/run/kismet.sock")
+        devices = kismet_rest.Devices(host_uri="http://kismet/",
+                                      transport=transport)
+
+    Args:
+        socket_path (str): Path of the Unix socket.
+        compression (bool): Offer compressed content encodings.
+        max_connections (int): Connections kept open to the socket.
+    """
+
+    def __init__(self, socket_path, compression=True, max_connections=10):
+        """Mount the socket adapter for all URLs."""
+        super(UnixSocketTransport, self).__init__(compression,
+                                                  max_connections)
+        self.socket_path = socket_path
+        adapter = UnixSocketAdapter(socket_path, max_connections)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
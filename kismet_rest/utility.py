@@ -1,7 +1,7 @@
 """General utility functions located here."""
 
-import os
-import re
+import time
+
 try:
     from urlparse import urljoin
 except ImportError:
@@ -32,12 +32,8 @@ class Utility(object):
     @classmethod
     def get_lib_version(cls):
         """Get version of kismet_Rest library."""
-        here_dir = os.path.abspath(os.path.dirname(__file__))
-        initfile = os.path.join(here_dir, "__init__.py")
-        raw_init_file = cls.readfile(initfile)
-        rx_compiled = re.compile(r"\s*__version__\s*=\s*\"(\S+)\"")
-        ver = rx_compiled.search(raw_init_file).group(1)
-        return ver
+        from . import __version__
+        return __version__
 
     @classmethod
     def readfile(cls, file_name):
@@ -45,3 +41,21 @@ class Utility(object):
         with open(file_name, 'r') as file:
             filestring = file.read()
         return filestring
+
+    @classmethod
+    def poll_loop(cls, step, interval, iterations=None):
+        """Yield the result of ``step()`` every ``interval`` seconds.
+
+        Args:
+            step (function): Called with no arguments for each iteration.
+            interval (float): Seconds to sleep between iterations. There is
+                no sleep after the last one.
+            iterations (int): Stop after this many iterations; None runs
+                forever.
+        """
+        count = 0
+        while iterations is None or count < iterations:
+            yield step()
+            count += 1
+            if iterations is None or count < iterations:
+                time.sleep(interval)
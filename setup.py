@@ -36,7 +36,13 @@ setup(name="kismet_rest",
       url="https://www.kismetwireless.net",
       download_url="https://kismetwireless.net/python-kismet-rest",
       packages=["kismet_rest"],
-      install_requires="requests",
+      install_requires=["requests",
+                        "urllib3>=1.21.1,<3",
+                        "futures; python_version < '3.2'"],
+      extras_require={"compression": ["urllib3[brotli,zstd]"],
+                      "http2": ["httpx[http2]"],
+                      "pandas": ["pandas"],
+                      "arrow": ["pyarrow"]},
       long_description=build_long_desc(),
       classifiers=[
           "Development Status :: 5 - Production/Stable",
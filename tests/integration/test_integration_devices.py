@@ -67,3 +67,31 @@ class TestIntegrationDevices(object):
         target = target_devices[0]["kismet.device.base.key"]
         result = devices.by_key(target)
         assert isinstance(result, dict)
+
+    def test_devices_all_resumable(self):
+        """Test resumable device iteration returns each device once."""
+        devices = self.create_authenticated_session()
+        fields = ["kismet.device.base.macaddr"]
+        keys = [device["kismet.device.base.key"]
+                for device in devices.all(fields=fields, resume_attempts=2)]
+        assert len(keys) == len(set(keys))
+
+    def test_devices_views(self):
+        """Test listing views and polling each from a cursor."""
+        devices = self.create_authenticated_session()
+        views = devices.views()
+        assert views
+        cursors = {view["kismet.devicetracker.view.id"]: 0 for view in views}
+        results = devices.poll_views(cursors,
+                                     fields=["kismet.device.base.key"])
+        assert set(results) == set(cursors)
+        for view_devices in results.values():
+            for device in view_devices:
+                assert isinstance(device, dict)
+
+    def test_devices_view_pages(self):
+        """Test paging the all-devices view."""
+        devices = self.create_authenticated_session()
+        pages = list(devices.view_pages("all", page_size=10))
+        total = pages[0]["total"]
+        assert sum(len(page["devices"]) for page in pages) >= min(total, 1)
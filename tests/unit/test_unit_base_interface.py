@@ -0,0 +1,198 @@
+"""Test BaseInterface response processing without a Kismet server."""
+import io
+import json
+import threading
+import zlib
+
+import pytest
+import requests
+from urllib3.response import HTTPResponse
+
+import kismet_rest
+from kismet_rest.transport import RequestsResponse
+
+try:
+    from http.server import BaseHTTPRequestHandler
+    from http.server import HTTPServer
+    from socketserver import ThreadingMixIn
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler
+    from BaseHTTPServer import HTTPServer
+    from SocketServer import ThreadingMixIn
+
+
+def build_response(records, encoding=None):
+    """Return a streamed requests.Response carrying ``records`` as itjson."""
+    body = b"".join([json.dumps(rec).encode("utf-8") + b"\n"
+                     for rec in records])
+    headers = {}
+    if encoding == "gzip":
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+        body = compressor.compress(body) + compressor.flush()
+    elif encoding == "deflate":
+        body = zlib.compress(body)
+    if encoding:
+        headers["content-encoding"] = encoding
+    response = requests.Response()
+    response.status_code = 200
+    response.raw = HTTPResponse(body=io.BytesIO(body), headers=headers,
+                                preload_content=False)
+    return RequestsResponse(response)
+
+
+class ChunkedGzipHandler(BaseHTTPRequestHandler):
+    """Send the server's records as a chunked, gzipped itjson stream."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        """Write each record as its own compressed chunk."""
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Encoding", "gzip")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+        for record in self.server.records:
+            line = json.dumps(record).encode("utf-8") + b"\n"
+            self.write_chunk(compressor.compress(line) +
+                             compressor.flush(zlib.Z_SYNC_FLUSH))
+        self.write_chunk(compressor.flush())
+        self.wfile.write(b"0\r\n\r\n")
+
+    def write_chunk(self, data):
+        """Write one HTTP chunk."""
+        self.wfile.write("{:x}\r\n".format(len(data)).encode("ascii") +
+                         data + b"\r\n")
+
+    def log_message(self, *args):
+        """Keep test output quiet."""
+
+
+class ChunkedServer(ThreadingMixIn, HTTPServer):
+    """Threaded HTTP server for one test."""
+
+    daemon_threads = True
+
+
+class TestUnitBaseInterface(object):
+    """Test BaseInterface stream handling."""
+
+    def create_interface(self, tmpdir, **kwargs):
+        cache = str(tmpdir.join("session"))
+        return kismet_rest.BaseInterface(session_cache=cache, **kwargs)
+
+    def test_unit_base_interface_compression_header(self, tmpdir):
+        """Compression is offered by default and can be disabled."""
+        interface = self.create_interface(tmpdir)
+        assert "gzip" in interface.session.headers["Accept-Encoding"]
+        interface.set_compression(False)
+        assert interface.session.headers["Accept-Encoding"] == "identity"
+
+    def test_unit_base_interface_shared_transport(self, tmpdir):
+        """Endpoint objects can share one transport instance."""
+        transport = kismet_rest.RequestsTransport()
+        first = self.create_interface(tmpdir, transport=transport)
+        second = self.create_interface(tmpdir, transport=transport)
+        assert first.transport is second.transport
+        assert first.session is transport.session
+
+    def test_unit_base_interface_stream_gzip(self, tmpdir):
+        """Gzip streams decode line by line and record both byte counts."""
+        records = [{"kismet.device.base.key": str(x),
+                    "kismet.device.base.name": "device"} for x in range(200)]
+        interface = self.create_interface(tmpdir)
+        response = build_response(records, encoding="gzip")
+        result = list(interface.process_response_stream(response))
+        assert result == records
+        stats = interface.transfer_stats
+        assert stats.responses == 1
+        assert stats.compressed_bytes < stats.uncompressed_bytes
+        assert stats.ratio > 1.0
+
+    def test_unit_base_interface_stream_deflate(self, tmpdir):
+        """Deflate bodies decode with zlib; unknown encodings pass through."""
+        records = [{"n": x} for x in range(50)]
+        interface = self.create_interface(tmpdir)
+        response = build_response(records, encoding="deflate")
+        assert list(interface.process_response_stream(response)) == records
+        response = build_response(records, encoding="unknown")
+        assert response.decoder() is None
+
+    def test_unit_base_interface_stream_chunked_gzip(self, tmpdir):
+        """Chunked gzip bodies count their compressed size too."""
+        records = [{"kismet.device.base.key": str(x),
+                    "kismet.device.base.name": "device"} for x in range(200)]
+        server = ChunkedServer(("127.0.0.1", 0), ChunkedGzipHandler)
+        server.records = records
+        thread = threading.Thread(target=server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        host_uri = "http://127.0.0.1:{}".format(server.server_address[1])
+        interface = self.create_interface(tmpdir, host_uri=host_uri)
+        try:
+            assert list(interface.interact_yield(
+                "GET", "devices/all_devices.itjson")) == records
+            stats = interface.transfer_stats
+            assert 0 < stats.compressed_bytes < stats.uncompressed_bytes
+            interface.transfer_stats.reset()
+            stream = interface.interact_yield("GET",
+                                              "devices/all_devices.itjson")
+            assert next(stream) == records[0]
+            stream.close()
+            assert interface.transfer_stats.responses == 1
+            assert interface.transfer_stats.compressed_bytes > 0
+        finally:
+            interface.transport.close()
+            server.shutdown()
+            server.server_close()
+
+    def test_unit_base_interface_stream_callback(self, tmpdir):
+        """Callbacks receive each decoded record."""
+        records = [{"a": 1}, {"a": 2}]
+        seen = []
+        interface = self.create_interface(tmpdir)
+        response = build_response(records)
+        list(interface.process_response_stream(response,
+                                               callback=seen.append))
+        assert seen == records
+        stats = interface.transfer_stats
+        assert stats.compressed_bytes == stats.uncompressed_bytes
+
+    def test_unit_base_interface_with_options(self, tmpdir):
+        """Option copies share the transport and reject unknown options."""
+        interface = self.create_interface(tmpdir, timeout=5)
+        bounded = interface.with_options(deadline=10)
+        assert bounded.transport is interface.transport
+        assert bounded.deadline == 10
+        assert bounded.timeout == 5
+        assert interface.deadline is None
+        with pytest.raises(TypeError):
+            interface.with_options(retries=3)
+
+    def test_unit_base_interface_deadline_expired(self, tmpdir):
+        """An already-expired deadline fails without sending anything."""
+        interface = self.create_interface(tmpdir, deadline=0)
+        with pytest.raises(kismet_rest.KismetTimeoutError):
+            interface.interact("GET", "system/status.json")
+        # A repeated call keeps the absolute deadline of the first attempt.
+        assert interface.call_deadline(deadline_at=5.0) == 5.0
+
+    def test_unit_base_interface_cancellable(self, tmpdir):
+        """Cancelling a stream handle closes the wrapped generator."""
+        closed = []
+
+        def generate():
+            try:
+                for count in range(10):
+                    yield count
+            finally:
+                closed.append(True)
+
+        interface = self.create_interface(tmpdir)
+        with interface.cancellable(generate()) as stream:
+            for item in stream:
+                if item == 2:
+                    break
+        assert closed == [True]
+        assert list(stream) == []
@@ -0,0 +1,105 @@
+"""Test CircuitBreaker states and fast-failing requests."""
+import time
+
+import pytest
+
+import kismet_rest
+from tests.unit.test_unit_limiter import FakeResponse
+from tests.unit.test_unit_limiter import FakeTransport
+
+
+class BrokenStream(FakeResponse):
+    """Streamed response whose connection drops after the first line."""
+
+    def iter_lines(self, chunk_size=None):
+        yield b"{}"
+        raise kismet_rest.KismetConnectionError("Connection to Kismet lost")
+
+
+class TestUnitBreaker(object):
+    """Test opening, half-open probes and closing."""
+
+    def test_unit_breaker_states(self):
+        """Consecutive failures open; a probe closes or re-opens."""
+        changes = []
+        breaker = kismet_rest.CircuitBreaker(
+            failure_threshold=2, reset_timeout=10,
+            on_change=lambda *change: changes.append(change))
+        breaker.before("h", now=0)
+        breaker.failure("h", now=0)
+        breaker.success("h")
+        breaker.failure("h", now=1)
+        assert breaker.state("h") == "closed"
+        breaker.failure("h", now=2)
+        assert breaker.state("h") == "open"
+        with pytest.raises(kismet_rest.KismetConnectionError):
+            breaker.before("h", now=5)
+        breaker.before("h", now=13)
+        assert breaker.state("h") == "half_open"
+        with pytest.raises(kismet_rest.KismetConnectionError):
+            breaker.before("h", now=14)
+        breaker.failure("h", now=15)
+        assert breaker.state("h") == "open"
+        breaker.before("h", now=26)
+        breaker.record("h", 200)
+        assert changes == [("h", "closed", "open"), ("h", "open", "half_open"),
+                           ("h", "half_open", "open"),
+                           ("h", "open", "half_open"),
+                           ("h", "half_open", "closed")]
+        assert breaker.stats()["h"]["trips"] == 2
+        assert breaker.stats()["h"]["rejected"] == 2
+
+    def test_unit_breaker_send_request(self, tmpdir):
+        """Open circuits fail fast without touching the transport."""
+        breaker = kismet_rest.CircuitBreaker(failure_threshold=2)
+        transport = FakeTransport([kismet_rest.KismetTimeoutError("slow"),
+                                   503, 200])
+        interface = kismet_rest.BaseInterface(
+            host_uri="http://sensor:2501",
+            session_cache=str(tmpdir.join("session")),
+            transport=transport, breaker=breaker)
+        url = "http://sensor:2501/system/status.json"
+        with pytest.raises(kismet_rest.KismetTimeoutError):
+            interface.send_request("GET", url)
+        assert interface.send_request("GET", url).status_code == 503
+        with pytest.raises(kismet_rest.KismetConnectionError):
+            interface.send_request("GET", url)
+        assert transport.results == [200]
+        assert breaker.stats()["sensor:2501"]["state"] == "open"
+
+    def test_unit_breaker_limiter_and_streams(self, tmpdir):
+        """Probes wait for a limiter slot; broken streams count as failures.
+
+        A probe which times out waiting for a slot frees its admission, and
+        an open circuit fails without waiting for a slot.
+        """
+        breaker = kismet_rest.CircuitBreaker(failure_threshold=1)
+        limiter = kismet_rest.AdaptiveLimiter(initial=1, cooldown=0)
+        transport = FakeTransport([200, BrokenStream(200)])
+        interface = kismet_rest.BaseInterface(
+            host_uri="http://sensor:2501",
+            session_cache=str(tmpdir.join("session")),
+            transport=transport, breaker=breaker, limiter=limiter)
+        url = "http://sensor:2501/devices/all_devices.itjson"
+        breaker.failure("sensor:2501", now=time.time() - 60)
+        limiter.acquire("sensor:2501")
+        with pytest.raises(kismet_rest.KismetTimeoutError):
+            interface.send_request("GET", url,
+                                   deadline_at=time.time() + 0.05)
+        assert breaker.state("sensor:2501") == "half_open"
+        limiter.release("sensor:2501")
+        assert interface.send_request("GET", url).status_code == 200
+        assert breaker.state("sensor:2501") == "closed"
+        stream = interface.send_request("GET", url, stream=True)
+        lines = stream.iter_lines()
+        assert next(lines) == b"{}"
+        with pytest.raises(kismet_rest.KismetConnectionError):
+            next(lines)
+        stream.close()
+        assert breaker.state("sensor:2501") == "open"
+        assert limiter.stats()["sensor:2501"]["decreases"] == 1
+        assert limiter.stats()["sensor:2501"]["in_flight"] == 0
+        limiter.acquire("sensor:2501")
+        with pytest.raises(kismet_rest.KismetCircuitOpenError):
+            interface.send_request("GET", url)
+        assert limiter.stats()["sensor:2501"]["in_flight"] == 1
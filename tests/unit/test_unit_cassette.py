@@ -0,0 +1,143 @@
+"""Test recording responses to a cassette and replaying them."""
+import json
+import time
+
+import pytest
+
+import kismet_rest
+from kismet_rest.transport import Transport
+from kismet_rest.transport import TransportResponse
+
+
+class BodyResponse(TransportResponse):
+    """Response serving a fixed body in fixed chunks."""
+
+    def __init__(self, status_code, chunks):
+        self.status_code = status_code
+        self.chunks = chunks
+
+    @property
+    def content(self):
+        return b"".join(self.chunks)
+
+    @property
+    def text(self):
+        return self.content.decode("utf-8")
+
+    @property
+    def wire_bytes(self):
+        return len(self.content)
+
+    def json(self):
+        return json.loads(self.text)
+
+    def iter_content(self, chunk_size):
+        for chunk in self.chunks:
+            time.sleep(0.01)
+            yield chunk
+
+    def close(self):
+        pass
+
+
+class BodyTransport(Transport):
+    """Answer each URL with a scripted status and body chunks."""
+
+    def __init__(self, responses):
+        super(BodyTransport, self).__init__()
+        self.responses = responses
+        self.cookies = {}
+
+    def request(self, verb, url, data=None, stream=False, timeout=None):
+        status, chunks = self.responses[url]
+        return BodyResponse(status, chunks)
+
+    def set_compression(self, enabled):
+        pass
+
+    def get_cookie(self, name, domain=None):
+        return self.cookies.get(name)
+
+    def set_cookie(self, name, value):
+        self.cookies[name] = value
+
+    def close(self):
+        pass
+
+
+def client(tmpdir, transport, host_uri="http://kismet:2501"):
+    """Return a BaseInterface using ``transport``."""
+    return kismet_rest.BaseInterface(
+        host_uri=host_uri, session_cache=str(tmpdir.join("session")),
+        transport=transport)
+
+
+class TestUnitCassette(object):
+    """Test RecordingTransport and ReplayTransport."""
+
+    def record(self, tmpdir):
+        """Record one bulk request and one stream; return the cassette."""
+        lines = [json.dumps({"n": n}).encode("utf-8") + b"\n"
+                 for n in range(3)]
+        inner = BodyTransport({
+            "http://kismet:2501/system/status.json":
+                (200, [b'{"uptime": 5}']),
+            "http://kismet:2501/devices/all_devices.itjson":
+                (200, [lines[0], lines[1] + lines[2][:3], lines[2][3:]]),
+        })
+        path = str(tmpdir.join("sweep.cassette"))
+        recorder = kismet_rest.RecordingTransport(path, transport=inner)
+        interface = client(tmpdir, recorder)
+        assert interface.interact("GET", "system/status.json") == {
+            "uptime": 5}
+        streamed = list(interface.interact_yield(
+            "GET", "devices/all_devices.itjson"))
+        assert streamed == [{"n": 0}, {"n": 1}, {"n": 2}]
+        recorder.close()
+        assert recorder.entries == 2
+        return path
+
+    def test_unit_cassette_replay(self, tmpdir):
+        """Replay matches requests on their path, whatever the host."""
+        path = self.record(tmpdir)
+        player = kismet_rest.ReplayTransport(path)
+        interface = client(tmpdir, player, "https://elsewhere/")
+        for _ in range(2):
+            assert interface.interact("GET", "system/status.json") == {
+                "uptime": 5}
+            assert list(interface.interact_yield(
+                "GET", "devices/all_devices.itjson")) == [
+                    {"n": 0}, {"n": 1}, {"n": 2}]
+        with pytest.raises(kismet_rest.KismetConnectionError):
+            interface.interact("GET", "alerts/all_alerts.json")
+
+    def test_unit_cassette_timing(self, tmpdir):
+        """Realtime replay keeps the recorded chunk boundaries and delays."""
+        path = self.record(tmpdir)
+        player = kismet_rest.ReplayTransport(path, realtime=True)
+        response = player.request(
+            "GET", "http://kismet:2501/devices/all_devices.itjson",
+            stream=True)
+        start = time.time()
+        chunks = list(response.iter_content(None))
+        assert time.time() - start >= 0.02
+        assert len(chunks) == 3
+        fast = kismet_rest.ReplayTransport(path).request(
+            "GET", "http://kismet:2501/devices/all_devices.itjson",
+            stream=True)
+        assert b"".join(fast.iter_content(4)) == b"".join(chunks)
+
+    def test_unit_cassette_partial_read(self, tmpdir):
+        """Content after a partial read returns and records the whole body."""
+        inner = BodyTransport({"http://kismet:2501/a": (200, [b"ab", b"cd"])})
+        path = str(tmpdir.join("partial.cassette"))
+        recorder = kismet_rest.RecordingTransport(path, transport=inner)
+        response = recorder.request("GET", "http://kismet:2501/a",
+                                    stream=True)
+        assert next(response.iter_content(None)) == b"ab"
+        assert response.content == b"abcd"
+        response.close()
+        recorder.close()
+        player = kismet_rest.ReplayTransport(path)
+        replayed = player.request("GET", "http://kismet:2501/a", stream=True)
+        assert list(replayed.iter_content(None)) == [b"ab", b"cd"]
@@ -0,0 +1,55 @@
+"""Test Datasources bulk configuration without a Kismet server."""
+import pytest
+
+import kismet_rest
+
+
+class TestUnitDatasources(object):
+    """Test Datasources.configure dispatch."""
+
+    def create_datasources(self, tmpdir, calls):
+        sources = kismet_rest.Datasources(
+            session_cache=str(tmpdir.join("session")))
+
+        def record(name):
+            def command(*args):
+                calls.append((name,) + args)
+                if args[0] == "broken":
+                    raise kismet_rest.KismetRequestException("bad", 400)
+                return True
+            return command
+        for name in ["set_channel", "set_hop_channels", "set_hop_rate",
+                     "set_hop"]:
+            setattr(sources, name, record(name))
+        return sources
+
+    def test_unit_datasources_configure(self, tmpdir):
+        """Each source gets the matching command and its own result."""
+        calls = []
+        sources = self.create_datasources(tmpdir, calls)
+        plan = {"a": {"channel": "6HT40+"},
+                "b": {"rate": 5, "channels": ["1", "6"]},
+                "c": {"rate": 10},
+                "d": {"hop": True},
+                "broken": {"hop": True}}
+        results = sources.configure(plan)
+        assert sorted(calls) == sorted([
+            ("set_channel", "a", "6HT40+"),
+            ("set_hop_channels", "b", 5, ["1", "6"]),
+            ("set_hop_rate", "c", 10),
+            ("set_hop", "d"),
+            ("set_hop", "broken")])
+        assert results["a"]["success"] is True
+        assert results["a"]["error"] is None
+        assert results["broken"]["success"] is False
+        assert "bad" in results["broken"]["error"]
+        assert all(result["elapsed"] >= 0 for result in results.values())
+
+    def test_unit_datasources_configure_invalid(self, tmpdir):
+        """Invalid settings are rejected before anything is sent."""
+        calls = []
+        sources = self.create_datasources(tmpdir, calls)
+        with pytest.raises(ValueError):
+            sources.configure({"a": {"channel": "1"},
+                               "b": {"channels": ["1"]}})
+        assert calls == []
@@ -0,0 +1,181 @@
+"""Test Devices view paging without a Kismet server."""
+import re
+import threading
+import time
+
+import pytest
+
+import kismet_rest
+from kismet_rest.query import Field
+
+
+class TestUnitDevices(object):
+    """Test paged, concurrent device view iteration."""
+
+    def create_devices(self, tmpdir, total, fail=()):
+        devices = kismet_rest.Devices(
+            session_cache=str(tmpdir.join("session")))
+        requests = []
+        failures = set(fail)
+        lock = threading.Lock()
+
+        def interact(verb, url_path, payload=None, **kwargs):
+            with lock:
+                requests.append((url_path, payload))
+                if payload["start"] in failures:
+                    failures.discard(payload["start"])
+                    raise kismet_rest.KismetConnectionError("reset")
+            # Later pages answer sooner, so completion order is scrambled.
+            time.sleep(0.02 / (1 + payload["start"]))
+            end = min(total, payload["start"] + payload["length"])
+            return {"recordsTotal": total, "recordsFiltered": total,
+                    "draw": payload["draw"],
+                    "data": [{"n": num} for num in
+                             range(payload["start"], end)]}
+        devices.interact = interact
+        return devices, requests
+
+    def test_unit_devices_view_pages_in_order(self, tmpdir):
+        """Pages arrive in order and cover the whole view."""
+        devices, requests = self.create_devices(tmpdir, 23)
+        pages = list(devices.view_pages("all", page_size=5, window=3))
+        assert [page["page"] for page in pages] == [0, 1, 2, 3, 4]
+        assert [dev["n"] for page in pages for dev in page["devices"]] == \
+            list(range(23))
+        assert pages[-1]["start"] == 20
+        assert requests[0][0] == "devices/views/all/devices.json"
+        assert requests[0][1]["datatable"] is True
+
+    def test_unit_devices_view_pages_first_window(self, tmpdir):
+        """The first window of pages is requested before the total is known."""
+        devices, requests = self.create_devices(tmpdir, 7)
+        started = threading.Event()
+        interact = devices.interact
+
+        def first_waits(verb, url_path, payload=None, **kwargs):
+            if payload["start"] == 0:
+                assert started.wait(1)
+            else:
+                started.set()
+            return interact(verb, url_path, payload=payload, **kwargs)
+        devices.interact = first_waits
+        pages = list(devices.view_pages("all", page_size=5, window=3))
+        assert [page["page"] for page in pages] == [0, 1]
+        assert sorted(payload["start"] for _, payload in requests)[:2] == \
+            [0, 5]
+
+    def test_unit_devices_view_pages_resume_and_retry(self, tmpdir):
+        """Iteration can start at a page and failed pages are retried."""
+        devices, requests = self.create_devices(tmpdir, 20, fail=[15])
+        pages = list(devices.view_pages("all", page_size=5, start_page=2,
+                                        window=2))
+        assert [page["page"] for page in pages] == [2, 3]
+        assert len(requests) == 3
+        devices, _ = self.create_devices(tmpdir, 20, fail=[15])
+        with pytest.raises(kismet_rest.KismetConnectionError):
+            list(devices.view_pages("all", page_size=5, retries=0))
+
+    def test_unit_devices_page_payload_sort(self, tmpdir):
+        """Sorting refers to the sort field's column in the field list."""
+        devices, _ = self.create_devices(tmpdir, 0)
+        payload = devices.page_payload(
+            fields=[["kismet.device.base.macaddr", "mac"]],
+            sort="kismet.device.base.first_time", descending=True)
+        assert payload["fields"] == [["kismet.device.base.macaddr", "mac"],
+                                     "kismet.device.base.first_time"]
+        assert payload["order[0][column]"] == 1
+        assert payload["order[0][dir]"] == "desc"
+        assert list(devices.view_pages("all")) == [
+            {"page": 0, "start": 0, "total": 0, "devices": []}]
+
+
+class TestUnitDeviceViews(object):
+    """Test view discovery, streaming and multi-view polling."""
+
+    def test_unit_devices_poll_views(self, tmpdir):
+        """Each view is polled from its own cursor, which then advances."""
+        devices = kismet_rest.Devices(
+            session_cache=str(tmpdir.join("session")))
+        seen = {"phy-IEEE802.11": [5, 9], "seenby-u1": [7]}
+        calls = []
+        lock = threading.Lock()
+
+        def interact_yield(verb, url_path, payload=None, **kwargs):
+            view_id = url_path.split("/")[2]
+            with lock:
+                calls.append((url_path, payload))
+            for last in seen[view_id]:
+                if last >= payload["last_time"]:
+                    yield {"last": last}
+        devices.interact_yield = interact_yield
+        cursors = {"phy-IEEE802.11": 0, "seenby-u1": 8}
+        fields = [["kismet.device.base.last_time", "last"]]
+        results = devices.poll_views(cursors, fields=fields)
+        assert results == {"phy-IEEE802.11": [{"last": 5}, {"last": 9}],
+                           "seenby-u1": []}
+        assert cursors == {"phy-IEEE802.11": 9, "seenby-u1": 8}
+        assert sorted(call[0] for call in calls) == [
+            "devices/views/phy-IEEE802.11/devices.itjson",
+            "devices/views/seenby-u1/devices.itjson"]
+        assert calls[0][1]["fields"] == fields
+        seen["seenby-u1"].append(12)
+        results = devices.poll_views(cursors, fields=fields)
+        assert results["seenby-u1"] == [{"last": 12}]
+        assert cursors["seenby-u1"] == 12
+
+
+class TestUnitDeviceQueries(object):
+    """Test select and top over a stubbed device stream."""
+
+    signal = "kismet.device.base.signal/kismet.common.signal.last_signal"
+    channel = "kismet.device.base.channel"
+
+    def create_devices(self, tmpdir, records):
+        devices = kismet_rest.Devices(
+            session_cache=str(tmpdir.join("session")))
+        calls = []
+
+        def all_devices(**kwargs):
+            # Apply regex filters the way Kismet does: any entry may match.
+            calls.append(kwargs)
+            for record in records:
+                spec = kwargs.get("regex")
+                if not spec or any(re.search(pattern, str(record.get(path)))
+                                   for path, pattern in spec):
+                    yield record
+        devices.all = all_devices
+        return devices, calls
+
+    def records(self):
+        return [{self.signal: sig, self.channel: chan}
+                for sig, chan in [(-50, "6"), (-70, "6"), (-40, "1"),
+                                  (-55, "6")]]
+
+    def test_unit_devices_select_and_top(self, tmpdir):
+        """String equality is pushed down, thresholds apply locally."""
+        devices, calls = self.create_devices(tmpdir, self.records())
+        chan6 = [(self.channel, "==", "6")]
+        selected = list(devices.select(chan6 + [(self.signal, ">", -60)]))
+        assert [dev[self.signal] for dev in selected] == [-50, -55]
+        assert calls[0]["regex"] == [[self.channel, "^6$"]]
+        assert calls[0]["fields"] == ["kismet.device.base.key",
+                                      [self.signal, self.signal]]
+        best = devices.top(2, self.signal, conditions=chan6)
+        assert [dev[self.signal] for dev in best] == [-50, -55]
+        assert calls[1]["fields"][1] == [self.signal, self.signal]
+
+    def test_unit_devices_select_filters(self, tmpdir):
+        """Filter expressions, and local fallback with a caller regex."""
+        devices, calls = self.create_devices(tmpdir, self.records())
+        signal = Field(self.signal)
+        channel = Field(self.channel)
+        where = (channel == "1") | (signal < -60)
+        assert len(list(devices.select(where))) == 2
+        assert "regex" not in calls[0]
+        where = channel.matches("^[16]$") & (signal > -52)
+        custom = [[self.channel, "6"]]
+        selected = list(devices.select(where, regex=custom))
+        assert [dev[self.signal] for dev in selected] == [-50]
+        assert calls[1]["regex"] == custom
+        with pytest.raises(ValueError):
+            list(devices.select([("bad path//", "==", 1)]))
@@ -0,0 +1,102 @@
+"""Test AlertEmitter throttling and delivery with a stand-in endpoint."""
+import threading
+import time
+
+import pytest
+
+import kismet_rest
+from kismet_rest.emitter import TokenBucket
+from kismet_rest.emitter import parse_rate
+
+
+class FakeAlerts(object):
+    """Record alerts, optionally holding deliveries until released."""
+
+    def __init__(self):
+        self.raised = []
+        self.defined = []
+        self.release = threading.Event()
+        self.release.set()
+
+    def define(self, name, description, rate, burst, phyname):
+        self.defined.append((name, rate, burst))
+        return True
+
+    def raise_alert(self, name, text, **kwargs):
+        self.release.wait()
+        self.raised.append((name, text, kwargs))
+        return True
+
+
+class TestUnitEmitter(object):
+    """Test rate parsing, buckets and the emitter."""
+
+    def test_unit_emitter_parse_rate(self):
+        """Kismet rate strings parse to count and period."""
+        assert parse_rate("10/min") == (10, 60)
+        assert parse_rate("1/sec") == (1, 1)
+        with pytest.raises(ValueError):
+            parse_rate("often")
+
+    def test_unit_emitter_token_bucket(self):
+        """Buckets allow bursts up to capacity, then refill over time."""
+        bucket = TokenBucket(2, 10)
+        assert bucket.take(now=bucket.stamp)
+        assert bucket.take(now=bucket.stamp)
+        assert not bucket.take(now=bucket.stamp)
+        assert bucket.take(now=bucket.stamp + 5)
+
+    def test_unit_emitter_throttle(self):
+        """Alerts beyond the defined burst are queued but not sent."""
+        alerts = FakeAlerts()
+        with kismet_rest.AlertEmitter(alerts, workers=2) as emitter:
+            emitter.define("PROBE", "probe seen", rate="10/min",
+                           burst="2/sec")
+            results = [emitter.emit("PROBE", "n{}".format(x))
+                       for x in range(5)]
+            emitter.flush()
+        assert results == [True] * 5
+        assert len(alerts.raised) == 2
+        assert emitter.stats["throttled"] == 3
+        assert alerts.defined == [("PROBE", "10/min", "2/sec")]
+
+    def test_unit_emitter_coalesce_and_backpressure(self):
+        """Duplicates merge while pending and a full queue refuses more."""
+        alerts = FakeAlerts()
+        alerts.release.clear()
+        emitter = kismet_rest.AlertEmitter(alerts, max_queue=1, workers=1)
+        assert emitter.emit("A", "first", bssid="aa")
+        # The single worker may already hold "first"; wait until it does.
+        while emitter.queue.qsize():
+            time.sleep(0.001)
+        assert not emitter.emit("A", "first", bssid="aa")
+        assert emitter.emit("A", "second")
+        assert not emitter.emit("A", "third")
+        alerts.release.set()
+        emitter.close()
+        assert emitter.stats["coalesced"] == 1
+        assert emitter.stats["dropped"] == 1
+        assert emitter.stats["sent"] == 2
+        assert alerts.raised[0] == ("A", "first", {"bssid": "aa"})
+
+    def test_unit_emitter_worker_survives_errors(self):
+        """Unexpected errors fail one alert and emit is refused after close."""
+        alerts = FakeAlerts()
+        raise_alert = alerts.raise_alert
+
+        def flaky(name, text, **kwargs):
+            if text == "bad":
+                raise ValueError("unexpected")
+            return raise_alert(name, text, **kwargs)
+
+        alerts.raise_alert = flaky
+        emitter = kismet_rest.AlertEmitter(alerts, workers=1)
+        assert emitter.emit("A", "bad")
+        assert emitter.emit("A", "good")
+        emitter.flush()
+        assert emitter.stats["failed"] == 1
+        assert emitter.stats["sent"] == 1
+        assert not emitter.pending
+        emitter.close()
+        with pytest.raises(RuntimeError):
+            emitter.emit("A", "late")
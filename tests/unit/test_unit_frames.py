@@ -0,0 +1,139 @@
+"""Test building DataFrames and Arrow tables from record streams."""
+import pytest
+
+import kismet_rest
+from kismet_rest.frames import FrameBuilder
+
+DEVICES = [
+    {"kismet.device.base.macaddr": "AA:BB:CC:00:00:01",
+     "kismet.device.base.manuf": "Acme",
+     "kismet.device.base.last_time": 1700000000,
+     "kismet.common.signal.last_signal": -40,
+     "kismet.device.base.name": "one"},
+    {"kismet.device.base.macaddr": "AA:BB:CC:00:00:02",
+     "kismet.device.base.manuf": "Acme",
+     "kismet.device.base.last_time": 1700000005},
+    {"kismet.device.base.macaddr": "00:11:22:33:44:55",
+     "kismet.device.base.manuf": "Other",
+     "kismet.device.base.last_time": 1700000009,
+     "kismet.common.signal.last_signal": -70,
+     "rate": 1},
+]
+
+FIELDS = ["kismet.device.base.macaddr", "kismet.device.base.manuf",
+          "kismet.device.base.last_time",
+          ["kismet.device.base.signal/kismet.common.signal.last_signal",
+           "signal"]]
+
+
+def devices(tmpdir):
+    """Return Devices answering from DEVICES, and its transport."""
+    transport = kismet_rest.InMemoryTransport({
+        "/devices/last-time/0/devices.itjson": DEVICES})
+    return kismet_rest.Devices(session_cache=str(tmpdir.join("session")),
+                               transport=transport), transport
+
+
+class TestUnitFrames(object):
+    """Test typed column buffers and frame output."""
+
+    def test_unit_frames_columns(self):
+        """Columns are typed, padded and promoted as records arrive."""
+        builder = FrameBuilder().extend(DEVICES)
+        columns = builder.columns
+        # Columns follow the key order of the records, which is only
+        # insertion order on Python 3.7 and later.
+        assert sorted(builder.order) == sorted(
+            set(key for device in DEVICES for key in device))
+        assert builder.order[-1] == "rate"
+        assert columns["kismet.device.base.macaddr"].kind == "mac"
+        assert list(columns["kismet.device.base.macaddr"].values)[0] == \
+            0xAABBCC000001
+        assert columns["kismet.device.base.manuf"].categories == [
+            "Acme", "Other"]
+        assert columns["kismet.device.base.last_time"].kind == "int"
+        assert columns["kismet.device.base.name"].to_list() == [
+            "one", None, None]
+        assert columns["rate"].to_list() == [None, None, 1]
+        builder.append({"rate": 2.5, "kismet.device.base.macaddr": "bogus"})
+        builder.flush()
+        assert columns["rate"].kind == "float"
+        assert columns["kismet.device.base.macaddr"].to_list() == [
+            "AA:BB:CC:00:00:01", "AA:BB:CC:00:00:02", "00:11:22:33:44:55",
+            "bogus"]
+
+    def test_unit_frames_batches(self):
+        """Packing in small batches gives the same columns."""
+        records = DEVICES * 3 + [{"kismet.device.base.macaddr": None,
+                                  "kismet.device.base.manuf": None,
+                                  "rate": 2 ** 70}]
+        whole = FrameBuilder().extend(records)
+        for size in (1, 2, 5):
+            batched = FrameBuilder(batch_size=size).extend(records)
+            assert batched.order == whole.order
+            for name in whole.order:
+                assert batched.columns[name].kind == whole.columns[name].kind
+                assert batched.columns[name].to_list() == \
+                    whole.columns[name].to_list()
+        assert whole.columns["rate"].kind == "object"
+        assert whole.columns["kismet.device.base.macaddr"].missing == 1
+
+    def test_unit_frames_list_storage(self, monkeypatch):
+        """Without 8-byte array typecodes, 64-bit columns use lists."""
+        monkeypatch.setattr(kismet_rest.frames, "INT64", None)
+        monkeypatch.setattr(kismet_rest.frames, "UINT64", None)
+        records = DEVICES + [{"rate": 2 ** 70}]
+        builder = FrameBuilder(batch_size=2).extend(records)
+        expected = FrameBuilder().extend(records)
+        for name in expected.order:
+            assert builder.columns[name].kind == expected.columns[name].kind
+            assert builder.columns[name].to_list() == \
+                expected.columns[name].to_list()
+        assert isinstance(
+            builder.columns["kismet.device.base.last_time"].values, list)
+        assert builder.columns["rate"].kind == "object"
+
+    def test_unit_frames_fields(self):
+        """Requested fields and aliases name the columns."""
+        full = [{"kismet.device.base.macaddr": "AA:BB:CC:00:00:01",
+                 "kismet.device.base.signal": {
+                     "kismet.common.signal.last_signal": -40}}]
+        builder = FrameBuilder(FIELDS, types={"signal": "float"}).extend(full)
+        assert builder.order == ["kismet.device.base.macaddr",
+                                 "kismet.device.base.manuf",
+                                 "kismet.device.base.last_time", "signal"]
+        assert builder.columns["signal"].to_list() == [-40.0]
+        assert builder.columns["kismet.device.base.manuf"].to_list() == [
+            None]
+
+    def test_unit_frames_dataframe(self, tmpdir):
+        """Devices build a typed DataFrame and send the requested fields."""
+        pytest.importorskip("pandas")
+        endpoint, transport = devices(tmpdir)
+        frame = endpoint.to_dataframe(fields=FIELDS[:3])
+        assert '"fields"' in transport.sent[0][2]["json"]
+        assert list(frame.columns) == FIELDS[:3]
+        assert str(frame["kismet.device.base.macaddr"].dtype) == "uint64"
+        assert str(frame["kismet.device.base.manuf"].dtype) == "category"
+        assert str(frame["kismet.device.base.last_time"].dtype) == "int64"
+        frame = endpoint.to_dataframe()
+        assert str(frame["kismet.common.signal.last_signal"].dtype) == \
+            "Int64"
+        assert frame["kismet.common.signal.last_signal"].isna().tolist() == \
+            [False, True, False]
+
+    def test_unit_frames_arrow(self, tmpdir):
+        """Devices build an Arrow table with nulls for missing values."""
+        pyarrow = pytest.importorskip("pyarrow")
+        endpoint, _ = devices(tmpdir)
+        table = endpoint.to_arrow()
+        assert table.num_rows == 3
+        schema = table.schema
+        assert schema.field("kismet.device.base.macaddr").type == \
+            pyarrow.uint64()
+        assert pyarrow.types.is_dictionary(
+            schema.field("kismet.device.base.manuf").type)
+        assert table.column("kismet.common.signal.last_signal").to_pylist() \
+            == [-40, None, -70]
+        assert table.column("kismet.device.base.manuf").to_pylist() == [
+            "Acme", "Acme", "Other"]
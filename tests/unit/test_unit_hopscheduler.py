@@ -0,0 +1,91 @@
+"""Test HopScheduler planning with stand-in endpoints."""
+import kismet_rest
+from kismet_rest.hopscheduler import base_channel
+
+
+class FakeDevices(object):
+    """Serve a fixed device list, including devices last seen at ``ts``."""
+
+    def __init__(self, devices):
+        self.devices = devices
+        self.queries = []
+
+    def all(self, ts=0, fields=None):
+        self.queries.append((ts, fields))
+        return [dev for dev in self.devices
+                if dev["kismet.device.base.last_time"] >= ts]
+
+
+class FakeDatasources(object):
+    """List two hopping 2.4GHz radios and record configure calls."""
+
+    def __init__(self):
+        self.configured = []
+
+    def all(self, fields=None):
+        channels = ["1", "6HT40+", "6", "11"]
+        return [{"kismet.datasource.uuid": uuid,
+                 "kismet.datasource.channels": channels,
+                 "kismet.datasource.hopping": 1} for uuid in ["a", "b"]]
+
+    def configure(self, plan):
+        self.configured.append(plan)
+        return {uuid: {"success": True} for uuid in plan}
+
+
+def device(channel, last_time, key):
+    return {"kismet.device.base.channel": channel,
+            "kismet.device.base.last_time": last_time,
+            "kismet.device.base.key": key}
+
+
+class TestUnitHopScheduler(object):
+    """Test activity counting, planning and coverage."""
+
+    def create_scheduler(self, **kwargs):
+        devices = FakeDevices([device("6", 10, num) for num in range(6)] +
+                              [device("1", 11, num) for num in range(6, 9)] +
+                              [device("11", 12, 9)])
+        return kismet_rest.HopScheduler(devices, FakeDatasources(), **kwargs)
+
+    def test_unit_hopscheduler_base_channel(self):
+        """Channel variants share a base channel."""
+        assert base_channel("6HT40+") == "6"
+        assert base_channel(36) == "36"
+        assert base_channel("unknown") == "unknown"
+
+    def test_unit_hopscheduler_poll_is_incremental(self):
+        """Polls request only new devices and decay old activity."""
+        scheduler = self.create_scheduler()
+        assert scheduler.poll() == 10
+        assert scheduler.activity == {"6": 6, "1": 3, "11": 1}
+        assert scheduler.poll() == 0
+        assert scheduler.devices.queries[1][0] == 12
+        assert scheduler.activity["6"] == 3
+        # A device seen later in the boundary second is still counted.
+        scheduler.devices.devices.append(device("1", 12, 10))
+        assert scheduler.poll() == 1
+        assert scheduler.activity["1"] == 3 * 0.25 + 1
+        assert scheduler.boundary == set([9, 10])
+
+    def test_unit_hopscheduler_plan(self):
+        """Busy channels are split across sources, all channels covered."""
+        scheduler = self.create_scheduler()
+        scheduler.poll()
+        plan = scheduler.plan()
+        assert plan["a"]["channels"] == ["6HT40+"]
+        assert plan["b"]["channels"] == ["1", "11"]
+        coverage = scheduler.coverage(plan)
+        assert coverage["channels"] == 3
+        assert coverage["activity"] == 1.0
+        assert abs(coverage["dwell"] - 0.8) < 1e-9
+
+    def test_unit_hopscheduler_dry_run(self):
+        """Dry runs never configure sources."""
+        scheduler = self.create_scheduler(dry_run=True)
+        result = list(scheduler.run(interval=0, iterations=1))[0]
+        assert result["result"] == result["plan"]
+        assert scheduler.datasources.configured == []
+        scheduler.dry_run = False
+        scheduler.apply()
+        assert len(scheduler.datasources.configured) == 1
@@ -0,0 +1,41 @@
+"""Guard the cost of ``import kismet_rest``."""
+import json
+import subprocess
+import sys
+
+import pytest
+
+IMPORT_PROBE = """
+import json, sys
+import kismet_rest
+devices = kismet_rest.Devices(session_cache="/nonexistent/session")
+print(json.dumps({"modules": sorted(sys.modules)}))
+"""
+
+
+def run_probe(code):
+    """Run ``code`` in a fresh interpreter and return its JSON output."""
+    output = subprocess.check_output([sys.executable, "-c", code])
+    return json.loads(output.decode("utf-8").strip().splitlines()[-1])
+
+
+class TestUnitImport(object):
+    """Test that endpoint modules and HTTP libraries load lazily."""
+
+    @pytest.mark.skipif(sys.version_info < (3, 7),
+                        reason="module __getattr__ needs Python 3.7")
+    def test_unit_import_defers_http_stack(self):
+        """Creating an endpoint object does not import requests."""
+        modules = run_probe(IMPORT_PROBE)["modules"]
+        assert "kismet_rest.devices" in modules
+        assert "requests" not in modules
+        assert "urllib3" not in modules
+        assert "kismet_rest.legacy" not in modules
+        assert "kismet_rest.alerts" not in modules
+
+    def test_unit_import_lazy_attributes(self):
+        """Lazily-loaded names resolve and are listed by dir()."""
+        import kismet_rest
+        assert "Devices" in dir(kismet_rest)
+        assert kismet_rest.Devices.__name__ == "Devices"
+        assert kismet_rest.Utility.get_lib_version() == kismet_rest.__version__
@@ -0,0 +1,109 @@
+"""Test AdaptiveLimiter and its use by send_request."""
+import threading
+
+import pytest
+
+import kismet_rest
+from kismet_rest.transport import Transport
+from kismet_rest.transport import TransportResponse
+
+
+class FakeResponse(TransportResponse):
+    """Response with a fixed status that records whether it was closed."""
+
+    def __init__(self, status_code):
+        self.status_code = status_code
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class FakeTransport(Transport):
+    """Return scripted statuses, or raise scripted errors."""
+
+    def __init__(self, results):
+        super(FakeTransport, self).__init__()
+        self.results = list(results)
+
+    def request(self, verb, url, data=None, stream=False, timeout=None):
+        result = self.results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        if isinstance(result, TransportResponse):
+            return result
+        return FakeResponse(result)
+
+    def set_compression(self, enabled):
+        pass
+
+    def set_cookie(self, name, value):
+        pass
+
+
+class TestUnitLimiter(object):
+    """Test additive increase, multiplicative decrease and slot handling."""
+
+    def test_unit_limiter_aimd(self):
+        """Fast responses grow the limit, slow or failed ones halve it."""
+        limiter = kismet_rest.AdaptiveLimiter(initial=2, maximum=3,
+                                              latency_target=1, cooldown=10)
+        for _ in range(3):
+            limiter.observe("h", latency=0.1)
+        assert limiter.stats()["h"]["limit"] == 3
+        limiter.observe("h", latency=0.1)
+        assert limiter.stats()["h"]["increases"] == 3
+        limiter.observe("h", latency=5, now=100)
+        assert limiter.stats()["h"]["limit"] == 1
+        # Within the cooldown, a second failure is ignored.
+        limiter.observe("h", failed=True, now=105)
+        assert limiter.stats()["h"]["decreases"] == 1
+
+    def test_unit_limiter_slots(self):
+        """Acquire waits for a release, or times out."""
+        limiter = kismet_rest.AdaptiveLimiter(initial=1)
+        assert limiter.acquire("h")
+        assert not limiter.acquire("h", timeout=0.01)
+        timer = threading.Timer(0.05, limiter.release, ["h"])
+        timer.start()
+        assert limiter.acquire("h", timeout=5)
+        timer.join()
+        assert limiter.stats()["h"]["in_flight"] == 1
+
+    def test_unit_limiter_send_request(self, tmpdir):
+        """Streams hold their slot until closed; errors shrink the limit."""
+        limiter = kismet_rest.AdaptiveLimiter(initial=4, cooldown=0)
+        transport = FakeTransport([200, 200, 503,
+                                   kismet_rest.KismetConnectionError("x")])
+        interface = kismet_rest.BaseInterface(
+            host_uri="http://kismet:2501",
+            session_cache=str(tmpdir.join("session")),
+            transport=transport, limiter=limiter)
+        url = "http://kismet:2501/devices.itjson"
+        interface.send_request("GET", url)
+        assert limiter.stats()["kismet:2501"]["in_flight"] == 0
+        stream = interface.send_request("GET", url, stream=True)
+        assert limiter.stats()["kismet:2501"]["in_flight"] == 1
+        stream.close()
+        stream.close()
+        assert stream.response.closed
+        assert limiter.stats()["kismet:2501"]["in_flight"] == 0
+        interface.send_request("GET", url)
+        assert limiter.stats()["kismet:2501"]["limit"] == 2
+        with pytest.raises(kismet_rest.KismetConnectionError):
+            interface.send_request("GET", url)
+        assert limiter.stats()["kismet:2501"] == {
+            "limit": 1, "in_flight": 0, "waiting": 0, "increases": 2,
+            "decreases": 2}
+
+    def test_unit_limiter_check_drops(self):
+        """Recent dropped packets back the host off."""
+        class FakePacketchain(object):
+            def host_netloc(self):
+                return "kismet:2501"
+
+            def get_packet_stats(self, category, timeline):
+                return [0] * 55 + [0, 3, 0, 0, 0]
+        limiter = kismet_rest.AdaptiveLimiter(initial=8)
+        assert limiter.check_drops(FakePacketchain()) == 3
+        assert limiter.stats()["kismet:2501"]["limit"] == 4
@@ -0,0 +1,86 @@
+"""Test integer MAC address and OUI helpers."""
+import gzip
+import json
+
+import pytest
+
+import kismet_rest
+from kismet_rest import macs
+
+ADDRESSES = ["AA:BB:CC:00:00:02", "00:11:22:33:44:55", "AA:BB:CC:00:00:01",
+             "FF:FF:FF:FF:FF:FF"]
+
+
+class TestUnitMacs(object):
+    """Test parsing, masks, OUIs and the OUI table."""
+
+    def test_unit_macs_round_trip(self):
+        """Strings and integers convert both ways, singly and in bulk."""
+        assert macs.mac_to_int("aa:bb:cc:00:00:01") == 0xAABBCC000001
+        assert macs.int_to_mac(0xAABBCC000001) == "AA:BB:CC:00:00:01"
+        values = macs.macs_to_ints(ADDRESSES)
+        assert list(values) == [macs.mac_to_int(mac) for mac in ADDRESSES]
+        assert macs.ints_to_macs(values) == ADDRESSES
+        assert list(macs.macs_to_ints([u"aa:bb:cc:00:00:01"])) == [
+            0xAABBCC000001]
+        assert macs.sort_macs(ADDRESSES) == sorted(ADDRESSES)
+        for bad in (["AA:BB:CC:00:00"], ["AA-BB-CC-00-00-01"],
+                    ["AA:BB:CC:00:00:0G"], [None]):
+            with pytest.raises(ValueError):
+                macs.macs_to_ints(bad)
+
+    def test_unit_macs_masks(self):
+        """Masks match like Kismet's multimac, and format back."""
+        entry = "AA:BB:CC:00:00:00/FF:FF:FF:00:00:00"
+        assert macs.parse_mask(entry) == (0xAABBCC000000, macs.OUI_MASK)
+        assert macs.format_mask(entry) == entry
+        assert macs.format_mask(0x001122334455) == "00:11:22:33:44:55"
+        values = macs.macs_to_ints(ADDRESSES)
+        assert macs.match_masks(values, [entry]) == [True, False, True,
+                                                     False]
+        assert macs.match_masks(values, [entry, "00:11:22:33:44:55"]) == [
+            True, True, True, False]
+        assert macs.oui_masks([0xAABBCC, "00:11:22", "AA-BB-CC"]) == [
+            "00:11:22:00:00:00/FF:FF:FF:00:00:00", entry]
+        assert list(macs.ouis(values)) == [0xAABBCC, 0x001122, 0xAABBCC,
+                                           0xFFFFFF]
+
+    def test_unit_macs_numpy(self):
+        """numpy arrays are matched with vectorized operations."""
+        numpy = pytest.importorskip("numpy")
+        values = numpy.frombuffer(macs.macs_to_ints(ADDRESSES),
+                                  dtype=numpy.uint64)
+        result = macs.match_masks(values, macs.oui_masks([0xAABBCC]))
+        assert result.tolist() == [True, False, True, False]
+        assert macs.ouis(values).tolist()[1] == 0x001122
+
+    def test_unit_macs_oui_table(self, tmpdir):
+        """OUI files load into a table keyed by integer."""
+        path = tmpdir.join("manuf.txt.gz")
+        with gzip.open(str(path), "wb") as manuf:
+            manuf.write(b"# comment\n"
+                        b"AA:BB:CC\tAcme Corp\n"
+                        b"00-11-22   (hex)\t\tOther Inc\n"
+                        b"001122     (base 16)\t\tOther Inc\n"
+                        b"00:55:DA:50:00:00/28\tPrefix\n")
+        table = kismet_rest.OuiTable.load(str(path))
+        assert len(table) == 2
+        assert table.lookup("AA:BB:CC:00:00:01") == "Acme Corp"
+        assert table.lookup(0x001122334455) == "Other Inc"
+        assert table.lookup_many(macs.macs_to_ints(ADDRESSES), "?") == [
+            "Acme Corp", "Other Inc", "Acme Corp", "?"]
+        assert table.masks_for("ACME") == [
+            "AA:BB:CC:00:00:00/FF:FF:FF:00:00:00"]
+
+    def test_unit_macs_by_oui(self, tmpdir):
+        """by_oui sends a multimac mask list; by_mac formats integers."""
+        transport = kismet_rest.InMemoryTransport({
+            "/devices/multimac/devices.itjson": []})
+        devices = kismet_rest.Devices(
+            session_cache=str(tmpdir.join("session")), transport=transport)
+        assert list(devices.by_oui([0xAABBCC])) == []
+        assert list(devices.by_mac(devices=[0x001122334455])) == []
+        sent = [json.loads(data["json"])["devices"]
+                for _, _, data in transport.sent]
+        assert sent == [["AA:BB:CC:00:00:00/FF:FF:FF:00:00:00"],
+                        ["00:11:22:33:44:55"]]
@@ -0,0 +1,90 @@
+"""Test DatasourceMonitor with a scripted datasource endpoint."""
+import kismet_rest
+
+
+class ScriptedDatasources(object):
+    """Return successive source snapshots, one per poll."""
+
+    def __init__(self, snapshots):
+        self.snapshots = list(snapshots)
+        self.fields = []
+
+    def all(self, fields=None):
+        self.fields.append(fields)
+        return self.snapshots.pop(0)
+
+
+def source(packets, errors=0, error=0, running=1, uuid="u1"):
+    return {"kismet.datasource.uuid": uuid,
+            "kismet.datasource.name": "wlan0",
+            "kismet.datasource.running": running,
+            "kismet.datasource.num_packets": packets,
+            "kismet.datasource.num_error_packets": errors,
+            "kismet.datasource.error": error,
+            "kismet.datasource.error_reason": "gone" if error else ""}
+
+
+class TestUnitMonitor(object):
+    """Test rates, stall detection and error callbacks."""
+
+    def test_unit_monitor_rates(self):
+        """Rates span the requested window of samples."""
+        datasources = ScriptedDatasources([[source(100)], [source(200, 1)],
+                                           [source(500, 3)]])
+        monitor = kismet_rest.DatasourceMonitor(datasources)
+        for now in [0, 10, 20]:
+            monitor.poll(now=now)
+        assert datasources.fields[0] == monitor.fields
+        assert monitor.rates()["u1"] == {"packets": 20.0, "errors": 0.15}
+        assert monitor.rates(window=2)["u1"]["packets"] == 30.0
+
+    def test_unit_monitor_stall_and_recover(self):
+        """Stalls fire once, recovery fires when packets resume."""
+        calls = []
+        datasources = ScriptedDatasources(
+            [[source(10)], [source(10)], [source(10)], [source(10)],
+             [source(11)]])
+        monitor = kismet_rest.DatasourceMonitor(
+            datasources, stall_after=15,
+            on_stall=lambda uuid, info: calls.append(("stall", info["idle"])),
+            on_recover=lambda uuid, info: calls.append(("recover", uuid)))
+        for now in [0, 10, 20, 30, 40]:
+            monitor.poll(now=now)
+        assert calls == [("stall", 20), ("recover", "u1")]
+
+    def test_unit_monitor_errors(self):
+        """Error state and error packet increases raise error events."""
+        datasources = ScriptedDatasources(
+            [[source(1)], [source(2, errors=4)], [source(3, 4, error=1)],
+             [source(4, 4, error=1)]])
+        monitor = kismet_rest.DatasourceMonitor(datasources)
+        events = [monitor.poll(now=now) for now in range(4)]
+        assert events[0] == []
+        assert events[1][0][2]["new_errors"] == 4
+        assert events[2][0][2]["reason"] == "gone"
+        assert events[3] == []
+
+    def test_unit_monitor_sources_come_and_go(self):
+        """New sources are rated from their first poll, gone ones dropped."""
+        datasources = ScriptedDatasources(
+            [[source(0)],
+             [source(10), source(0, uuid="u2")],
+             [source(40, errors=2), source(50, uuid="u2"),
+              source(0, uuid="u3")],
+             [source(80, uuid="u2"), source(5, uuid="u3")]])
+        monitor = kismet_rest.DatasourceMonitor(datasources, history=3,
+                                                stall_after=1)
+        for now in range(0, 30, 10):
+            monitor.poll(now=now)
+        rates = monitor.rates()
+        assert rates["u1"] == {"packets": 2.0, "errors": 0.1}
+        assert rates["u2"]["packets"] == 5.0
+        assert rates["u3"]["packets"] == 0.0
+        assert monitor.rates(window=0)["u1"]["packets"] == 0.0
+        monitor.stalled.add("u1")
+        monitor.poll(now=30)
+        assert sorted(monitor.rates()) == ["u2", "u3"]
+        assert "u1" not in monitor.names
+        assert "u1" not in monitor.stalled
+        assert monitor.rates()["u2"]["packets"] == 4.0
+        assert monitor.rates(window=2)["u3"]["packets"] == 0.5
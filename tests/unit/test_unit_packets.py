@@ -0,0 +1,179 @@
+"""Test Packets capture to disk with a synthetic pcapng stream."""
+import struct
+
+import pytest
+
+import kismet_rest
+import kismet_rest.packets
+
+
+def block(block_type, body):
+    length = 12 + len(body)
+    return (struct.pack("<II", block_type, length) + body +
+            struct.pack("<I", length))
+
+
+SHB = block(0x0A0D0D0A, b"\x4d\x3c\x2b\x1a" + b"\x01\x00\x00\x00" +
+            b"\xff" * 8)
+IDB = block(1, b"\x7f\x00\x00\x00\x00\x00\x00\x00")
+
+
+def epb(number):
+    return block(6, struct.pack("<IIIII", 0, 0, number, 4, 4) + b"abcd")
+
+
+class TestUnitPackets(object):
+    """Test URL selection, pass-through capture and rotation."""
+
+    def create_packets(self, tmpdir, chunks):
+        packets = kismet_rest.Packets(
+            session_cache=str(tmpdir.join("session")))
+        requested = []
+
+        def interact_raw(verb, url_path, chunk_size=None, **kwargs):
+            requested.append(url_path)
+            for chunk in chunks:
+                yield chunk
+        packets.interact_raw = interact_raw
+        return packets, requested
+
+    def test_unit_packets_url_for(self, tmpdir):
+        """Captures can be filtered by datasource or device, not both."""
+        packets, _ = self.create_packets(tmpdir, [])
+        assert packets.url_for() == "pcap/all_packets.pcapng"
+        assert packets.url_for(uuid="u1") == \
+            "datasource/pcap/by-uuid/u1/packets.pcapng"
+        assert packets.url_for(device_key="k1") == \
+            "devices/pcap/by-key/k1/packets.pcapng"
+        with pytest.raises(ValueError):
+            packets.url_for(uuid="u1", device_key="k1")
+
+    def test_unit_packets_capture_passthrough(self, tmpdir):
+        """Without limits the stream is written unchanged."""
+        data = SHB + IDB + epb(1) + epb(2)
+        chunks = [data[:5], data[5:50], data[50:]]
+        packets, requested = self.create_packets(tmpdir, chunks)
+        path = str(tmpdir.join("all.pcapng"))
+        stats = packets.capture(path, uuid="u1")
+        assert requested == ["datasource/pcap/by-uuid/u1/packets.pcapng"]
+        assert stats["files"] == [path]
+        assert stats["bytes"] == len(data)
+        assert stats["packets"] is None
+        with open(path, "rb") as capture:
+            assert capture.read() == data
+
+    def test_unit_packets_capture_rotate(self, tmpdir):
+        """Rotated files split on block boundaries and repeat the headers."""
+        data = SHB + IDB + b"".join(epb(num) for num in range(6))
+        # Split mid-block to exercise partial block buffering.
+        chunks = [data[index:index + 7] for index in range(0, len(data), 7)]
+        packets, _ = self.create_packets(tmpdir, chunks)
+        path = str(tmpdir.join("rot.pcapng"))
+        rotate = len(SHB) + len(IDB) + 2 * len(epb(0))
+        stats = packets.capture(path, rotate_bytes=rotate)
+        assert stats["packets"] == 6
+        assert [name[-15:] for name in stats["files"]] == \
+            ["rot-0000.pcapng", "rot-0001.pcapng", "rot-0002.pcapng"]
+        for index, name in enumerate(stats["files"]):
+            with open(name, "rb") as capture:
+                assert capture.read() == (SHB + IDB + epb(2 * index) +
+                                          epb(2 * index + 1))
+
+    def test_unit_packets_capture_rotate_small(self, tmpdir):
+        """Every rotated file holds a packet, even below the header size."""
+        data = SHB + IDB + b"".join(epb(num) for num in range(3))
+        packets, _ = self.create_packets(tmpdir, [data])
+        path = str(tmpdir.join("small.pcapng"))
+        stats = packets.capture(path, rotate_bytes=10)
+        assert len(stats["files"]) == 3
+        for index, name in enumerate(stats["files"]):
+            with open(name, "rb") as capture:
+                assert capture.read() == SHB + IDB + epb(index)
+
+    def test_unit_packets_capture_corrupt(self, tmpdir):
+        """A block with an invalid length stops the capture."""
+        data = SHB + IDB + epb(0) + struct.pack("<II", 6, 13) + b"\x00" * 8
+        packets, _ = self.create_packets(tmpdir, [data])
+        path = str(tmpdir.join("bad.pcapng"))
+        with pytest.raises(ValueError):
+            packets.capture(path, max_bytes=1000)
+        with open(path, "rb") as capture:
+            assert capture.read() == SHB + IDB + epb(0)
+
+    def test_unit_packets_capture_max_bytes(self, tmpdir):
+        """Captures stop after the byte limit, ending on a whole block."""
+        data = SHB + IDB + b"".join(epb(num) for num in range(4))
+        packets, _ = self.create_packets(tmpdir, [data[:60], data[60:]])
+        path = str(tmpdir.join("max.pcapng"))
+        stats = packets.capture(path, max_bytes=10)
+        assert stats["packets"] == 0
+        with open(path, "rb") as capture:
+            assert capture.read() == SHB + IDB
+
+
+class TestUnitPcapngParser(object):
+    """Test incremental parsing of a pcapng stream."""
+
+    def test_unit_pcapng_parser_split_chunks(self):
+        """Packets split across chunks are joined, others are views."""
+        tsresol = struct.pack("<HHB", 9, 1, 3) + b"\x00" * 3
+        idb = block(1, struct.pack("<HHI", 127, 0, 65535) + tsresol +
+                    b"\x00" * 4)
+        data = SHB + idb + b"".join(epb(num) for num in range(5))
+        parser = kismet_rest.packets.PcapngParser()
+        packets = []
+        for index in range(0, len(data), 50):
+            packets.extend(parser.feed(data[index:index + 50]))
+        assert len(packets) == 5
+        assert parser.partial == b""
+        assert [packet.timestamp for packet in packets] == \
+            [num / 1000.0 for num in range(5)]
+        assert all(packet.linktype == 127 for packet in packets)
+        assert all(isinstance(packet.data, memoryview) for packet in packets)
+        assert packets[3].data.tobytes() == b"abcd"
+        assert packets[3].original_length == 4
+
+    def test_unit_pcapng_parser_partial_block(self):
+        """Only the split block is buffered; the rest of the chunk is not."""
+        data = SHB + IDB + b"".join(epb(num) for num in range(4))
+        split = len(SHB) + len(IDB) + 5
+        parser = kismet_rest.packets.PcapngParser()
+        for index in range(split):
+            assert parser.feed(data[index:index + 1]) == []
+        rest = data[split:]
+        packets = parser.feed(rest)
+        assert len(packets) == 4
+        assert parser.partial == b""
+        assert all(packet.buffer is packets[1].buffer
+                   for packet in packets[2:])
+        if hasattr(packets[0].data, "obj"):
+            assert packets[0].data.obj is not rest
+            assert all(packet.data.obj is rest for packet in packets[1:])
+        assert [packet.data.tobytes() for packet in packets] == [
+            packet.data.tobytes() for packet in
+            kismet_rest.packets.PcapngParser().feed(data)]
+
+    def test_unit_pcapng_parser_big_endian(self):
+        """Section byte order is honoured."""
+        def be_block(block_type, body):
+            length = 12 + len(body)
+            return (struct.pack(">II", block_type, length) + body +
+                    struct.pack(">I", length))
+        data = (be_block(0x0A0D0D0A, b"\x1a\x2b\x3c\x4d" + b"\x00\x01" +
+                         b"\x00\x00" + b"\xff" * 8) +
+                be_block(1, struct.pack(">HHI", 1, 0, 0)) +
+                be_block(6, struct.pack(">IIIII", 0, 0, 2000000, 2, 60) +
+                         b"hi\x00\x00"))
+        packets = kismet_rest.packets.PcapngParser().feed(data)
+        assert packets[0].timestamp == 2.0
+        assert packets[0].original_length == 60
+        assert packets[0].data.tobytes() == b"hi"
+
+    def test_unit_packets_batches(self, tmpdir):
+        """Batches of the requested size, with a short final batch."""
+        data = SHB + IDB + b"".join(epb(num) for num in range(5))
+        packets, _ = TestUnitPackets().create_packets(
+            tmpdir, [data[:100], data[100:]])
+        sizes = [len(batch) for batch in packets.batches(size=2)]
+        assert sizes == [2, 2, 1]
+        assert len(list(packets.packets())) == 5
@@ -0,0 +1,61 @@
+"""Test line-aligned chunking and parallel decoding."""
+import json
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
+
+import kismet_rest
+from kismet_rest import parallel
+from kismet_rest.query import Field
+
+
+def body(count):
+    return b"".join(json.dumps({"n": num, "name": "dev{}".format(num)})
+                    .encode("utf-8") + b"\n" for num in range(count))
+
+
+class TestUnitParallel(object):
+    """Test chunking, transforms and in-order delivery."""
+
+    def test_unit_parallel_line_chunks(self):
+        """Chunks end on newlines and lose no bytes."""
+        data = body(100)
+        pieces = [data[index:index + 37] for index in range(0, len(data), 37)]
+        chunks = list(parallel.line_chunks(pieces, chunk_bytes=200))
+        assert b"".join(chunks) == data
+        assert all(chunk.endswith(b"\n") for chunk in chunks)
+        assert len(chunks) > 5
+        assert list(parallel.line_chunks([b"{}\n{", b"}"], 1)) == \
+            [b"{}\n", b"{}"]
+
+    def test_unit_parallel_processes(self):
+        """Records come back in order, filtered and projected in workers."""
+        data = body(300)
+        chunks = parallel.line_chunks([data], chunk_bytes=500)
+        transform = parallel.ChunkTransform(where=Field("n") >= 100,
+                                            fields=["name"])
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            results = list(parallel.decode_parallel(chunks, executor,
+                                                    transform, window=3))
+        records = [record for result in results for record in result]
+        assert records == [{"name": "dev{}".format(num)}
+                           for num in range(100, 300)]
+
+    def test_unit_parallel_devices(self, tmpdir):
+        """Devices.all_parallel streams raw bytes into the decoders."""
+        devices = kismet_rest.Devices(
+            session_cache=str(tmpdir.join("session")))
+        calls = []
+
+        def interact_raw(verb, url_path, **kwargs):
+            calls.append((verb, url_path, kwargs))
+            data = body(50)
+            for index in range(0, len(data), 64):
+                yield data[index:index + 64]
+        devices.interact_raw = interact_raw
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            found = list(devices.all_parallel(
+                executor=executor, chunk_bytes=128, ts=5,
+                fields=["n", "name"], where=Field("n") < 10, ordered=False))
+        assert sorted(record["n"] for record in found) == list(range(10))
+        assert calls == [("POST", "devices/last-time/5/devices.itjson",
+                          {"payload": {"fields": ["n", "name"]}})]
@@ -0,0 +1,83 @@
+"""Test streaming query helpers."""
+import pytest
+
+from kismet_rest import query
+
+SIGNAL = "kismet.device.base.signal/kismet.common.signal.last_signal"
+
+
+class TestUnitQuery(object):
+    """Test field lookup, conditions and the top-N heap."""
+
+    def test_unit_query_get_field(self):
+        """Aliased paths are found directly, full records by walking."""
+        assert query.get_field({SIGNAL: -50}, SIGNAL) == -50
+        nested = {"kismet.device.base.signal":
+                  {"kismet.common.signal.last_signal": -40}}
+        assert query.get_field(nested, SIGNAL) == -40
+        assert query.get_field({}, SIGNAL, "none") == "none"
+        assert query.get_field({"kismet.device.base.signal": 0}, SIGNAL) \
+            is None
+
+    def test_unit_query_conditions(self):
+        """All conditions must hold and missing fields never match."""
+        match = query.compile_conditions([(SIGNAL, ">", -60),
+                                          ("channel", "==", "6")])
+        assert match({SIGNAL: -50, "channel": "6"})
+        assert not match({SIGNAL: -70, "channel": "6"})
+        assert not match({"channel": "6"})
+        with pytest.raises(ValueError):
+            query.compile_conditions([(SIGNAL, "~", 1)])
+
+    def test_unit_query_top_n(self):
+        """Only N records are kept, best first, ties in arrival order."""
+        records = ({"n": num, "v": value} for num, value in
+                   enumerate([3, None, 9, 1, 9, 5]))
+        best = query.top_n(records, 3, key=lambda rec: rec["v"])
+        assert [rec["n"] for rec in best] == [2, 4, 5]
+        records = [{"v": value} for value in [3, 9, 1]]
+        worst = query.top_n(records, 2, key=lambda rec: rec["v"],
+                            largest=False)
+        assert [rec["v"] for rec in worst] == [1, 3]
+        assert query.top_n(records, 0, key=lambda rec: rec["v"]) == []
+
+    def test_unit_query_plan(self):
+        """Pushable parts go to the server, the rest stays local."""
+        ssid = query.Field("dot11.device/dot11.device.last_beaconed_ssid")
+        signal = query.Field(SIGNAL)
+        regex, local = query.plan(ssid.matches("^A") | (ssid == "B.C"))
+        assert regex == [[ssid.path, "^A"], [ssid.path, "^B\\.C$"]]
+        assert local is None
+        where = ((ssid.matches("^A") | ssid.matches("^B")) &
+                 (signal > -60) & (query.Field("chan") == "6"))
+        regex, local = query.plan(where)
+        assert regex == [["chan", "^6$"]]
+        assert local.paths() == [ssid.path, SIGNAL]
+        assert local({ssid.path: "Bob", SIGNAL: -10})
+        assert not local({ssid.path: "Carl", SIGNAL: -10})
+        regex, local = query.plan(signal > 0)
+        assert regex is None and local is not None
+        assert query.plan(where, pushdown=False) == (None, where)
+
+    def test_unit_query_validation(self):
+        """Bad paths, patterns and regex specs fail before any request."""
+        for path in ["", "a//b", "/a", "a b", None]:
+            with pytest.raises(ValueError):
+                query.Field(path)
+        with pytest.raises(ValueError):
+            query.Field("a").matches("(unclosed")
+        for spec in ["x", [["a"]], [["a b", "x"]], [["a", 1]],
+                     query.Field("a") > 1]:
+            with pytest.raises(ValueError):
+                query.validate_regex(spec)
+        assert query.validate_regex([["a/b", "^x"]]) == [["a/b", "^x"]]
+        assert query.validate_regex([]) is None
+        assert query.validate_regex(query.Field("a").matches("^x")) == [
+            ["a", "^x"]]
+
+    def test_unit_query_match_maps(self):
+        """Local matches look inside maps and lists."""
+        match = query.Field("ssids").matches("^Corp")
+        assert match({"ssids": {"1": "Home", "2": "CorpNet"}})
+        assert match({"ssids": ["CorpNet"]})
+        assert not match({"ssids": None})
@@ -0,0 +1,41 @@
+"""Test lazily decoded records."""
+import json
+
+import kismet_rest
+from kismet_rest.records import LazyRecord
+from kismet_rest.resumable import record_digest
+
+
+class TestUnitRecords(object):
+    """Test LazyRecord behaviour and the lazy_records option."""
+
+    def test_unit_records_decode_on_access(self):
+        """The raw line is decoded once, on first read."""
+        record = LazyRecord(b'{"a": 1, "b": {"c": [1, 2]}}')
+        assert not record.decoded
+        assert record.raw == b'{"a": 1, "b": {"c": [1, 2]}}'
+        assert record["b"]["c"] == [1, 2]
+        assert record.decoded
+        assert record.raw is None
+        assert record.get("missing", 3) == 3
+        record["d"] = 4
+        assert dict(record) == {"a": 1, "b": {"c": [1, 2]}, "d": 4}
+        assert record == LazyRecord(json.dumps(dict(record)))
+        assert json.loads(json.dumps(record.decode()))["d"] == 4
+
+    def test_unit_records_digest_without_decoding(self):
+        """Record digests of undecoded records use the raw line."""
+        record = LazyRecord(b'{"a": 1}')
+        assert record_digest(record) == record_digest(LazyRecord(b'{"a": 1}'))
+        assert not record.decoded
+
+    def test_unit_records_option(self, tmpdir):
+        """Streamed lines become lazy records when the option is set."""
+        devices = kismet_rest.Devices(
+            session_cache=str(tmpdir.join("session")))
+        assert devices.decode_line(b'{"a": 1}') == {"a": 1}
+        lazy = devices.with_options(lazy_records=True)
+        record = lazy.decode_line(b'{"a": 1}')
+        assert isinstance(record, LazyRecord)
+        assert record["a"] == 1
+        assert not devices.lazy_records
@@ -0,0 +1,106 @@
+"""Test ResumableStream with simulated connection drops."""
+import time
+
+import pytest
+
+import kismet_rest
+from kismet_rest.resumable import ResumableStream
+
+
+def flaky(records, fail_after, starts):
+    """Return an open_stream function failing once after ``fail_after``."""
+    state = {"failed": False}
+
+    def open_stream(position):
+        starts.append(position)
+        for count, record in enumerate(records):
+            if position is not None and record["ts"] < position:
+                continue
+            if count == fail_after and not state["failed"]:
+                state["failed"] = True
+                raise kismet_rest.KismetConnectionError("dropped")
+            yield record
+    return open_stream
+
+
+class TestUnitResumable(object):
+    """Test resuming with and without a cursor."""
+
+    def test_unit_resumable_cursor(self):
+        """Resume at the last timestamp without repeating records."""
+        records = [{"ts": 1, "n": 0}, {"ts": 2, "n": 1}, {"ts": 2, "n": 2},
+                   {"ts": 3, "n": 3}]
+        starts = []
+        stream = ResumableStream(flaky(records, 3, starts),
+                                 identity=lambda rec: rec["n"],
+                                 cursor=lambda rec: rec["ts"], backoff=0)
+        assert list(stream) == records
+        assert starts == [None, 2]
+        assert stream.resumes == 1
+        assert stream.duplicates == 2
+
+    def test_unit_resumable_identity_only(self):
+        """Without a cursor, restart and skip every delivered record."""
+        records = [{"ts": 0, "n": x} for x in range(5)]
+        starts = []
+        stream = ResumableStream(flaky(records, 3, starts),
+                                 identity=lambda rec: rec["n"], backoff=0)
+        assert list(stream) == records
+        assert starts == [None, None]
+        assert stream.duplicates == 3
+
+    def test_unit_resumable_gives_up(self):
+        """Failures without progress beyond ``attempts`` are raised."""
+        def open_stream(position):
+            raise kismet_rest.KismetConnectionError("refused")
+        stream = ResumableStream(open_stream, identity=id, attempts=2,
+                                 backoff=0)
+        with pytest.raises(kismet_rest.KismetConnectionError):
+            list(stream)
+        assert stream.resumes == 2
+
+    def test_unit_resumable_overlap_only(self):
+        """Identities are only computed for the overlap window."""
+        records = [{"ts": 1, "n": 0}, {"ts": 2, "n": 1}, {"ts": 2, "n": 2},
+                   {"ts": 3, "n": 3}, {"ts": 3, "n": 4}, {"ts": 4, "n": 5}]
+        identified = []
+
+        def identity(record):
+            identified.append(record["n"])
+            return record["n"]
+        stream = ResumableStream(flaky(records, 6, []), identity=identity,
+                                 cursor=lambda rec: rec["ts"], backoff=0)
+        assert list(stream) == records
+        assert identified == []
+        stream = ResumableStream(flaky(records, 3, []), identity=identity,
+                                 cursor=lambda rec: rec["ts"], backoff=0)
+        assert list(stream) == records
+        assert sorted(identified) == [1, 1, 2, 2]
+        assert stream.duplicates == 2
+
+    def test_unit_resumable_fatal_errors(self):
+        """Timeouts, open circuits and expired deadlines are not retried."""
+        for error in (kismet_rest.KismetTimeoutError("slow"),
+                      kismet_rest.KismetCircuitOpenError("open")):
+            def open_stream(position, error=error):
+                raise error
+            stream = ResumableStream(open_stream, identity=id, backoff=0)
+            with pytest.raises(type(error)):
+                list(stream)
+            assert stream.resumes == 0
+
+        def refused(position):
+            raise kismet_rest.KismetConnectionError("refused")
+        stream = ResumableStream(refused, identity=id, backoff=0,
+                                 deadline_at=time.time() - 1)
+        with pytest.raises(kismet_rest.KismetTimeoutError):
+            list(stream)
+        assert stream.resumes == 0
+
+    def test_unit_resumable_callback(self):
+        """Records are passed to a callback when one is given."""
+        seen = []
+        stream = ResumableStream(lambda position: iter([1, 2]),
+                                 identity=lambda rec: rec)
+        assert list(stream.deliver(seen.append)) == []
+        assert seen == [1, 2]
@@ -0,0 +1,63 @@
+"""Test SnapshotDiff change detection."""
+import pytest
+
+import kismet_rest
+
+KEY = "kismet.device.base.key"
+CHANNEL = "kismet.device.base.channel"
+SSID = "dot11.device/dot11.device.last_beaconed_ssid"
+
+
+def device(key, channel, ssid):
+    return {KEY: key, CHANNEL: channel, SSID: ssid}
+
+
+class FakeDevices(object):
+    """Return the next sweep on each call."""
+
+    def __init__(self, sweeps):
+        self.sweeps = list(sweeps)
+        self.calls = []
+
+    def all(self, **kwargs):
+        self.calls.append(kwargs)
+        return iter(self.sweeps.pop(0))
+
+
+class TestUnitSnapshot(object):
+    """Test added, changed and removed events."""
+
+    def test_unit_snapshot_sweeps(self):
+        """Events describe the differences between consecutive sweeps."""
+        devices = FakeDevices([
+            [device("a", "1", "home"), device("b", "6", "corp")],
+            [device("a", "1", "home"), device("b", "11", "corp2"),
+             device("c", "6", None)],
+        ])
+        diff = kismet_rest.SnapshotDiff([CHANNEL, SSID])
+        first = list(diff.sweep(devices))
+        assert [(ev["event"], ev["key"]) for ev in first] == [
+            ("added", "a"), ("added", "b")]
+        assert devices.calls[0]["fields"] == [KEY, [CHANNEL, CHANNEL],
+                                              [SSID, SSID]]
+        second = list(diff.sweep(devices))
+        assert [(ev["event"], ev["key"], ev["fields"]) for ev in second] == [
+            ("changed", "b", [CHANNEL, SSID]), ("added", "c", [])]
+        third = list(diff.update([device("c", "6", None)]))
+        assert sorted((ev["event"], ev["key"]) for ev in third) == [
+            ("removed", "a"), ("removed", "b")]
+        assert list(diff.state) == ["c"]
+        assert len(diff.state["c"]) == 16
+
+    def test_unit_snapshot_sweep_kwargs(self):
+        """Extra fields are merged into the request and ts is refused."""
+        devices = FakeDevices([[device("a", "1", "home")]])
+        diff = kismet_rest.SnapshotDiff([CHANNEL])
+        events = list(diff.sweep(devices, fields=[KEY, "extra"],
+                                 regex=[[SSID, "^h"]]))
+        assert [ev["event"] for ev in events] == ["added"]
+        assert devices.calls[0] == {"fields": [KEY, [CHANNEL, CHANNEL],
+                                               "extra"],
+                                    "regex": [[SSID, "^h"]]}
+        with pytest.raises(ValueError):
+            list(diff.sweep(devices, ts=5))
@@ -0,0 +1,216 @@
+"""Test transport helpers that do not need a Kismet server."""
+import gzip
+import json
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import kismet_rest
+from kismet_rest.transport import split_lines
+
+try:
+    from http.server import BaseHTTPRequestHandler
+    from socketserver import ThreadingMixIn
+    from socketserver import UnixStreamServer
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler
+    from SocketServer import ThreadingMixIn
+    from SocketServer import UnixStreamServer
+
+
+class UnixHTTPServer(ThreadingMixIn, UnixStreamServer):
+    """HTTP server listening on a Unix socket, one thread per connection."""
+
+    daemon_threads = True
+
+    def get_request(self):
+        request, _ = UnixStreamServer.get_request(self)
+        # BaseHTTPRequestHandler expects a (host, port) client address.
+        return request, ("local", 0)
+
+
+class StatusHandler(BaseHTTPRequestHandler):
+    """Echo the request path and Host header as JSON."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = json.dumps({"path": self.path,
+                           "host": self.headers["Host"]}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def mock_http2(handler):
+    """Return an HTTP2Transport whose client calls ``handler``."""
+    httpx = pytest.importorskip("httpx")
+    pytest.importorskip("h2")
+    transport = kismet_rest.HTTP2Transport()
+    transport.client.close()
+    transport.client = httpx.Client(transport=httpx.MockTransport(handler),
+                                    timeout=None)
+    transport.set_compression(True)
+    return transport
+
+
+class TestUnitTransport(object):
+    """Test transport selection and line splitting."""
+
+    def test_unit_transport_create_by_name(self):
+        """Transports are built by name."""
+        transport = kismet_rest.Transport.create("requests")
+        assert isinstance(transport, kismet_rest.RequestsTransport)
+
+    def test_unit_transport_create_passthrough(self):
+        """Transport instances are returned unchanged."""
+        transport = kismet_rest.RequestsTransport()
+        assert kismet_rest.Transport.create(transport) is transport
+
+    def test_unit_transport_create_unknown(self):
+        """Unknown transport names are rejected."""
+        with pytest.raises(ValueError):
+            kismet_rest.Transport.create("carrier-pigeon")
+
+    def test_unit_transport_split_lines(self):
+        """Lines spanning chunk boundaries are reassembled."""
+        chunks = [b'{"a": 1}\n{"a"', b': 2}\r\n', b'{"a": 3}']
+        result = list(split_lines(chunks))
+        assert result == [b'{"a": 1}', b'{"a": 2}', b'{"a": 3}']
+
+    def test_unit_transport_split_lines_any_chunking(self):
+        """Every way of cutting the stream gives the same lines."""
+        body = b'{"a": 1}\r\n{"b": 22}\n\n{"c": 333}\r\n{"d": 4}'
+        expected = [b'{"a": 1}', b'{"b": 22}', b'', b'{"c": 333}',
+                    b'{"d": 4}']
+        for size in range(1, len(body) + 1):
+            chunks = [body[index:index + size]
+                      for index in range(0, len(body), size)]
+            assert list(split_lines(chunks)) == expected
+        assert all(isinstance(line, bytes)
+                   for line in split_lines([b"ab", b"c\nd"]))
+        # A final line without a newline loses its CR like the others.
+        for chunks in ([b'{"e": 5}\r'], [b'{"e"', b': 5}\r'],
+                       [b'{"e": 5}', b'\r']):
+            assert list(split_lines(chunks)) == [b'{"e": 5}']
+
+    def test_unit_transport_in_memory(self, tmpdir):
+        """Endpoints run against routes held in memory."""
+        transport = kismet_rest.InMemoryTransport({
+            "/system/status.json": {"uptime": 5},
+            "/devices/all_devices.itjson": [{"n": 1}, {"n": 2}],
+            "/alerts/ack.cmd": lambda verb, path, data: (500, "nope"),
+        })
+        interface = kismet_rest.BaseInterface(
+            host_uri="http://kismet:2501",
+            session_cache=str(tmpdir.join("session")), transport=transport)
+        assert interface.interact("GET", "system/status.json") == {
+            "uptime": 5}
+        assert list(interface.interact_yield(
+            "GET", "devices/all_devices.itjson")) == [{"n": 1}, {"n": 2}]
+        with pytest.raises(kismet_rest.KismetLoginException):
+            interface.interact("POST", "alerts/ack.cmd", only_status=True)
+        with pytest.raises(kismet_rest.KismetRequestException):
+            interface.interact("GET", "gps/location.json", only_status=True)
+        assert transport.sent[-2][0] == "POST"
+        assert transport.sent[-1] == ("GET", "/gps/location.json", None)
+
+    @pytest.mark.skipif(not hasattr(socket, "AF_UNIX"),
+                        reason="Unix sockets not supported")
+    def test_unit_transport_unix_socket(self, tmpdir):
+        """Requests reach a server listening on a Unix socket."""
+        path = str(tmpdir.join("kismet.sock"))
+        server = UnixHTTPServer(path, StatusHandler)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        transport = kismet_rest.UnixSocketTransport(path)
+        try:
+            for host_uri, host in (("http://kismet/", "kismet"),
+                                   ("http://sensor:2501/", "sensor:2501")):
+                interface = kismet_rest.BaseInterface(
+                    host_uri=host_uri,
+                    session_cache=str(tmpdir.join("session")),
+                    transport=transport)
+                for _ in range(2):
+                    assert interface.interact(
+                        "GET", "system/status.json") == {
+                            "path": "/system/status.json", "host": host}
+        finally:
+            transport.close()
+            server.shutdown()
+            server.server_close()
+            thread.join()
+
+    def test_unit_transport_http2_requests(self, tmpdir):
+        """HTTP/2 requests keep the session cookie of their own host."""
+        httpx = pytest.importorskip("httpx")
+
+        def handler(request):
+            if request.url.path == "/down.json":
+                raise httpx.ConnectError("refused", request=request)
+            return httpx.Response(200, json={"path": request.url.path},
+                                  headers={"Set-Cookie": "KISMET=fresh"})
+        transport = mock_http2(handler)
+        transport.client.cookies.set("KISMET", "other", domain="zz.example")
+        transport.set_cookie("KISMET", "cached")
+        session = tmpdir.join("session")
+        interface = kismet_rest.BaseInterface(
+            host_uri="http://kismet:2501", session_cache=str(session),
+            transport=transport)
+        assert interface.interact("GET", "system/status.json") == {
+            "path": "/system/status.json"}
+        assert transport.get_cookie("KISMET", "kismet") == "fresh"
+        assert transport.get_cookie("KISMET", "elsewhere") == "cached"
+        interface.update_session()
+        assert session.read() == "fresh"
+        with pytest.raises(kismet_rest.KismetConnectionError):
+            interface.interact("GET", "down.json")
+        transport.close()
+
+    def test_unit_transport_http2_stream(self, tmpdir):
+        """Streamed gzip bodies decode line by line and count wire bytes."""
+        httpx = pytest.importorskip("httpx")
+        records = [{"n": num, "name": "device"} for num in range(300)]
+        body = gzip.compress(b"".join(json.dumps(rec).encode("utf-8") +
+                                      b"\n" for rec in records))
+
+        def handler(request):
+            chunks = [body[pos:pos + 100] for pos in range(0, len(body), 100)]
+            return httpx.Response(200, content=iter(chunks),
+                                  headers={"Content-Encoding": "gzip"})
+        transport = mock_http2(handler)
+        interface = kismet_rest.BaseInterface(
+            host_uri="http://kismet:2501",
+            session_cache=str(tmpdir.join("session")), transport=transport)
+        assert list(interface.interact_yield(
+            "GET", "devices/all_devices.itjson")) == records
+        stats = interface.transfer_stats
+        assert stats.compressed_bytes == len(body)
+        assert stats.compressed_bytes < stats.uncompressed_bytes
+        transport.close()
+
+    def test_unit_transport_http2_concurrent(self, tmpdir):
+        """Threads sharing one HTTP/2 transport send requests concurrently."""
+        httpx = pytest.importorskip("httpx")
+        barrier = threading.Barrier(4, timeout=5)
+
+        def handler(request):
+            barrier.wait()
+            return httpx.Response(200, json={"path": request.url.path})
+        transport = mock_http2(handler)
+        interface = kismet_rest.BaseInterface(
+            host_uri="http://kismet:2501",
+            session_cache=str(tmpdir.join("session")), transport=transport)
+        paths = ["n{}.json".format(num) for num in range(8)]
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(
+                lambda path: interface.interact("GET", path), paths))
+        assert results == [{"path": "/" + path} for path in paths]
+        transport.close()